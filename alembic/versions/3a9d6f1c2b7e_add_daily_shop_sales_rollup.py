@@ -0,0 +1,46 @@
+"""add daily shop sales rollup
+
+Revision ID: 3a9d6f1c2b7e
+Revises: 0408f529d43a
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9d6f1c2b7e'
+down_revision: Union[str, None] = '0408f529d43a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_shop_sales',
+    sa.Column('sales_date', sa.Date(), nullable=False),
+    sa.Column('total_revenue', sa.BigInteger(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('items_sold', sa.Integer(), nullable=False),
+    sa.Column('distinct_customers', sa.Integer(), nullable=False),
+    sa.Column('coffee_shop_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['coffee_shop_id'], ['coffee_shops.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('coffee_shop_id', 'sales_date', name='uq_daily_shop_sales_shop_date')
+    )
+    op.create_index(op.f('ix_daily_shop_sales_sales_date'), 'daily_shop_sales', ['sales_date'], unique=False)
+
+    # Data is populated by: python -m app.services.sales_rollup_service --all
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_daily_shop_sales_sales_date'), table_name='daily_shop_sales')
+    op.drop_table('daily_shop_sales')
@@ -0,0 +1,47 @@
+"""add payment notification events
+
+Revision ID: 8c4e2b7d9f10
+Revises: 3a9d6f1c2b7e
+Create Date: 2026-10-17 14:03:27.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2b7d9f10'
+down_revision: Union[str, None] = '3a9d6f1c2b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('payment_notification_events',
+    sa.Column('order_id', sa.String(), nullable=False),
+    sa.Column('transaction_status', sa.String(), nullable=False),
+    sa.Column('status_code', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSED', 'SKIPPED', 'FAILED', name='notificationeventstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('order_id', 'transaction_status', 'status_code', name='uq_payment_notification_events_delivery')
+    )
+    op.create_index('idx_payment_notification_events_pending', 'payment_notification_events', ['received_at'], unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_payment_notification_events_pending', table_name='payment_notification_events', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_table('payment_notification_events')
+    sa.Enum(name='notificationeventstatus').drop(op.get_bind(), checkfirst=True)
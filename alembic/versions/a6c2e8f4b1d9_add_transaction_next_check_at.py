@@ -0,0 +1,40 @@
+"""add transaction next_check_at for payment reconciler
+
+Revision ID: a6c2e8f4b1d9
+Revises: f1b7d4e2a9c8
+Create Date: 2026-10-18 10:12:37.604219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c2e8f4b1d9'
+down_revision: Union[str, None] = 'f1b7d4e2a9c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL means due now: existing PENDING transactions get one poll, which schedules the next
+    op.add_column('transactions', sa.Column('next_check_at', sa.DateTime(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_transactions_pending_next_check', 'transactions', ['next_check_at'],
+            unique=False, postgresql_where=sa.text("status = 'PENDING'"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_transactions_pending_next_check', table_name='transactions',
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column('transactions', 'next_check_at')
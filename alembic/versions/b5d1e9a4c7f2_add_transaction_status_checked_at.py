@@ -0,0 +1,31 @@
+"""add transaction status_checked_at for payment reconciler
+
+Revision ID: b5d1e9a4c7f2
+Revises: 8c4e2b7d9f10
+Create Date: 2026-10-17 15:41:09.208817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d1e9a4c7f2'
+down_revision: Union[str, None] = '8c4e2b7d9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transactions', sa.Column('status_checked_at', sa.DateTime(), nullable=True))
+    # Reconciler batch: PENDING transactions by expiry
+    op.create_index('idx_transactions_pending_expiry', 'transactions', ['expiry_time'], unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_transactions_pending_expiry', table_name='transactions', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_column('transactions', 'status_checked_at')
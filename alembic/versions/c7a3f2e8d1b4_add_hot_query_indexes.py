@@ -0,0 +1,72 @@
+"""add indexes for hot query predicates
+
+Revision ID: c7a3f2e8d1b4
+Revises: b5d1e9a4c7f2
+Create Date: 2026-10-17 17:12:44.603118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a3f2e8d1b4'
+down_revision: Union[str, None] = 'b5d1e9a4c7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns, partial index predicate)
+INDEXES = [
+    # Order history per user, payer lookups, admin status/date filters
+    ('idx_orders_user_id_ordered_at', 'orders', ['user_id', 'ordered_at'], None),
+    ('idx_orders_paid_by_user_id', 'orders', ['paid_by_user_id'], "paid_by_user_id IS NOT NULL"),
+    ('idx_orders_status_ordered_at', 'orders', ['status', 'ordered_at'], None),
+    ('idx_orders_ordered_at', 'orders', ['ordered_at'], None),
+    # "Pay for others" feed and pending-order lists
+    ('idx_orders_pending_ordered_at', 'orders', ['ordered_at'], "status = 'PENDING'"),
+    ('idx_order_items_order_id', 'order_items', ['order_id'], None),
+    ('idx_order_items_coffee_id', 'order_items', ['coffee_id'], None),
+    ('idx_order_item_variants_order_item_id', 'order_item_variants', ['order_item_id'], None),
+    # Latest transaction of an order
+    ('idx_transactions_order_id_created_at', 'transactions', ['order_id', 'created_at'], None),
+    ('idx_order_status_history_order_id_changed_at', 'order_status_history', ['order_id', 'changed_at'], None),
+    # Availability and admin booking lists by day/status
+    ('idx_bookings_booking_date_status', 'bookings', ['booking_date', 'status'], None),
+    ('idx_bookings_user_id_booking_date', 'bookings', ['user_id', 'booking_date'], None),
+    ('idx_bookings_order_id', 'bookings', ['order_id'], "order_id IS NOT NULL"),
+    ('idx_booking_tables_booking_id', 'booking_tables', ['booking_id'], None),
+    ('idx_booking_tables_table_id', 'booking_tables', ['table_id'], None),
+    ('idx_booking_status_history_booking_id_changed_at', 'booking_status_history', ['booking_id', 'changed_at'], None),
+    ('idx_tables_coffee_shop_id', 'tables', ['coffee_shop_id'], None),
+    ('idx_time_slots_coffee_shop_id', 'time_slots', ['coffee_shop_id'], None),
+    ('idx_operating_hours_coffee_shop_id', 'operating_hours', ['coffee_shop_id'], None),
+    # Menu listing per shop, variants, ratings and favorites
+    ('idx_coffee_menus_coffee_shop_id', 'coffee_menus', ['coffee_shop_id'], None),
+    ('idx_coffee_variants_coffee_id', 'coffee_variants', ['coffee_id'], None),
+    ('idx_ratings_coffee_id', 'ratings', ['coffee_id'], None),
+    ('idx_user_favorites_user_id_coffee_id', 'user_favorites', ['user_id', 'coffee_id'], None),
+    ('idx_notifications_user_id_is_read', 'notifications', ['user_id', 'is_read'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction; it keeps the tables writable while building
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,52 @@
+"""add orders.coffee_shop_id
+
+Revision ID: d2f8b6a1e5c3
+Revises: c7a3f2e8d1b4
+Create Date: 2026-10-17 18:02:31.774920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f8b6a1e5c3'
+down_revision: Union[str, None] = 'c7a3f2e8d1b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('coffee_shop_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('orders_coffee_shop_id_fkey', 'orders', 'coffee_shops', ['coffee_shop_id'], ['id'])
+
+    # Backfill from the order items; older orders mixing shops get the shop
+    # of their largest item
+    op.execute("""
+        UPDATE orders o
+        SET coffee_shop_id = s.coffee_shop_id
+        FROM (
+            SELECT DISTINCT ON (oi.order_id) oi.order_id, cm.coffee_shop_id
+            FROM order_items oi
+            JOIN coffee_menus cm ON cm.id = oi.coffee_id
+            ORDER BY oi.order_id, oi.subtotal DESC
+        ) s
+        WHERE s.order_id = o.id AND o.coffee_shop_id IS NULL
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_orders_coffee_shop_id_ordered_at', 'orders', ['coffee_shop_id', 'ordered_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_orders_coffee_shop_id_ordered_at', table_name='orders', postgresql_concurrently=True, if_exists=True)
+    op.drop_constraint('orders_coffee_shop_id_fkey', 'orders', type_='foreignkey')
+    op.drop_column('orders', 'coffee_shop_id')
@@ -0,0 +1,47 @@
+"""add keyset pagination indexes
+
+Revision ID: e4a9c3d7b2f6
+Revises: d2f8b6a1e5c3
+Create Date: 2026-10-17 18:47:09.315262
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c3d7b2f6'
+down_revision: Union[str, None] = 'd2f8b6a1e5c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns); each serves `(sort, id) < (:sort, :id) ORDER BY sort DESC, id DESC`
+INDEXES = [
+    ('idx_orders_created_at_id', 'orders', ['created_at', 'id']),
+    ('idx_orders_ordered_at_id', 'orders', ['ordered_at', 'id']),
+    ('idx_bookings_created_at_id', 'bookings', ['created_at', 'id']),
+    ('idx_users_created_at_id', 'users', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        # Superseded by idx_orders_ordered_at_id, which serves the same range scans
+        op.drop_index('idx_orders_ordered_at', table_name='orders', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_orders_ordered_at', 'orders', ['ordered_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""add coffee_menus.rating_sum
+
+Revision ID: f1b7d4e2a9c8
+Revises: e4a9c3d7b2f6
+Create Date: 2026-10-17 19:21:52.480637
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b7d4e2a9c8'
+down_revision: Union[str, None] = 'e4a9c3d7b2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('coffee_menus', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill all three aggregates from the ratings table
+    op.execute("""
+        UPDATE coffee_menus cm
+        SET rating_sum = COALESCE(r.rating_sum, 0),
+            total_ratings = COALESCE(r.rating_count, 0),
+            average_rating = COALESCE(r.rating_sum::float / NULLIF(r.rating_count, 0), 0)
+        FROM coffee_menus m
+        LEFT JOIN (
+            SELECT coffee_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+            FROM ratings
+            GROUP BY coffee_id
+        ) r ON r.coffee_id = m.id
+        WHERE cm.id = m.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('coffee_menus', 'rating_sum')
@@ -1,10 +1,11 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.schemas.auth_schema import UserRegister
+from app.schemas.pagination_schema import CursorPage
 from app.services.user_service import UserService 
 from app.schemas.user_schema import UserUpdate, UserResponse # Import schemas
 
@@ -12,8 +13,10 @@ class UserController:
     def __init__(self, db: Session = Depends(get_db)): # Injeksi db ke controller
         self.service = UserService(db) 
 
-    def get_users(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
-        users = self.service.get_users(skip, limit)
+    def get_users(
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Union[List[UserResponse], CursorPage[UserResponse]]:
+        users = self.service.get_users(skip, limit, cursor=cursor)
         return users
 
     def create_user(self, user_create: UserRegister) -> UserResponse:
@@ -1,6 +1,8 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
 
+from app.services.table_allocation import TableAllocationStrategy
+
 # No need for `true` import, it's not used here directly
 
 class Settings(BaseSettings):
@@ -11,6 +13,28 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Optional asyncpg URL; derived from DATABASE_URL when not set
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool, per engine (sync and async each get one)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Server-side per-statement timeout; 0 disables it
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # Query instrumentation: log statements slower than this, and requests running more statements than this
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    REQUEST_QUERY_WARN_COUNT: int = 30
+    # Logging: "json" or "text" records, level of the app.* loggers, queue bound (records are dropped when full)
+    LOG_FORMAT: str = "json"
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000
+    # Per-logger sampling of DEBUG/INFO records, e.g. "app.services.payment_service=0.1,app.services.mailer=0.5"
+    LOG_SAMPLE_RATES: str = ""
+
+    # When set, /metrics requires "Authorization: Bearer <token>"
+    METRICS_BEARER_TOKEN: Optional[str] = None
     
     # Secret key for JWT
     SECRET_KEY: str
@@ -24,6 +48,18 @@ class Settings(BaseSettings):
     # Email
     EMAILS_FROM_EMAIL: str
     EMAILS_FROM_NAME: str
+
+    # Outbound mail: pooled SMTP connections and dispatch queue
+    MAIL_USE_STARTTLS: bool = True
+    MAIL_POOL_SIZE: int = 4
+    MAIL_TIMEOUT_SECONDS: float = 10.0
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_MAX_ATTEMPTS: int = 5
+    MAIL_RETRY_BACKOFF_SECONDS: float = 2.0
+
+    # Email templates (default app/templates/email) and their Jinja2 bytecode cache (default under the temp dir)
+    EMAIL_TEMPLATE_DIR: Optional[str] = None
+    EMAIL_TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = None
     
     # Security
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8   # 8 days
@@ -37,6 +73,27 @@ class Settings(BaseSettings):
     MIDTRANS_SANDBOX : bool = True
     MIDTRANS_CLIENT_KEY: str
     MIDTRANS_SERVER_KEY : str
+    MIDTRANS_API_BASE_URL: Optional[str] = None   # override, e.g. the local fake server
+    MIDTRANS_TIMEOUT_SECONDS: float = 10.0
+    MIDTRANS_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    MIDTRANS_MAX_CONNECTIONS: int = 20
+    MIDTRANS_MAX_RETRIES: int = 2
+    MIDTRANS_RETRY_BACKOFF_SECONDS: float = 0.2
+    MIDTRANS_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    MIDTRANS_CIRCUIT_RESET_SECONDS: float = 30.0
+    # Webhook notification queue
+    PAYMENT_NOTIFICATION_WORKER_LANES: int = 4
+    PAYMENT_NOTIFICATION_MAX_ATTEMPTS: int = 5
+    PAYMENT_NOTIFICATION_SWEEP_INTERVAL_SECONDS: float = 30.0
+    PAYMENT_NOTIFICATION_RETRY_AFTER_SECONDS: float = 30.0
+    # Payment status reconciler
+    PAYMENT_RECONCILER_TICK_SECONDS: float = 5.0
+    PAYMENT_RECONCILER_BASE_INTERVAL_SECONDS: float = 10.0
+    PAYMENT_RECONCILER_MAX_INTERVAL_SECONDS: float = 300.0
+    PAYMENT_RECONCILER_RAMP_SECONDS: float = 300.0
+    PAYMENT_RECONCILER_EXPIRY_GRACE_SECONDS: float = 900.0
+    PAYMENT_RECONCILER_BATCH_SIZE: int = 200
+    PAYMENT_RECONCILER_CONCURRENCY: int = 10
 
     # PASSWORD_RESET
     PASSWORD_RESET_TOKEN_EXPIRE_HOURS: int = 1
@@ -49,6 +106,42 @@ class Settings(BaseSettings):
 
     BASE_URL: str
 
+    # Password hashing (bcrypt on a process pool)
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Authenticated principal cache
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Streaming exports: rows fetched per server-side cursor round trip, bytes per response chunk
+    EXPORT_YIELD_PER: int = 2000
+    EXPORT_CHUNK_BYTES: int = 64 * 1024
+
+    # Public menu cache
+    PUBLIC_MENU_CACHE_TTL_SECONDS: int = 300
+    PUBLIC_MENU_CACHE_MAX_ENTRIES: int = 512
+
+    # Rating aggregates: how often stored sums/counts are checked against the ratings table
+    RATING_VERIFIER_INTERVAL_SECONDS: float = 3600.0
+
+    # Scheduled jobs (app/services/scheduler.py); each runs in one process at a time
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_BATCH_SIZE: int = 500
+    BOOKING_REMINDER_INTERVAL_SECONDS: float = 300.0
+    BOOKING_REMINDER_HOURS_AHEAD: int = 24
+    TRANSACTION_EXPIRY_INTERVAL_SECONDS: float = 300.0
+    ORDER_AUTO_CANCEL_INTERVAL_SECONDS: float = 900.0
+    ORDER_AUTO_CANCEL_AFTER_HOURS: float = 48.0
+
+    # Table occupancy index (booking availability)
+    BOOKING_OCCUPANCY_TTL_SECONDS: int = 60
+    BOOKING_OCCUPANCY_MAX_ENTRIES: int = 2048
+    BOOKING_OCCUPANCY_DEBUG_CHECK: bool = False
+    # Auto-assign strategy for booking tables: greedy, best_fit or optimal (other values fail at startup)
+    BOOKING_TABLE_ALLOCATION_STRATEGY: TableAllocationStrategy = TableAllocationStrategy.OPTIMAL
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,18 +1,83 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.utils.pool_metrics import PoolMetrics
+from app.utils.query_instrumentation import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
+pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+def _pool_options(metrics: PoolMetrics, pool_class) -> dict:
+    return {
+        "poolclass": metrics.pool_class(pool_class),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def _build_engine():
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    sync_engine = create_engine(
+        settings.DATABASE_URL, connect_args=connect_args, **_pool_options(pool_metrics, QueuePool)
+    )
+    pool_metrics.attach(sync_engine)
+    instrument_engine(sync_engine)
+    return sync_engine
+
+engine = _build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def _build_async_engine():
+    """
+    Build the asyncpg engine from ASYNC_DATABASE_URL, or derive it from DATABASE_URL.
+    asyncpg does not understand libpq's `sslmode` query param, so it is translated
+    into the `ssl` connect argument; the statement timeout goes through
+    server_settings instead of libpq `options`.
+    """
+    url = make_url(settings.ASYNC_DATABASE_URL or settings.DATABASE_URL)
+    if url.drivername in ("postgresql", "postgres", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+
+    connect_args = {}
+    sslmode = url.query.get("sslmode")
+    if sslmode is not None:
+        url = url.difference_update_query(["sslmode"])
+        if sslmode != "disable":
+            connect_args["ssl"] = sslmode
+
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+    async_db_engine = create_async_engine(
+        url, connect_args=connect_args, **_pool_options(async_pool_metrics, AsyncAdaptedQueuePool)
+    )
+    async_pool_metrics.attach(async_db_engine.sync_engine)
+    instrument_engine(async_db_engine.sync_engine)
+    return async_db_engine
+
+async_engine = _build_async_engine()
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Dependency
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependency
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
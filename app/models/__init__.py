@@ -38,6 +38,8 @@ from app.models.operating_hours import (
     TimeSlotModel,
     OperatingHoursModel
 )
+from app.models.daily_shop_sales import DailyShopSalesModel
+from app.models.payment_notification_event import NotificationEventStatus, PaymentNotificationEventModel
 
 # List of all models for easy access
 __all__ = [
@@ -68,5 +70,8 @@ __all__ = [
     "OrderStatusHistoryModel",
     "WeekDay",
     "TimeSlotModel",
-    "OperatingHoursModel"
+    "OperatingHoursModel",
+    "DailyShopSalesModel",
+    "NotificationEventStatus",
+    "PaymentNotificationEventModel"
 ]
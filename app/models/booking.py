@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Enum, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -15,6 +15,9 @@ class BookingStatus(enum.Enum):
 class TableModel(BaseModel):
     """Table model for coffee shop tables"""
     __tablename__ = "tables"
+    __table_args__ = (
+        Index("idx_tables_coffee_shop_id", "coffee_shop_id"),
+    )
     
     table_number = Column(String, nullable=False)
     capacity = Column(Integer, nullable=False)
@@ -33,6 +36,12 @@ class TableModel(BaseModel):
 class BookingModel(BaseModel):
     """Booking model for table reservations"""
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("idx_bookings_booking_date_status", "booking_date", "status"),
+        Index("idx_bookings_user_id_booking_date", "user_id", "booking_date"),
+        Index("idx_bookings_order_id", "order_id", postgresql_where=text("order_id IS NOT NULL")),
+        Index("idx_bookings_created_at_id", "created_at", "id"),
+    )
     
     booking_id = Column(String, unique=True, nullable=False)
     table_count = Column(Integer, nullable=False)
@@ -57,6 +66,10 @@ class BookingModel(BaseModel):
 class BookingTableModel(BaseModel):
     """Booking table model to connect bookings with tables"""
     __tablename__ = "booking_tables"
+    __table_args__ = (
+        Index("idx_booking_tables_booking_id", "booking_id"),
+        Index("idx_booking_tables_table_id", "table_id"),
+    )
     
     # Foreign keys
     booking_id = Column(UUID(as_uuid=True), ForeignKey("bookings.id"), nullable=False)
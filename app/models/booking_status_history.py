@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Text, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Text, ForeignKey, Enum, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
@@ -8,6 +8,9 @@ from app.models.booking import BookingStatus
 
 class BookingStatusHistoryModel(BaseModel):
     __tablename__ = "booking_status_history"
+    __table_args__ = (
+        Index("idx_booking_status_history_booking_id_changed_at", "booking_id", "changed_at"),
+    )
 
     booking_id = Column(UUID(as_uuid=True), ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False)
     old_status = Column(Enum(BookingStatus), nullable=True)  # null for initial status
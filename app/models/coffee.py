@@ -1,7 +1,7 @@
 # app/models/coffee.py - DIREVISI BERDASARKAN FILE ANDA
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Float, Text
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Float, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, ARRAY # Import ARRAY untuk tags
 from sqlalchemy.orm import relationship
 
@@ -32,6 +32,9 @@ class CoffeeShopModel(BaseModel):
 class CoffeeMenuModel(BaseModel):
     """Coffee menu model"""
     __tablename__ = "coffee_menus" 
+    __table_args__ = (
+        Index("idx_coffee_menus_coffee_shop_id", "coffee_shop_id"),
+    )
 
     name = Column(String, nullable=False)
     price = Column(Integer, nullable=False)
@@ -39,9 +42,10 @@ class CoffeeMenuModel(BaseModel):
     image_url = Column(String, nullable=True)
     is_available = Column(Boolean, default=True, nullable=False)
     
-    # Field rating agregat (diperbarui oleh rating service)
+    # Field rating agregat, diperbarui secara inkremental (app/services/rating_aggregates.py)
     average_rating = Column(Float, default=0.0) 
     total_ratings = Column(Integer, default=0) 
+    rating_sum = Column(Integer, default=0, nullable=False)
 
     # Kolom baru yang diminta frontend
     long_description = Column(Text, nullable=True) # Deskripsi lebih panjang
@@ -101,6 +105,9 @@ class VariantModel(BaseModel):
 class CoffeeVariantModel(BaseModel):
     """Coffee variant model (connecting coffee with its available variants)"""
     __tablename__ = "coffee_variants"
+    __table_args__ = (
+        Index("idx_coffee_variants_coffee_id", "coffee_id"),
+    )
     
     is_default = Column(Boolean, default=False, nullable=False)
     
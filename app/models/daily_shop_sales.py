@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, Date, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from app.models.base import BaseModel
+
+class DailyShopSalesModel(BaseModel):
+    """Daily sales rollup per coffee shop, built from COMPLETED orders"""
+    __tablename__ = "daily_shop_sales"
+    __table_args__ = (
+        UniqueConstraint("coffee_shop_id", "sales_date", name="uq_daily_shop_sales_shop_date"),
+    )
+
+    sales_date = Column(Date, nullable=False, index=True)
+    total_revenue = Column(BigInteger, nullable=False, default=0)  # Sum of order item subtotals
+    order_count = Column(Integer, nullable=False, default=0)
+    items_sold = Column(Integer, nullable=False, default=0)
+    distinct_customers = Column(Integer, nullable=False, default=0)
+
+    # Foreign keys
+    coffee_shop_id = Column(UUID(as_uuid=True), ForeignKey("coffee_shops.id", ondelete="CASCADE"), nullable=False)
+
+    # Relationships
+    coffee_shop = relationship("CoffeeShopModel")
+
+    def __repr__(self):
+        return f"<DailyShopSales {self.coffee_shop_id} {self.sales_date}>"
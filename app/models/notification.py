@@ -1,7 +1,7 @@
 # app/models/notification.py - DIREVISI BERDASARKAN FILE ANDA
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Integer, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, String, Text, Integer, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -10,6 +10,9 @@ from app.models.base import BaseModel
 class NotificationModel(BaseModel):
     """Notification model"""
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("idx_notifications_user_id_is_read", "user_id", "is_read"),
+    )
     
     type = Column(String, nullable=False)  # e.g., "order_ready", "booking_confirmed"
     message = Column(Text, nullable=False)
@@ -27,6 +30,9 @@ class NotificationModel(BaseModel):
 class UserFavoriteModel(BaseModel):
     """User favorite model for storing favorite coffee items"""
     __tablename__ = "user_favorites"
+    __table_args__ = (
+        Index("idx_user_favorites_user_id_coffee_id", "user_id", "coffee_id"),
+    )
     
     # Foreign keys
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -42,6 +48,9 @@ class UserFavoriteModel(BaseModel):
 class RatingModel(BaseModel):
     """Rating model for coffee ratings and reviews"""
     __tablename__ = "ratings"
+    __table_args__ = (
+        Index("idx_ratings_coffee_id", "coffee_id"),
+    )
     
     rating = Column(Integer, nullable=False)  # 1-5 rating
     review = Column(Text, nullable=True)
@@ -1,6 +1,6 @@
 import enum
 from datetime import time
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Enum, Time
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Enum, Time, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -19,6 +19,9 @@ class WeekDay(enum.Enum):
 class TimeSlotModel(BaseModel):
     """Time slot model for booking sessions"""
     __tablename__ = "time_slots"
+    __table_args__ = (
+        Index("idx_time_slots_coffee_shop_id", "coffee_shop_id"),
+    )
     
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
@@ -37,6 +40,9 @@ class TimeSlotModel(BaseModel):
 class OperatingHoursModel(BaseModel):
     """Operating hours model for coffee shop"""
     __tablename__ = "operating_hours"
+    __table_args__ = (
+        Index("idx_operating_hours_coffee_shop_id", "coffee_shop_id"),
+    )
     
     day = Column(Enum(WeekDay), nullable=False)
     opening_time = Column(Time, nullable=False)
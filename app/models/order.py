@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Enum, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -25,6 +25,15 @@ class StatusType(enum.Enum):
 class OrderModel(BaseModel):
     """Order model"""
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("idx_orders_user_id_ordered_at", "user_id", "ordered_at"),
+        Index("idx_orders_paid_by_user_id", "paid_by_user_id", postgresql_where=text("paid_by_user_id IS NOT NULL")),
+        Index("idx_orders_status_ordered_at", "status", "ordered_at"),
+        Index("idx_orders_ordered_at_id", "ordered_at", "id"),
+        Index("idx_orders_created_at_id", "created_at", "id"),
+        Index("idx_orders_pending_ordered_at", "ordered_at", postgresql_where=text("status = 'PENDING'")),
+        Index("idx_orders_coffee_shop_id_ordered_at", "coffee_shop_id", "ordered_at"),
+    )
     
     order_id = Column(String, unique=True, nullable=False)
     status = Column(Enum(OrderStatus), nullable=False, default=OrderStatus.PENDING)
@@ -41,10 +50,12 @@ class OrderModel(BaseModel):
     # Foreign keys
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     paid_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    coffee_shop_id = Column(UUID(as_uuid=True), ForeignKey("coffee_shops.id"), nullable=True)  # Shop of the ordered items, set at creation
     
     # Relationships
     user = relationship("UserModel", back_populates="orders", foreign_keys=[user_id])
     paid_by_user = relationship("UserModel", back_populates="paid_orders", foreign_keys=[paid_by_user_id])
+    coffee_shop = relationship("CoffeeShopModel")
     order_items = relationship("OrderItemModel", back_populates="order")
     transactions = relationship("TransactionModel", back_populates="order")
     booking = relationship("BookingModel", back_populates="order", uselist=False)
@@ -56,6 +67,10 @@ class OrderModel(BaseModel):
 class OrderItemModel(BaseModel):
     """Order item model"""
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("idx_order_items_order_id", "order_id"),
+        Index("idx_order_items_coffee_id", "coffee_id"),
+    )
     
     quantity = Column(Integer, nullable=False)
     subtotal = Column(Integer, nullable=False)
@@ -75,6 +90,9 @@ class OrderItemModel(BaseModel):
 class OrderItemVariantModel(BaseModel):
     """Order item variant model"""
     __tablename__ = "order_item_variants"
+    __table_args__ = (
+        Index("idx_order_item_variants_order_item_id", "order_item_id"),
+    )
     
     # Foreign keys
     order_item_id = Column(UUID(as_uuid=True), ForeignKey("order_items.id"), nullable=False)
@@ -90,6 +108,11 @@ class OrderItemVariantModel(BaseModel):
 class TransactionModel(BaseModel):
     """Transaction model for payment transactions"""
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("idx_transactions_order_id_created_at", "order_id", "created_at"),
+        Index("idx_transactions_pending_expiry", "expiry_time", postgresql_where=text("status = 'PENDING'")),
+        Index("idx_transactions_pending_next_check", "next_check_at", postgresql_where=text("status = 'PENDING'")),
+    )
     
     transaction_id = Column(String, unique=True, nullable=False)
     gross_amount = Column(Integer, nullable=False)
@@ -98,6 +121,8 @@ class TransactionModel(BaseModel):
     expiry_time = Column(DateTime, nullable=True)
     transaction_time = Column(DateTime, nullable=False)
     payment_type = Column(String, nullable=False)
+    status_checked_at = Column(DateTime, nullable=True)  # Last Midtrans status poll (reconciler)
+    next_check_at = Column(DateTime, nullable=True)  # When the reconciler polls next; NULL = due now
 
     qr_code_url = Column(Text, nullable=True) 
     deeplink_url = Column(Text, nullable=True) 
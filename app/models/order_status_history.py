@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Text, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Text, ForeignKey, Enum, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
@@ -8,6 +8,9 @@ from app.models.order import OrderStatus
 
 class OrderStatusHistoryModel(BaseModel):
     __tablename__ = "order_status_history"
+    __table_args__ = (
+        Index("idx_order_status_history_order_id_changed_at", "order_id", "changed_at"),
+    )
 
     order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
     old_status = Column(Enum(OrderStatus), nullable=True)  # null for initial status
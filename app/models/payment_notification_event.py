@@ -0,0 +1,36 @@
+import enum
+from sqlalchemy import Column, String, Integer, DateTime, Enum, Text, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.models.base import BaseModel
+
+class NotificationEventStatus(enum.Enum):
+    PENDING = "PENDING"        # Stored, waiting for the worker
+    PROCESSED = "PROCESSED"    # State transition applied
+    SKIPPED = "SKIPPED"        # Nothing to apply (transaction already final)
+    FAILED = "FAILED"          # Gave up after max attempts
+
+class PaymentNotificationEventModel(BaseModel):
+    """Raw Midtrans webhook delivery; one row per (order_id, transaction_status, status_code)"""
+    __tablename__ = "payment_notification_events"
+    __table_args__ = (
+        UniqueConstraint(
+            "order_id", "transaction_status", "status_code",
+            name="uq_payment_notification_events_delivery"
+        ),
+        Index("idx_payment_notification_events_pending", "received_at", postgresql_where=text("status = 'PENDING'")),
+    )
+
+    order_id = Column(String, nullable=False)  # Midtrans order id (may carry the -PFO- suffix)
+    transaction_status = Column(String, nullable=False)
+    status_code = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+
+    status = Column(Enum(NotificationEventStatus), nullable=False, default=NotificationEventStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<PaymentNotificationEvent {self.order_id} {self.transaction_status} {self.status}>"
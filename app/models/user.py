@@ -1,7 +1,7 @@
 # app/models/user.py - (Hanya untuk konfirmasi, tidak ada perubahan kode di sini)
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, ForeignKey, Enum, Boolean, DateTime
+from sqlalchemy import Column, String, ForeignKey, Enum, Boolean, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -25,6 +25,9 @@ class RoleModel(BaseModel):
 
 class UserModel(BaseModel):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("idx_users_created_at_id", "created_at", "id"),
+    )
     
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
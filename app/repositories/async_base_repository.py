@@ -0,0 +1,70 @@
+from typing import Generic, TypeVar, Type, List, Optional, Any, Dict, Union
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from app.core.database import Base
+
+ModelType = TypeVar("ModelType", bound=Base) # type: ignore
+CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
+UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
+
+class AsyncBaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Async counterpart of BaseRepository, backed by an AsyncSession
+    """
+    
+    def __init__(self, model: Type[ModelType], db: AsyncSession):
+        self.model = model
+        self.db = db
+    
+    async def get(self, id: UUID) -> Optional[ModelType]:
+        """Get entity by ID"""
+        return await self.db.get(self.model, id)
+    
+    async def get_by_field(self, field_name: str, value: Any) -> Optional[ModelType]:
+        """Get entity by a specific field value"""
+        result = await self.db.execute(
+            select(self.model).where(getattr(self.model, field_name) == value).limit(1)
+        )
+        return result.scalars().first()
+    
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        """Get all entities with pagination"""
+        result = await self.db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    async def create(self, obj_in: Union[CreateSchemaType, Dict[str, Any]]) -> ModelType:
+        """Create new entity"""
+        self.db.add(obj_in) # Langsung tambahkan objek model SQLAlchemy ke session
+        await self.db.commit()
+        await self.db.refresh(obj_in)
+        return obj_in
+    
+    async def update(self, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> ModelType:
+        """Update entity"""
+        obj_data = db_obj.__dict__.copy()
+        
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+            
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+                
+        self.db.add(db_obj)
+        await self.db.commit()
+        await self.db.refresh(db_obj)
+        return db_obj
+    
+    async def delete(self, id: UUID) -> bool:
+        """Delete entity by ID"""
+        db_obj = await self.db.get(self.model, id)
+        if db_obj:
+            await self.db.delete(db_obj)
+            await self.db.commit()
+            return True
+        return False
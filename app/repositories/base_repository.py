@@ -1,9 +1,10 @@
-from typing import Generic, TypeVar, Type, List, Optional, Any, Dict, Union
+from typing import Generic, TypeVar, Type, List, Optional, Any, Dict, Tuple, Union
 from uuid import UUID
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.core.database import Base
+from app.utils.pagination import keyset_page
 
 ModelType = TypeVar("ModelType", bound=Base) # type: ignore
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -30,6 +31,10 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Get all entities with pagination"""
         return self.db.query(self.model).offset(skip).limit(limit).all()
     
+    def get_page(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[ModelType], Optional[str]]:
+        """Get entities newest first after `cursor`; returns the page and the next cursor"""
+        return keyset_page(self.db.query(self.model), self.model.created_at, self.model.id, cursor, limit)
+    
     def create(self, obj_in: Union[CreateSchemaType, Dict[str, Any]]) -> ModelType:
         """Create new entity"""
         self.db.add(obj_in) # Langsung tambahkan objek model SQLAlchemy ke session
@@ -5,7 +5,8 @@ from app.routes.admin import (
     booking_status_routes,
     admin_order_management_routes,
     admin_analitics_statistics,
-    admin_user_management_routes
+    admin_user_management_routes,
+    admin_system_routes
 )
 
 router = APIRouter()
@@ -15,4 +16,5 @@ router.include_router(admin_booking_management_routes.router)
 router.include_router(booking_status_routes.router)
 router.include_router(admin_order_management_routes.router)
 router.include_router(admin_analitics_statistics.router)
-router.include_router(admin_user_management_routes.router)
\ No newline at end of file
+router.include_router(admin_user_management_routes.router)
+router.include_router(admin_system_routes.router)
\ No newline at end of file
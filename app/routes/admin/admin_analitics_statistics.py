@@ -5,9 +5,11 @@ from typing import Optional
 from uuid import UUID
 from datetime import date, datetime
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.models.order import OrderStatus
 from app.models.user import UserModel
 from app.schemas.admin_analytics_schema import (
     SalesAnalyticsResponse,
@@ -21,6 +23,7 @@ from app.schemas.admin_analytics_schema import (
     DateRangeAnalytics
 )
 from app.services.admin_analytics_service import admin_analytics_service
+from app.services.export_service import EXPORT_FORMATS, export_service
 from app.utils.security import get_current_admin_user
 
 router = APIRouter(prefix="/analytics", tags=["Admin ~ Analytics & Statistics"])
@@ -28,11 +31,13 @@ router = APIRouter(prefix="/analytics", tags=["Admin ~ Analytics & Statistics"])
 @router.get("/dashboard/summary", response_model=DashboardSummaryResponse)
 async def get_dashboard_summary(
     coffee_shop_id: Optional[UUID] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get dashboard summary statistics (Admin only)"""
-    return admin_analytics_service.get_dashboard_summary(db, coffee_shop_id)
+    return await db.run_sync(lambda session: admin_analytics_service.get_dashboard_summary(
+        session, coffee_shop_id
+    ))
 
 @router.get("/sales", response_model=SalesAnalyticsResponse)
 async def get_sales_analytics(
@@ -40,13 +45,13 @@ async def get_sales_analytics(
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
     coffee_shop_id: Optional[UUID] = Query(None),
     group_by: str = Query("day", regex="^(day|week|month)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get sales analytics with date range and grouping (Admin only)"""
-    return admin_analytics_service.get_sales_analytics(
-        db, start_date, end_date, coffee_shop_id, group_by
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_sales_analytics(
+        session, start_date, end_date, coffee_shop_id, group_by
+    ))
 
 @router.get("/revenue", response_model=RevenueAnalyticsResponse)
 async def get_revenue_analytics(
@@ -54,51 +59,51 @@ async def get_revenue_analytics(
     end_date: Optional[date] = Query(None),
     coffee_shop_id: Optional[UUID] = Query(None),
     group_by: str = Query("day", regex="^(day|week|month)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get revenue analytics (Admin only)"""
-    return admin_analytics_service.get_revenue_analytics(
-        db, start_date, end_date, coffee_shop_id, group_by
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_revenue_analytics(
+        session, start_date, end_date, coffee_shop_id, group_by
+    ))
 
 @router.get("/orders", response_model=OrderAnalyticsResponse)
 async def get_order_analytics(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     coffee_shop_id: Optional[UUID] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get order analytics (Admin only)"""
-    return admin_analytics_service.get_order_analytics(
-        db, start_date, end_date, coffee_shop_id
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_order_analytics(
+        session, start_date, end_date, coffee_shop_id
+    ))
 
 @router.get("/users", response_model=UserAnalyticsResponse)
 async def get_user_analytics(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     coffee_shop_id: Optional[UUID] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get user analytics (Admin only)"""
-    return admin_analytics_service.get_user_analytics(
-        db, start_date, end_date, coffee_shop_id
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_user_analytics(
+        session, start_date, end_date, coffee_shop_id
+    ))
 
 @router.get("/coffee-shops", response_model=CoffeeShopAnalyticsResponse)
 async def get_coffee_shop_analytics(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get coffee shop performance analytics (Admin only)"""
-    return admin_analytics_service.get_coffee_shop_analytics(
-        db, start_date, end_date
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_coffee_shop_analytics(
+        session, start_date, end_date
+    ))
 
 @router.get("/popular-items", response_model=PopularItemsResponse)
 async def get_popular_items(
@@ -106,38 +111,38 @@ async def get_popular_items(
     end_date: Optional[date] = Query(None),
     coffee_shop_id: Optional[UUID] = Query(None),
     limit: int = Query(10, le=50),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get popular menu items analytics (Admin only)"""
-    return admin_analytics_service.get_popular_items(
-        db, start_date, end_date, coffee_shop_id, limit
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_popular_items(
+        session, start_date, end_date, coffee_shop_id, limit
+    ))
 
 @router.get("/customer-behavior", response_model=CustomerBehaviorResponse)
 async def get_customer_behavior_analytics(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     coffee_shop_id: Optional[UUID] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get customer behavior analytics (Admin only)"""
-    return admin_analytics_service.get_customer_behavior_analytics(
-        db, start_date, end_date, coffee_shop_id
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_customer_behavior_analytics(
+        session, start_date, end_date, coffee_shop_id
+    ))
 
 @router.get("/date-range", response_model=DateRangeAnalytics)
 async def get_date_range_analytics(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     coffee_shop_id: Optional[UUID] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get comprehensive analytics for a specific date range (Admin only)"""
-    return admin_analytics_service.get_date_range_analytics(
-        db, start_date, end_date, coffee_shop_id
-    )
+    return await db.run_sync(lambda session: admin_analytics_service.get_date_range_analytics(
+        session, start_date, end_date, coffee_shop_id
+    ))
 
 @router.get("/export/csv")
 async def export_analytics_csv(
@@ -145,10 +150,32 @@ async def export_analytics_csv(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     coffee_shop_id: Optional[UUID] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Export analytics data as CSV (Admin only)"""
-    return admin_analytics_service.export_analytics_csv(
-        db, report_type, start_date, end_date, coffee_shop_id
-    )
\ No newline at end of file
+    return await db.run_sync(lambda session: admin_analytics_service.export_analytics_csv(
+        session, report_type, start_date, end_date, coffee_shop_id
+    ))
+
+@router.get("/export/raw")
+async def export_raw_data(
+    dataset: str = Query(..., regex="^(orders|order_items)$", description="orders: one row per order; order_items: one row per line item"),
+    fmt: str = Query("csv", alias="format", regex="^(csv|ndjson)$"),
+    gzip: bool = Query(False, description="Gzip the file (.gz download)"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    coffee_shop_id: Optional[UUID] = Query(None),
+    status: Optional[OrderStatus] = Query(None),
+    current_user: UserModel = Depends(get_current_admin_user)
+):
+    """Stream raw orders or order line items as CSV/NDJSON, constant memory for any date range (Admin only)"""
+    body = export_service.stream(
+        dataset, fmt, gzip,
+        start_date=start_date, end_date=end_date, coffee_shop_id=coffee_shop_id, status=status
+    )
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={export_service.filename(dataset, fmt, gzip)}"}
+    )
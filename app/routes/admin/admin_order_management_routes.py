@@ -1,7 +1,7 @@
 """
 Controller for admin order management
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
@@ -15,6 +15,7 @@ from app.schemas.admin_order_schema import (
     OrderStatusHistoryResponse,
     BulkOrderStatusUpdate
 )
+from app.schemas.pagination_schema import CursorPage
 from app.services.admin_orders_services import admin_order_service
 from app.services.notification_services import notification_service
 from app.utils.security import get_current_admin_user
@@ -22,20 +23,21 @@ from app.models.order import OrderStatus
 
 router = APIRouter(prefix="/order-management", tags=["Admin ~ Order Management"])
 
-@router.get("/orders", response_model=List[OrderManagementResponse])
+@router.get("/orders", response_model=Union[List[OrderManagementResponse], CursorPage[OrderManagementResponse]])
 async def get_all_orders(
     status: Optional[OrderStatus] = Query(None, description="Filter by order status"),
     coffee_shop_id: Optional[UUID] = Query(None, description="Filter by coffee shop"),
     user_id: Optional[UUID] = Query(None, description="Filter by user"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor; empty for the first page, then next_cursor"),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
     """Get all orders with filtering options (Admin only)"""
     return admin_order_service.get_all_orders(
         db, status=status, coffee_shop_id=coffee_shop_id, 
-        user_id=user_id, skip=skip, limit=limit
+        user_id=user_id, skip=skip, limit=limit, cursor=cursor
     )
 
 @router.get("/orders/{order_id}", response_model=OrderWithItemsResponse)
@@ -0,0 +1,31 @@
+"""
+Controller for admin system diagnostics
+"""
+from fastapi import APIRouter, Depends
+
+from app.core.database import async_pool_metrics, pool_metrics
+from app.models.user import UserModel
+from app.services.scheduler import job_scheduler
+from app.utils.security import get_current_admin_user
+
+router = APIRouter(prefix="/system", tags=["Admin ~ System"])
+
+@router.get("/db-pool")
+def get_db_pool_stats(
+    current_user: UserModel = Depends(get_current_admin_user)
+):
+    """Connection pool occupancy, checkout wait histogram and connection age per engine (Admin only)"""
+    return {
+        "sync": pool_metrics.snapshot(),
+        "async": async_pool_metrics.snapshot(),
+    }
+
+@router.get("/jobs")
+def get_scheduled_job_stats(
+    current_user: UserModel = Depends(get_current_admin_user)
+):
+    """Runs, skips (lock held elsewhere), errors and last duration per scheduled job (Admin only)"""
+    return {
+        name: {"interval_seconds": job.interval_seconds, **job_scheduler.stats[name]}
+        for name, job in job_scheduler.jobs.items()
+    }
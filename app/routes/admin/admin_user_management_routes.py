@@ -1,26 +1,28 @@
 from fastapi import APIRouter, Depends, Query, status
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.controllers.admin_user_management import UserController 
 from app.schemas.auth_schema import UserRegister
+from app.schemas.pagination_schema import CursorPage
 from app.schemas.user_schema import  UserCreate, UserUpdate, UserResponse 
 from app.models.user import UserModel 
 from app.utils.security import get_current_admin_user 
 
 router = APIRouter(prefix="/user-management", tags=["Admin ~ User Management"])
 
-@router.get("/users", response_model=List[UserResponse], summary="Get all users (Admin only)")
+@router.get("/users", response_model=Union[List[UserResponse], CursorPage[UserResponse]], summary="Get all users (Admin only)")
 def get_all_users_admin(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=200),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor; empty for the first page, then next_cursor"),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_admin_user) 
 ):
     controller = UserController(db) # Inisialisasi controller dengan db
-    return controller.get_users(skip=skip, limit=limit)
+    return controller.get_users(skip=skip, limit=limit, cursor=cursor)
 
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED, summary="Create a new user (Admin only)")
 def create_user_admin(
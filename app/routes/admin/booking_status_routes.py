@@ -1,7 +1,7 @@
 """
 Controller for admin booking status management
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
@@ -14,6 +14,7 @@ from app.schemas.admin_booking_schema import (
     BookingStatusHistoryResponse,
     BulkBookingStatusUpdate
 )
+from app.schemas.pagination_schema import CursorPage
 from app.services.notification_services import notification_service
 from app.services.admin_booking_services import admin_booking_service as services
 from app.utils.security import get_current_admin_user
@@ -21,7 +22,7 @@ from app.models.booking import BookingStatus
 
 router = APIRouter(prefix="/booking-status", tags=["Admin ~ Booking Status Management"])
 
-@router.get("/bookings", response_model=List[BookingManagementResponse])
+@router.get("/bookings", response_model=Union[List[BookingManagementResponse], CursorPage[BookingManagementResponse]])
 async def get_all_bookings(
     status: Optional[BookingStatus] = Query(None, description="Filter by booking status"),
     coffee_shop_id: Optional[UUID] = Query(None, description="Filter by coffee shop"),
@@ -29,6 +30,7 @@ async def get_all_bookings(
     booking_date: Optional[str] = Query(None, description="Filter by booking date (YYYY-MM-DD)"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor; empty for the first page, then next_cursor"),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_admin_user)
 ):
@@ -36,7 +38,7 @@ async def get_all_bookings(
     return services.get_all_bookings(
         db, status=status, coffee_shop_id=coffee_shop_id,
         user_id=user_id, booking_date=booking_date,
-        skip=skip, limit=limit
+        skip=skip, limit=limit, cursor=cursor
     )
 
 @router.get("/bookings/{booking_id}", response_model=BookingManagementResponse)
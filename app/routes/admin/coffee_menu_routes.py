@@ -4,6 +4,7 @@ from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
 from app.controllers.coffee_menu_controller import CoffeeMenuController
+from app.services.coffee_menu_service import public_menu_cache
 from app.schemas.coffee_schema import CoffeeMenuCreate, CoffeeMenuUpdate, CoffeeMenuResponse
 from app.core.database import get_db
 from app.utils.security import get_current_admin_user
@@ -44,6 +45,13 @@ def get_coffee_menu(
     controller = CoffeeMenuController(db)
     return controller.get_coffee_menu(coffee_shop_id, skip, limit)
 
+@router.get("/menu/cache-stats")
+def get_public_menu_cache_stats(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Hit/miss counters of the public menu cache (Admin only)"""
+    return public_menu_cache.stats()
+
 @router.get("/menu/{coffee_id}", response_model=CoffeeMenuResponse)
 def get_coffee_menu_by_id(
     coffee_id: UUID,
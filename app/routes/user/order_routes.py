@@ -3,7 +3,7 @@
 """
 Routes for user coffee orders - Updated with pay for others functionality
 """
-from typing import List
+from typing import List, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
@@ -17,6 +17,7 @@ from app.schemas.order_schema import (
     OrderFilterParams,
     PayableOrderResponse
 )
+from app.schemas.pagination_schema import CursorPage
 from app.services.order_service import order_service
 from app.utils.security import get_current_user
 
@@ -31,7 +32,7 @@ async def create_order(
     """Create a new coffee order"""
     return order_service.create_order(db, order_data, current_user.id)
 
-@router.get("", response_model=List[OrderWithItemsResponse], summary="Get all orders for the current user")
+@router.get("", response_model=Union[List[OrderWithItemsResponse], CursorPage[OrderWithItemsResponse]], summary="Get all orders for the current user")
 async def get_user_orders(
     params: OrderFilterParams = Depends(),
     db: Session = Depends(get_db),
@@ -3,6 +3,7 @@
 """
 Routes for payment processing with Midtrans, including pay for others feature
 """
+import asyncio
 import json
 from typing import Dict, Any
 from uuid import UUID
@@ -21,8 +22,9 @@ from app.schemas.payment_schema import (
     OrderPaymentInfoResponse
 )
 from app.services.auth_services import AuthService
+from app.services.payment_notification_worker import payment_notification_worker
 from app.services.payment_service import payment_service
-from app.utils.security import get_current_user
+from app.utils.security import get_current_user, get_current_admin_user
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -37,12 +39,12 @@ async def create_payment(
 ):
     """Create a payment token for an order (Midtrans integration)"""
     try:
-        return payment_service.create_payment(db, payment_data, current_user.id)
+        return await payment_service.create_payment(db, payment_data, current_user.id)
     except HTTPException as e:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error creating payment: {str(e)}")
+        logger.error("Error creating payment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating payment: {str(e)}"
@@ -66,7 +68,7 @@ async def get_order_payment_info(
     except HTTPException as e:
         raise
     except Exception as e:
-        logger.error(f"Error getting order payment info: {str(e)}")
+        logger.error("Error getting order payment info: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting order payment info: {str(e)}"
@@ -80,12 +82,12 @@ async def pay_for_others(
 ):
     """Pay for someone else's order"""
     try:
-        return payment_service.pay_for_others(db, payment_data, current_user.id)
+        return await payment_service.pay_for_others(db, payment_data, current_user.id)
     except HTTPException as e:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error creating pay for others payment: {str(e)}")
+        logger.error("Error creating pay for others payment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating pay for others payment: {str(e)}"
@@ -110,7 +112,7 @@ async def check_payment_status(
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error checking payment status: {str(e)}")
+        logger.error("Error checking payment status: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error checking payment status: {str(e)}"
@@ -127,19 +129,39 @@ async def handle_payment_notification(
     This endpoint receives payment status updates from Midtrans.
     It should be configured in the Midtrans dashboard as your notification URL.
     """
+    logger.info("Received notification from Midtrans: %s", notification)
     try:
-        logger.info(f"Received notification from Midtrans: {notification}")
-        payment_service.process_notification(db, notification)
-        return {"status": "OK"}
-    except Exception as e:
-        logger.error(f"Error processing payment notification: {str(e)}")
-        # Still return a 200 OK to Midtrans to prevent retries for non-recoverable errors
-        # but log the error for investigation
+        payment_service.verify_notification(notification)
+    except ValueError as e:
+        logger.error("Rejected payment notification: %s", e)
+        # Return 200 OK so Midtrans does not retry a notification that can never be verified
         return {
             "status": "ERROR",
             "message": str(e)
         }
 
+    # Store the raw event before acknowledging, the state transition is applied by the background worker
+    try:
+        event_id = await asyncio.to_thread(payment_notification_worker.ingest, db, notification)
+    except Exception as e:
+        logger.error("Error storing payment notification: %s", e)
+        # Not stored: a 5xx makes Midtrans deliver it again
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Notification could not be stored, please retry"
+        )
+    if event_id:
+        payment_notification_worker.enqueue(event_id, notification["order_id"])
+    return {"status": "OK"}
+
+@router.get("/notification/stats")
+def get_payment_notification_stats(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_admin_user)
+):
+    """Webhook queue depth, processing lag and counters (Admin only)"""
+    return payment_notification_worker.stats(db)
+
 # Optional additional endpoint for handling payment completion redirects
 @router.get("/finished/{order_id}")
 async def payment_finished(
@@ -153,7 +175,7 @@ async def payment_finished(
     This endpoint should be configured as the 'finish' redirect URL in Midtrans.
     It allows users to return to your app after completing payment.
     """
-    logger.info(f"Payment finished for order {order_id}")
+    logger.info("Payment finished for order %s", order_id)
     # You might want to redirect to an order confirmation page
     # This is just a simple response for now
     return {"message": "Payment process completed, thank you!"}
@@ -170,7 +192,7 @@ async def payment_error(
     This endpoint should be configured as the 'error' redirect URL in Midtrans.
     It allows users to return to your app after payment errors.
     """
-    logger.info(f"Payment error for order {order_id}")
+    logger.info("Payment error for order %s", order_id)
     # You might want to redirect to a payment retry page
     # This is just a simple response for now
     return {"message": "There was an issue with your payment. Please try again."}
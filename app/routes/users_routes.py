@@ -1,10 +1,11 @@
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from app.utils.security import get_current_user, get_current_admin_user
+from app.utils.security import get_current_user, get_current_admin_user, get_principal_cache_stats
 from app.services.user_service import UserService
 from app.models.user import UserModel, Role
+from app.schemas.pagination_schema import CursorPage
 from app.schemas.user_schema import (
     UserBase,
     UserResponse, 
@@ -24,6 +25,13 @@ def get_current_user_profile(
 ):
     return user_controller.get_current_user_profile(current_user, user_service)
 
+@router.get("/auth-cache-stats")
+def get_auth_cache_stats(
+    current_user: UserModel = Depends(get_current_admin_user)
+):
+    """Principal cache hit/miss counters and average auth resolution time (Admin only)"""
+    return get_principal_cache_stats()
+
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: UUID,
@@ -51,16 +59,18 @@ def update_user(
         is_verified=updated_user.is_verified
     )
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=Union[List[UserResponse], CursorPage[UserResponse]])
 def get_users(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: UserModel = Depends(get_current_admin_user),
     user_service: UserService = Depends()
 ):
-    """Get all users (admin only)"""
-    users = user_service.get_users(skip, limit)
-    return [
+    """Get all users (admin only); pass `cursor` (empty for the first page) for keyset paging"""
+    users = user_service.get_users(skip, limit, cursor=cursor)
+    page = users.items if cursor is not None else users
+    items = [
         UserResponse(
             id=user.id,
             name=user.name,
@@ -68,8 +78,11 @@ def get_users(
             phone_number=user.phone_number,
             role=user.role.role,
             is_verified=user.is_verified
-        ) for user in users
+        ) for user in page
     ]
+    if cursor is not None:
+        return CursorPage(items=items, next_cursor=users.next_cursor)
+    return items
 
 @router.patch("/{user_id}/role", response_model=UserResponse)
 def update_user_role(
@@ -82,6 +82,7 @@ class OrderResponse(BaseModel):
 
     paid_by_user_id: Optional[UUID] = None
     paid_by_user_name: Optional[str] = None 
+    coffee_shop_id: Optional[UUID] = None
 
     payment_status: Optional[str] = None 
 
@@ -138,4 +139,5 @@ class OrderFilterParams(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     limit: int = Field(default=20, le=100)
-    offset: int = Field(default=0, ge=0)
\ No newline at end of file
+    offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None  # Keyset pagination; empty for the first page, then next_cursor
\ No newline at end of file
@@ -0,0 +1,11 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """Page returned when a listing is called with `cursor` (empty for the first page)"""
+    items: List[T]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page; None on the last page
@@ -66,6 +66,8 @@ class PaymentStatusResponse(BaseModel):
     payment_time: Optional[datetime] = None
     paid_by_user_id: Optional[UUID] = None
     paid_by_user_name: Optional[str] = None
+    last_checked_at: Optional[datetime] = None       # Last time Midtrans was polled for this transaction
+    max_staleness_seconds: Optional[int] = None     # Upper bound on how old a PENDING status can be
 
 class OrderPaymentInfoResponse(BaseModel):
     """Response for getting order payment information"""
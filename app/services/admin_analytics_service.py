@@ -1,3 +1,4 @@
+import logging
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 from datetime import date, datetime, timedelta
@@ -11,7 +12,7 @@ from app.models.order import OrderModel, OrderItemModel, OrderStatus, Transactio
 from app.models.coffee import CoffeeShopModel, CoffeeMenuModel, VariantModel, CoffeeVariantModel
 from app.models.booking import BookingModel, BookingStatus, TableModel, BookingTableModel
 from app.models.notification import RatingModel 
-from app.utils.logger import logger 
+from app.models.daily_shop_sales import DailyShopSalesModel
 
 from app.schemas.admin_analytics_schema import (
     DashboardSummaryResponse,
@@ -30,111 +31,100 @@ from app.schemas.admin_analytics_schema import (
     CustomerSegment,
 )
 
+logger = logging.getLogger(__name__)
+
 class AdminAnalyticsService:
+    def _shop_booking_ids(self, db: Session, coffee_shop_id: UUID):
+        """Subquery id booking yang memakai meja dari kedai kopi tertentu."""
+        return db.query(BookingTableModel.booking_id)\
+                 .join(TableModel, BookingTableModel.table_id == TableModel.id)\
+                 .filter(TableModel.coffee_shop_id == coffee_shop_id)
+
     def get_dashboard_summary(self, db: Session, coffee_shop_id: Optional[UUID]) -> DashboardSummaryResponse:
         """
         Mengambil statistik ringkasan dashboard.
+
+        Semua metrik dihitung dengan dua query agregat bersyarat (FILTER):
+        satu atas tabel orders dan satu atas tabel bookings yang sekaligus
+        membawa scalar subquery untuk total user, total menu dan item terlaris.
+        Filter kedai memakai kolom orders.coffee_shop_id dan subquery IN untuk
+        booking sehingga baris order/booking tidak terduplikasi oleh join ke item/meja.
         """
         today = date.today()
         this_month_start = today.replace(day=1)
-        
-        # Base query for orders and bookings, filtered by coffee_shop_id if provided
-        orders_base_query = db.query(OrderModel).filter(OrderModel.status == OrderStatus.COMPLETED)
-        bookings_base_query = db.query(BookingModel).filter(BookingModel.status == BookingStatus.SUCCESS)
-
-        if coffee_shop_id:
-            orders_base_query = orders_base_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
-            bookings_base_query = bookings_base_query.join(BookingTableModel, BookingModel.id == BookingTableModel.booking_id)\
-                                                    .join(TableModel, BookingTableModel.table_id == TableModel.id)\
-                                                    .filter(TableModel.coffee_shop_id == coffee_shop_id)
-
-        # Total Revenue Today
-        total_revenue_today = orders_base_query.filter(func.date(OrderModel.ordered_at) == today)\
-                                                .with_entities(func.sum(OrderModel.total_price))\
-                                                .scalar() or 0
-
-        # Total Revenue This Month
-        total_revenue_this_month = orders_base_query.filter(OrderModel.ordered_at >= this_month_start)\
-                                                    .with_entities(func.sum(OrderModel.total_price))\
-                                                    .scalar() or 0
-
-        # Total Orders Today
-        total_orders_today = orders_base_query.filter(func.date(OrderModel.ordered_at) == today).count()
-
-        # Total Orders This Month
-        total_orders_this_month = orders_base_query.filter(OrderModel.ordered_at >= this_month_start).count()
-
-        # Total Bookings Today
-        total_bookings_today = bookings_base_query.filter(func.date(BookingModel.booking_date) == today).count()
-
-        # Total Bookings This Month
-        total_bookings_this_month = bookings_base_query.filter(BookingModel.booking_date >= this_month_start).count()
-
-        # Active Users Today (users who placed an order today)
-        active_users_today = db.query(func.count(distinct(OrderModel.user_id)))\
-                                .filter(func.date(OrderModel.ordered_at) == today)
-        if coffee_shop_id:
-            active_users_today = active_users_today.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
-        active_users_today = active_users_today.scalar() or 0
-
-        # Active Users This Month (users who placed an order this month)
-        active_users_this_month = db.query(func.count(distinct(OrderModel.user_id)))\
-                                    .filter(OrderModel.ordered_at >= this_month_start)
-        if coffee_shop_id:
-            active_users_this_month = active_users_this_month.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                            .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                            .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
-        active_users_this_month = active_users_this_month.scalar() or 0
-
-        total_users_system = db.query(UserModel).count() 
+        last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
+        last_month_end = this_month_start - timedelta(days=1)
 
-        # Total Menu Items (count all active coffee menu items)
-        total_menu_items = db.query(CoffeeMenuModel).filter(CoffeeMenuModel.is_available == True).count()
+        is_completed = OrderModel.status == OrderStatus.COMPLETED
+        ordered_today = func.date(OrderModel.ordered_at) == today
+        ordered_this_month = OrderModel.ordered_at >= this_month_start
+        ordered_last_month = and_(
+            OrderModel.ordered_at >= last_month_start,
+            OrderModel.ordered_at <= last_month_end
+        )
 
-        # Pending Orders Count
-        pending_orders_count = db.query(OrderModel).filter(OrderModel.status == OrderStatus.PENDING)
+        # Query 1: seluruh metrik order dalam satu pass
+        order_stats_query = db.query(
+            func.coalesce(func.sum(OrderModel.total_price).filter(and_(is_completed, ordered_today)), 0).label("revenue_today"),
+            func.coalesce(func.sum(OrderModel.total_price).filter(and_(is_completed, ordered_this_month)), 0).label("revenue_this_month"),
+            func.coalesce(func.sum(OrderModel.total_price).filter(and_(is_completed, ordered_last_month)), 0).label("revenue_last_month"),
+            func.count(OrderModel.id).filter(and_(is_completed, ordered_today)).label("orders_today"),
+            func.count(OrderModel.id).filter(and_(is_completed, ordered_this_month)).label("orders_this_month"),
+            func.count(OrderModel.id).filter(and_(is_completed, ordered_last_month)).label("orders_last_month"),
+            func.count(distinct(OrderModel.user_id)).filter(ordered_today).label("active_users_today"),
+            func.count(distinct(OrderModel.user_id)).filter(ordered_this_month).label("active_users_this_month"),
+            func.count(OrderModel.id).filter(OrderModel.status == OrderStatus.PENDING).label("pending_orders"),
+        ).filter(or_(
+            OrderModel.ordered_at >= last_month_start,
+            OrderModel.status == OrderStatus.PENDING
+        ))
         if coffee_shop_id:
-            pending_orders_count = pending_orders_count.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                        .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                        .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
-        pending_orders_count = pending_orders_count.count()
-
-        # Upcoming Bookings Count (bookings for today or future dates)
-        upcoming_bookings_count = db.query(BookingModel).filter(BookingModel.booking_date >= today)\
-                                                        .filter(or_(BookingModel.status == BookingStatus.NOCONFIRM, BookingModel.status == BookingStatus.CONFIRM))
+            order_stats_query = order_stats_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
+        order_stats = order_stats_query.one()
+
+        # Scalar subqueries yang ikut dibawa query booking
+        total_users_sq = db.query(func.count(UserModel.id)).scalar_subquery()
+        total_menu_items_sq = db.query(func.count(CoffeeMenuModel.id))\
+                                .filter(CoffeeMenuModel.is_available == True)\
+                                .scalar_subquery()
+
+        top_selling_item_sq = db.query(CoffeeMenuModel.name)\
+                                .join(OrderItemModel, CoffeeMenuModel.id == OrderItemModel.coffee_id)\
+                                .join(OrderModel, OrderItemModel.order_id == OrderModel.id)\
+                                .filter(ordered_today)\
+                                .filter(is_completed)
         if coffee_shop_id:
-            upcoming_bookings_count = upcoming_bookings_count.join(BookingTableModel, BookingModel.id == BookingTableModel.booking_id)\
-                                                            .join(TableModel, BookingTableModel.table_id == TableModel.id)\
-                                                            .filter(TableModel.coffee_shop_id == coffee_shop_id)
-        upcoming_bookings_count = upcoming_bookings_count.count()
-
-        # Top Selling Item Today
-        top_selling_item_today_query = db.query(CoffeeMenuModel.name)\
-                                        .join(OrderItemModel, CoffeeMenuModel.id == OrderItemModel.coffee_id)\
-                                        .join(OrderModel, OrderItemModel.order_id == OrderModel.id)\
-                                        .filter(func.date(OrderModel.ordered_at) == today)\
-                                        .filter(OrderModel.status == OrderStatus.COMPLETED)
+            top_selling_item_sq = top_selling_item_sq.filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+        top_selling_item_sq = top_selling_item_sq.group_by(CoffeeMenuModel.name)\
+                                                 .order_by(func.sum(OrderItemModel.quantity).desc())\
+                                                 .limit(1)\
+                                                 .scalar_subquery()
+
+        # Query 2: metrik booking + scalar subqueries
+        is_success = BookingModel.status == BookingStatus.SUCCESS
+        booking_stats_query = db.query(
+            func.count(BookingModel.id).filter(and_(is_success, func.date(BookingModel.booking_date) == today)).label("bookings_today"),
+            func.count(BookingModel.id).filter(is_success).label("bookings_this_month"),
+            func.count(BookingModel.id).filter(and_(
+                BookingModel.booking_date >= today,
+                BookingModel.status.in_([BookingStatus.NOCONFIRM, BookingStatus.CONFIRM])
+            )).label("upcoming_bookings"),
+            total_users_sq.label("total_users"),
+            total_menu_items_sq.label("total_menu_items"),
+            top_selling_item_sq.label("top_selling_item_today"),
+        ).filter(BookingModel.booking_date >= this_month_start)
         if coffee_shop_id:
-            top_selling_item_today_query = top_selling_item_today_query.filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
-        
-        top_selling_item_today = top_selling_item_today_query\
-                                .group_by(CoffeeMenuModel.name)\
-                                .order_by(func.sum(OrderItemModel.quantity).desc())\
-                                .limit(1).scalar()
-
-        # Revenue Growth Percentage (Month over month)
-        last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-        last_month_end = this_month_start - timedelta(days=1)
+            booking_stats_query = booking_stats_query.filter(
+                BookingModel.id.in_(self._shop_booking_ids(db, coffee_shop_id))
+            )
+        booking_stats = booking_stats_query.one()
 
-        total_revenue_last_month = orders_base_query.filter(and_(
-            OrderModel.ordered_at >= last_month_start,
-            OrderModel.ordered_at <= last_month_end
-        )).with_entities(func.sum(OrderModel.total_price)).scalar() or 0
+        total_revenue_this_month = int(order_stats.revenue_this_month)
+        total_revenue_last_month = int(order_stats.revenue_last_month)
+        total_orders_this_month = order_stats.orders_this_month
+        total_orders_last_month = order_stats.orders_last_month
 
+        # Revenue Growth Percentage (Month over month)
         revenue_growth_percentage = 0.0
         if total_revenue_last_month > 0:
             revenue_growth_percentage = ((total_revenue_this_month - total_revenue_last_month) / total_revenue_last_month) * 100
@@ -142,11 +132,6 @@ class AdminAnalyticsService:
             revenue_growth_percentage = 100.0 
 
         # Order Growth Percentage (Month over month)
-        total_orders_last_month = orders_base_query.filter(and_(
-            OrderModel.ordered_at >= last_month_start,
-            OrderModel.ordered_at <= last_month_end
-        )).count()
-
         order_growth_percentage = 0.0
         if total_orders_last_month > 0:
             order_growth_percentage = ((total_orders_this_month - total_orders_last_month) / total_orders_last_month) * 100
@@ -157,26 +142,46 @@ class AdminAnalyticsService:
         menu_growth = 0.0 # Placeholder
 
         return DashboardSummaryResponse(
-            total_revenue_today=total_revenue_today,
+            total_revenue_today=int(order_stats.revenue_today),
             total_revenue_this_month=total_revenue_this_month,
-            total_orders_today=total_orders_today,
+            total_orders_today=order_stats.orders_today,
             total_orders_this_month=total_orders_this_month,
-            total_bookings_today=total_bookings_today,
-            total_bookings_this_month=total_bookings_this_month,
-            active_users_today=active_users_today,
-            active_users_this_month=active_users_this_month,
-            pending_orders_count=pending_orders_count,
-            upcoming_bookings_count=upcoming_bookings_count,
-            top_selling_item_today=top_selling_item_today,
+            total_bookings_today=booking_stats.bookings_today,
+            total_bookings_this_month=booking_stats.bookings_this_month,
+            active_users_today=order_stats.active_users_today,
+            active_users_this_month=order_stats.active_users_this_month,
+            pending_orders_count=order_stats.pending_orders,
+            upcoming_bookings_count=booking_stats.upcoming_bookings,
+            top_selling_item_today=booking_stats.top_selling_item_today,
             revenue_growth_percentage=round(revenue_growth_percentage, 2),
             order_growth_percentage=round(order_growth_percentage, 2),
 
-            total_users=total_users_system, 
+            total_users=booking_stats.total_users or 0, 
             users_growth=users_growth, 
-            total_menu_items=total_menu_items, 
+            total_menu_items=booking_stats.total_menu_items or 0, 
             menu_growth=menu_growth,
         )
 
+    def _rollup_period_column(self, group_by: str):
+        """Kolom periode (day/week/month) atas tabel rollup daily_shop_sales."""
+        if group_by == "day":
+            return DailyShopSalesModel.sales_date.label("period")
+        elif group_by == "week":
+            return func.to_char(DailyShopSalesModel.sales_date, 'YYYY-WW').label("period")
+        elif group_by == "month":
+            return func.to_char(DailyShopSalesModel.sales_date, 'YYYY-MM').label("period")
+        raise ValueError("Invalid group_by parameter. Must be 'day', 'week', or 'month'.")
+
+    def _rollup_query(self, db: Session, start_date: date, end_date: date, coffee_shop_id: Optional[UUID]):
+        """Query dasar atas daily_shop_sales untuk rentang tanggal (inklusif)."""
+        query = db.query(DailyShopSalesModel).filter(
+            DailyShopSalesModel.sales_date >= start_date,
+            DailyShopSalesModel.sales_date <= end_date
+        )
+        if coffee_shop_id:
+            query = query.filter(DailyShopSalesModel.coffee_shop_id == coffee_shop_id)
+        return query
+
     def get_sales_analytics(
         self,
         db: Session,
@@ -187,45 +192,32 @@ class AdminAnalyticsService:
     ) -> SalesAnalyticsResponse:
         """
         Mengambil analitik penjualan.
+        Dibaca dari rollup daily_shop_sales sehingga biaya query sebanding dengan jumlah hari, bukan jumlah order.
         """
         if not start_date:
             start_date = date.today() - timedelta(days=30)
         if not end_date:
             end_date = date.today()
 
-        sales_query_base = db.query(OrderModel).filter(
-            and_(
-                OrderModel.ordered_at >= start_date,
-                OrderModel.ordered_at <= end_date + timedelta(days=1), # Include end_date fully
-                OrderModel.status == OrderStatus.COMPLETED
-            )
-        )
-        if coffee_shop_id:
-            sales_query_base = sales_query_base.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+        period_col = self._rollup_period_column(group_by)
+        sales_query_base = self._rollup_query(db, start_date, end_date, coffee_shop_id)
 
         # Total Revenue, Total Orders, Average Order Value for the period
-        total_revenue = sales_query_base.with_entities(func.sum(OrderModel.total_price)).scalar() or 0
-        total_orders = sales_query_base.count()
+        totals = sales_query_base.with_entities(
+            func.coalesce(func.sum(DailyShopSalesModel.total_revenue), 0).label("total_revenue"),
+            func.coalesce(func.sum(DailyShopSalesModel.order_count), 0).label("total_orders")
+        ).one()
+        total_revenue = int(totals.total_revenue)
+        total_orders = int(totals.total_orders)
         average_order_value = int(total_revenue / total_orders) if total_orders else 0
 
         # Sales Data per Period
         sales_data: List[SalesDataPoint] = []
-        
-        if group_by == "day":
-            period_col = func.date(OrderModel.ordered_at).label("period")
-        elif group_by == "week":
-            period_col = func.to_char(OrderModel.ordered_at, 'YYYY-WW').label("period")
-        elif group_by == "month":
-            period_col = func.to_char(OrderModel.ordered_at, 'YYYY-MM').label("period")
-        else:
-            raise ValueError("Invalid group_by parameter. Must be 'day', 'week', or 'month'.")
 
         sales_data_query = sales_query_base.with_entities(
             period_col,
-            func.sum(OrderModel.total_price).label("total_sales"),
-            func.count(OrderModel.id).label("order_count")
+            func.sum(DailyShopSalesModel.total_revenue).label("total_sales"),
+            func.sum(DailyShopSalesModel.order_count).label("order_count")
         ).group_by(period_col).order_by(period_col).all()
 
         peak_sales_amount = 0
@@ -249,19 +241,9 @@ class AdminAnalyticsService:
         prev_start_date = start_date - (duration + timedelta(days=1))
         prev_end_date = start_date - timedelta(days=1)
 
-        prev_period_sales_query = db.query(OrderModel).filter(
-            and_(
-                OrderModel.ordered_at >= prev_start_date,
-                OrderModel.ordered_at <= prev_end_date + timedelta(days=1),
-                OrderModel.status == OrderStatus.COMPLETED
-            )
-        )
-        if coffee_shop_id:
-            prev_period_sales_query = prev_period_sales_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                            .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                            .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
-        
-        total_revenue_prev_period = prev_period_sales_query.with_entities(func.sum(OrderModel.total_price)).scalar() or 0
+        total_revenue_prev_period = self._rollup_query(db, prev_start_date, prev_end_date, coffee_shop_id)\
+                                        .with_entities(func.sum(DailyShopSalesModel.total_revenue))\
+                                        .scalar() or 0
 
         growth_percentage = 0.0
         if total_revenue_prev_period > 0:
@@ -288,7 +270,7 @@ class AdminAnalyticsService:
         group_by: str,
     ) -> RevenueAnalyticsResponse:
         """
-        Mengambil analitik pendapatan.
+        Mengambil analitik pendapatan dari rollup daily_shop_sales.
         Catatan: Model Anda tidak secara eksplisit memiliki 'cost' atau 'profit_margin' per pesanan/item.
         Saya akan mengasumsikan profit margin 20% sebagai placeholder atau Anda dapat menghitungnya jika ada
         data biaya di database Anda.
@@ -298,19 +280,16 @@ class AdminAnalyticsService:
         if not end_date:
             end_date = date.today()
 
-        revenue_query_base = db.query(OrderModel).filter(
-            and_(
-                OrderModel.ordered_at >= start_date,
-                OrderModel.ordered_at <= end_date + timedelta(days=1),
-                OrderModel.status == OrderStatus.COMPLETED
-            )
-        )
-        if coffee_shop_id:
-            revenue_query_base = revenue_query_base.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+        period_col = self._rollup_period_column(group_by)
+        revenue_query_base = self._rollup_query(db, start_date, end_date, coffee_shop_id)
+
+        revenue_data_query = revenue_query_base.with_entities(
+            period_col,
+            func.sum(DailyShopSalesModel.total_revenue).label("revenue")
+        ).group_by(period_col).order_by(period_col).all()
 
-        total_revenue = revenue_query_base.with_entities(func.sum(OrderModel.total_price)).scalar() or 0
+        # Total dihitung dari hasil per periode, tanpa query tambahan
+        total_revenue = sum(int(row.revenue) for row in revenue_data_query)
         
         # Placeholder for profit calculation (assuming 20% profit margin)
         # Anda perlu mengganti ini jika Anda memiliki data biaya yang sebenarnya.
@@ -318,20 +297,6 @@ class AdminAnalyticsService:
         average_profit_margin = 20.0 # Placeholder
 
         revenue_data: List[RevenueDataPoint] = []
-        
-        if group_by == "day":
-            period_col = func.date(OrderModel.ordered_at).label("period")
-        elif group_by == "week":
-            period_col = func.to_char(OrderModel.ordered_at, 'YYYY-WW').label("period")
-        elif group_by == "month":
-            period_col = func.to_char(OrderModel.ordered_at, 'YYYY-MM').label("period")
-        else:
-            raise ValueError("Invalid group_by parameter.")
-
-        revenue_data_query = revenue_query_base.with_entities(
-            period_col,
-            func.sum(OrderModel.total_price).label("revenue")
-        ).group_by(period_col).order_by(period_col).all()
 
         highest_revenue = 0
         lowest_revenue = float('inf')
@@ -390,9 +355,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            orders_query_base = orders_query_base.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            orders_query_base = orders_query_base.filter(OrderModel.coffee_shop_id == coffee_shop_id)
 
         total_orders = orders_query_base.count()
         completed_orders = orders_query_base.filter(OrderModel.status == OrderStatus.COMPLETED).count()
@@ -415,9 +378,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            avg_prep_time_query = avg_prep_time_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            avg_prep_time_query = avg_prep_time_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         
         avg_prep_time_seconds = avg_prep_time_query.scalar() or 0
         average_preparation_time = round(avg_prep_time_seconds / 60, 2) # Convert to minutes
@@ -486,9 +447,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            active_users_query = active_users_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            active_users_query = active_users_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         active_users = active_users_query.count()
 
         # Returning Customers & Retention Rate
@@ -506,9 +465,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            users_in_current_period = users_in_current_period.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                            .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                            .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            users_in_current_period = users_in_current_period.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         users_in_current_period_ids = [u_id for u_id, in users_in_current_period.all()]
 
         # Users who ordered before the current period AND are in the current period
@@ -520,9 +477,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            returning_customers_query = returning_customers_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                                .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                                .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            returning_customers_query = returning_customers_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         returning_customers = returning_customers_query.count()
 
         customer_retention_rate = (returning_customers / len(users_in_current_period_ids)) * 100 if users_in_current_period_ids else 0.0
@@ -538,9 +493,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            avg_orders_per_user_query = avg_orders_per_user_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                                .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                                .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            avg_orders_per_user_query = avg_orders_per_user_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
             
         average_orders_per_user = round(avg_orders_per_user_query.scalar() or 0.0, 2)
 
@@ -558,9 +511,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            top_customers_query = top_customers_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            top_customers_query = top_customers_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         
         top_customers = top_customers_query.group_by(UserModel.name, UserModel.email)\
                                             .order_by(func.sum(OrderModel.total_price).desc())\
@@ -595,28 +546,37 @@ class AdminAnalyticsService:
         total_coffee_shops = db.query(CoffeeShopModel).count()
 
         # Top Performing Shops
-        shop_performance_query = db.query(
-            CoffeeShopModel.id.label("coffee_shop_id"),
-            CoffeeShopModel.name.label("coffee_shop_name"),
+        # Orders and ratings are aggregated per shop separately before joining, so
+        # neither multiplies the other (orders carry coffee_shop_id directly)
+        shop_orders_sq = db.query(
+            OrderModel.coffee_shop_id.label("coffee_shop_id"),
             func.sum(OrderModel.total_price).label("total_revenue"),
             func.count(OrderModel.id).label("total_orders"),
-            func.avg(RatingModel.rating).label("avg_customer_satisfaction") # Assuming RatingModel links to CoffeeMenuModel
-        ).outerjoin(
-            CoffeeMenuModel, CoffeeShopModel.id == CoffeeMenuModel.coffee_shop_id
-        ).outerjoin(
-            OrderItemModel, CoffeeMenuModel.id == OrderItemModel.coffee_id
-        ).outerjoin(
-            OrderModel, OrderItemModel.order_id == OrderModel.id
-        ).outerjoin( # Join RatingModel to CoffeeMenuModel to get satisfaction
-            RatingModel, CoffeeMenuModel.id == RatingModel.coffee_id
         ).filter(
             and_(
                 OrderModel.ordered_at >= start_date,
                 OrderModel.ordered_at <= end_date + timedelta(days=1),
                 OrderModel.status == OrderStatus.COMPLETED
-            ) if OrderModel.id is not None else True # Apply filter only if orders exist
-        ).group_by(CoffeeShopModel.id, CoffeeShopModel.name)\
-        .order_by(func.sum(OrderModel.total_price).desc().nulls_last()) # Handle shops with no orders
+            )
+        ).group_by(OrderModel.coffee_shop_id).subquery()
+
+        shop_ratings_sq = db.query(
+            CoffeeMenuModel.coffee_shop_id.label("coffee_shop_id"),
+            func.avg(RatingModel.rating).label("avg_customer_satisfaction"),
+        ).join(RatingModel, CoffeeMenuModel.id == RatingModel.coffee_id)\
+         .group_by(CoffeeMenuModel.coffee_shop_id).subquery()
+
+        shop_performance_query = db.query(
+            CoffeeShopModel.id.label("coffee_shop_id"),
+            CoffeeShopModel.name.label("coffee_shop_name"),
+            shop_orders_sq.c.total_revenue,
+            shop_orders_sq.c.total_orders,
+            shop_ratings_sq.c.avg_customer_satisfaction,
+        ).outerjoin(
+            shop_orders_sq, shop_orders_sq.c.coffee_shop_id == CoffeeShopModel.id
+        ).outerjoin(
+            shop_ratings_sq, shop_ratings_sq.c.coffee_shop_id == CoffeeShopModel.id
+        ).order_by(shop_orders_sq.c.total_revenue.desc().nulls_last()) # Handle shops with no orders
         
         all_shop_performance = shop_performance_query.all()
 
@@ -747,9 +707,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            peak_ordering_hours_query = peak_ordering_hours_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            peak_ordering_hours_query = peak_ordering_hours_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         
         peak_ordering_hours_result = peak_ordering_hours_query.group_by('hour').order_by(func.count(OrderModel.id).desc()).all()
         
@@ -776,9 +734,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            repeat_customer_query = repeat_customer_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                        .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                        .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            repeat_customer_query = repeat_customer_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
 
         repeat_customer_counts = repeat_customer_query.group_by(OrderModel.user_id).having(func.count(OrderModel.id) > 1).count()
         
@@ -790,9 +746,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            total_unique_customers_in_period = total_unique_customers_in_period.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                                                .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                                                .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            total_unique_customers_in_period = total_unique_customers_in_period.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         total_unique_customers_in_period = total_unique_customers_in_period.count()
 
         repeat_customer_rate = (repeat_customer_counts / total_unique_customers_in_period) * 100 if total_unique_customers_in_period else 0.0
@@ -824,9 +778,7 @@ class AdminAnalyticsService:
         #     )
         # )
         # if coffee_shop_id:
-        #     payment_method_query = payment_method_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-        #                                                 .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-        #                                                 .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+        #     payment_method_query = payment_method_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         # popular_payment_methods_result = payment_method_query.group_by(TransactionModel.payment_method).all()
         # popular_payment_methods = {method: count for method, count in popular_payment_methods_result}
 
@@ -844,9 +796,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            customer_spending_query = customer_spending_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                            .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                            .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            customer_spending_query = customer_spending_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
 
         customer_spending_data = customer_spending_query.group_by(UserModel.id).all()
         
@@ -935,9 +885,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            unique_customers_query = unique_customers_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                            .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                            .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            unique_customers_query = unique_customers_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         unique_customers = unique_customers_query.count()
 
         # Customer Acquisition Cost (requires tracking marketing spend / new users) - Placeholder
@@ -973,9 +921,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            prev_period_unique_customers_query = prev_period_unique_customers_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            prev_period_unique_customers_query = prev_period_unique_customers_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         prev_period_unique_customers = prev_period_unique_customers_query.count()
 
         customer_trend = "stable"
@@ -1006,9 +952,7 @@ class AdminAnalyticsService:
             )
         )
         if coffee_shop_id:
-            best_performing_days_query = best_performing_days_query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
-                                                                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
-                                                                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+            best_performing_days_query = best_performing_days_query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
 
         best_performing_days_result = best_performing_days_query.group_by("order_date")\
                                                                 .order_by(func.sum(OrderModel.total_price).desc())\
@@ -1046,27 +990,23 @@ class AdminAnalyticsService:
         coffee_shop_id: Optional[UUID],
     ):
         """
-        Mengekspor data analitik sebagai CSV.
+        Mengekspor data analitik sebagai CSV. Raw order/line-item exports live in
+        export_service; these reports are already aggregated and small.
         """
         from fastapi.responses import StreamingResponse
-        import io
-        import csv
-
-        output = io.StringIO()
-        writer = csv.writer(output)
+        from app.services.export_service import csv_chunks
 
-        headers: List[str] = []
-        data_rows: List[List[Any]] = []
+        rows: List[List[Any]] = []
 
         if report_type == "sales":
             analytics_data = self.get_sales_analytics(db, start_date, end_date, coffee_shop_id, "day")
-            headers = ["Date", "Total Sales", "Order Count", "Average Order Value"]
+            rows.append(["Date", "Total Sales", "Order Count", "Average Order Value"])
             for dp in analytics_data.sales_data:
-                data_rows.append([dp.date, dp.total_sales, dp.order_count, dp.average_order_value])
+                rows.append([dp.date, dp.total_sales, dp.order_count, dp.average_order_value])
         elif report_type == "orders":
             analytics_data = self.get_order_analytics(db, start_date, end_date, coffee_shop_id)
-            headers = ["Total Orders", "Completed Orders", "Cancelled Orders", "Pending Orders", "Completion Rate (%)", "Cancellation Rate (%)", "Avg Prep Time (minutes)", "Peak Order Hour"]
-            data_rows.append([
+            rows.append(["Total Orders", "Completed Orders", "Cancelled Orders", "Pending Orders", "Completion Rate (%)", "Cancellation Rate (%)", "Avg Prep Time (minutes)", "Peak Order Hour"])
+            rows.append([
                 analytics_data.total_orders,
                 analytics_data.completed_orders,
                 analytics_data.cancelled_orders,
@@ -1078,51 +1018,36 @@ class AdminAnalyticsService:
             ])
             # Add order status distribution separately if desired
             for status, count in analytics_data.order_status_distribution.items():
-                data_rows.append([f"Status: {status}", count, "", ""])
+                rows.append([f"Status: {status}", count, "", ""])
         elif report_type == "users":
             analytics_data = self.get_user_analytics(db, start_date, end_date, coffee_shop_id)
-            headers = ["Metric", "Value"]
-            data_rows.append(["Total Users", analytics_data.total_users])
-            data_rows.append(["New Users This Period", analytics_data.new_users_this_period])
-            data_rows.append(["Active Users", analytics_data.active_users])
-            data_rows.append(["Returning Customers", analytics_data.returning_customers])
-            data_rows.append(["Customer Retention Rate (%)", round(analytics_data.customer_retention_rate, 2)])
-            data_rows.append(["Average Orders Per User", round(analytics_data.average_orders_per_user, 2)])
-            
-            writer.writerow(headers)
-            writer.writerows(data_rows)
+            rows.append(["Metric", "Value"])
+            rows.append(["Total Users", analytics_data.total_users])
+            rows.append(["New Users This Period", analytics_data.new_users_this_period])
+            rows.append(["Active Users", analytics_data.active_users])
+            rows.append(["Returning Customers", analytics_data.returning_customers])
+            rows.append(["Customer Retention Rate (%)", round(analytics_data.customer_retention_rate, 2)])
+            rows.append(["Average Orders Per User", round(analytics_data.average_orders_per_user, 2)])
 
             if analytics_data.top_customers:
-                writer.writerow([]) # Blank row for separation
-                writer.writerow(["Top Customers"])
-                writer.writerow(["Name", "Email", "Total Orders", "Total Spent"])
+                rows.append([]) # Blank row for separation
+                rows.append(["Top Customers"])
+                rows.append(["Name", "Email", "Total Orders", "Total Spent"])
                 for customer in analytics_data.top_customers:
-                    writer.writerow([customer["name"], customer["email"], customer["total_orders"], customer["total_spent"]])
-                
-                output.seek(0)
-                return StreamingResponse(
-                    output,
-                    media_type="text/csv",
-                    headers={"Content-Disposition": f"attachment; filename=analytics_{report_type}_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"}
-                )
-
+                    rows.append([customer["name"], customer["email"], customer["total_orders"], customer["total_spent"]])
         elif report_type == "revenue":
             analytics_data = self.get_revenue_analytics(db, start_date, end_date, coffee_shop_id, "day")
-            headers = ["Period", "Revenue", "Profit Margin (%)", "Cost"]
+            rows.append(["Period", "Revenue", "Profit Margin (%)", "Cost"])
             for dp in analytics_data.revenue_data:
-                data_rows.append([dp.period, dp.revenue, round(dp.profit_margin, 2), dp.cost])
+                rows.append([dp.period, dp.revenue, round(dp.profit_margin, 2), dp.cost])
         else:
             raise ValueError("Invalid report type")
 
-        writer.writerow(headers)
-        writer.writerows(data_rows)
-        
-        output.seek(0)
         return StreamingResponse(
-            output,
+            csv_chunks(rows),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename=analytics_{report_type}_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"}
         )
 
 
-admin_analytics_service = AdminAnalyticsService()
\ No newline at end of file
+admin_analytics_service = AdminAnalyticsService()
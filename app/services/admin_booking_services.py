@@ -1,19 +1,22 @@
 """
 Service for admin booking management
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
-from datetime import datetime, date
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
+from datetime import datetime, date, time, timedelta
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import desc
 
 from app.models.booking import BookingModel, BookingStatus, BookingTableModel, TableModel
 from app.models.booking_status_history import BookingStatusHistoryModel
+from app.services.table_occupancy_index import booking_change, table_occupancy_index
 from app.schemas.admin_booking_schema import (
     BookingManagementResponse,
     BookingStatusHistoryResponse,
     TodayBookingsSummary
 )
+from app.schemas.pagination_schema import CursorPage
+from app.utils.pagination import keyset_page
 
 class AdminBookingService:
     def get_all_bookings(
@@ -24,32 +27,47 @@ class AdminBookingService:
         user_id: Optional[UUID] = None,
         booking_date: Optional[str] = None,
         skip: int = 0,
-        limit: int = 50
-    ) -> List[BookingManagementResponse]:
-        """Get all bookings with filtering"""
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Union[List[BookingManagementResponse], CursorPage[BookingManagementResponse]]:
+        """
+        Get all bookings with filtering, newest first. Passing `cursor` (empty
+        for the first page) switches from OFFSET paging to keyset paging and
+        returns a CursorPage.
+        """
+        # selectinload keeps one row per booking, so LIMIT counts bookings
         query = db.query(BookingModel).options(
             joinedload(BookingModel.user),
-            joinedload(BookingModel.booking_tables).joinedload(BookingTableModel.table).joinedload(TableModel.coffee_shop)
+            selectinload(BookingModel.booking_tables).joinedload(BookingTableModel.table).joinedload(TableModel.coffee_shop)
         )
         
         # Apply filters
         if status:
             query = query.filter(BookingModel.status == status)
         if coffee_shop_id:
-            # Filter by coffee shop through the relationship chain
-            query = query.join(BookingModel.booking_tables)\
-                         .join(BookingTableModel.table)\
-                         .filter(TableModel.coffee_shop_id == coffee_shop_id)
+            # Semi-join instead of joining booking_tables, which repeats a
+            # booking once per booked table
+            shop_booking_ids = db.query(BookingTableModel.booking_id)\
+                .join(TableModel, TableModel.id == BookingTableModel.table_id)\
+                .filter(TableModel.coffee_shop_id == coffee_shop_id)
+            query = query.filter(BookingModel.id.in_(shop_booking_ids))
         if user_id:
             query = query.filter(BookingModel.user_id == user_id)
         if booking_date:
             try:
                 target_date = datetime.strptime(booking_date, "%Y-%m-%d").date()
-                query = query.filter(func.date(BookingModel.booking_date) == target_date)
+                query = query.filter(
+                    BookingModel.booking_date >= datetime.combine(target_date, time.min),
+                    BookingModel.booking_date < datetime.combine(target_date + timedelta(days=1), time.min)
+                )
             except ValueError:
                 pass  # Invalid date format, ignore filter
         
-        bookings = query.order_by(desc(BookingModel.created_at)).offset(skip).limit(limit).all()
+        next_cursor = None
+        if cursor is not None:
+            bookings, next_cursor = keyset_page(query, BookingModel.created_at, BookingModel.id, cursor, limit)
+        else:
+            bookings = query.order_by(desc(BookingModel.created_at), desc(BookingModel.id)).offset(skip).limit(limit).all()
         
         # Convert to response format
         result = []
@@ -86,6 +104,8 @@ class AdminBookingService:
                 updated_at=booking.updated_at
             ))
         
+        if cursor is not None:
+            return CursorPage(items=result, next_cursor=next_cursor)
         return result
     
     def get_booking_by_id(self, db: Session, booking_id: UUID):
@@ -159,7 +179,9 @@ class AdminBookingService:
             )
             db.add(status_history)
         
+        change = booking_change(booking, old_status)
         db.commit()
+        table_occupancy_index.apply_booking_changes(db, [change])
         db.refresh(booking)
         
         return self.get_booking_by_id(db, booking_id)
@@ -175,12 +197,14 @@ class AdminBookingService:
         """Bulk update booking statuses"""
         bookings = db.query(BookingModel).filter(BookingModel.id.in_(booking_ids)).all()
         updated_bookings = []
+        changes = []
         
         for booking in bookings:
             old_status = booking.status
             booking.status = new_status
             booking.updated_at = datetime.utcnow()
             updated_bookings.append(booking)
+            changes.append(booking_change(booking, old_status))
             
             # TODO: Create status history record for each booking when model is implemented
             if changed_by_user_id:
@@ -195,6 +219,7 @@ class AdminBookingService:
                 db.add(status_history)
         
         db.commit()
+        table_occupancy_index.apply_booking_changes(db, changes)
         
         # Return updated bookings with full details
         return [self.get_booking_by_id(db, booking.id) for booking in updated_bookings]
@@ -225,7 +250,8 @@ class AdminBookingService:
         """Get today's bookings summary"""
         today = date.today()
         query = db.query(BookingModel).filter(
-            func.date(BookingModel.booking_date) == today
+            BookingModel.booking_date >= datetime.combine(today, time.min),
+            BookingModel.booking_date < datetime.combine(today + timedelta(days=1), time.min)
         )
         
         if coffee_shop_id:
@@ -298,8 +324,8 @@ class AdminBookingService:
             joinedload(BookingModel.user),
             joinedload(BookingModel.booking_tables).joinedload(BookingTableModel.table).joinedload(TableModel.coffee_shop)
         ).filter(
-            func.date(BookingModel.booking_date) >= start_date,
-            func.date(BookingModel.booking_date) <= end_date
+            BookingModel.booking_date >= datetime.combine(start_date, time.min),
+            BookingModel.booking_date < datetime.combine(end_date + timedelta(days=1), time.min)
         )
         
         if coffee_shop_id:
@@ -1,17 +1,20 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
-from datetime import datetime, date
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, desc, asc
+from datetime import datetime, date, time, timedelta
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, desc, asc
 
 from app.models.order import OrderItemVariantModel, OrderModel, OrderStatus, OrderItemModel
 from app.models.coffee import CoffeeMenuModel, VariantModel
 from app.models.order_status_history import OrderStatusHistoryModel
+from app.services.sales_rollup_service import sales_rollup_service
 from app.schemas.admin_order_schema import (
     OrderManagementResponse,
     OrderStatusHistoryResponse,
     TodayOrdersSummary
 )
+from app.schemas.pagination_schema import CursorPage
+from app.utils.pagination import keyset_page
 
 class AdminOrderService:
     def get_all_orders(
@@ -21,12 +24,18 @@ class AdminOrderService:
         coffee_shop_id: Optional[UUID] = None,
         user_id: Optional[UUID] = None,
         skip: int = 0,
-        limit: int = 50
-    ) -> List[OrderManagementResponse]:
-        """Get all orders with filtering"""
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Union[List[OrderManagementResponse], CursorPage[OrderManagementResponse]]:
+        """
+        Get all orders with filtering, newest first. Passing `cursor` (empty
+        for the first page) switches from OFFSET paging to keyset paging and
+        returns a CursorPage.
+        """
+        # selectinload keeps one row per order, so LIMIT counts orders
         query = db.query(OrderModel).options(
             joinedload(OrderModel.user),
-            joinedload(OrderModel.order_items).joinedload(OrderItemModel.coffee).joinedload(CoffeeMenuModel.coffee_shop),
+            selectinload(OrderModel.order_items).joinedload(OrderItemModel.coffee).joinedload(CoffeeMenuModel.coffee_shop),
             joinedload(OrderModel.paid_by_user)
         )
         
@@ -34,13 +43,15 @@ class AdminOrderService:
         if status:
             query = query.filter(OrderModel.status == status)
         if coffee_shop_id:
-            query = query.join(OrderItemModel).join(CoffeeMenuModel).filter(
-                CoffeeMenuModel.coffee_shop_id == coffee_shop_id
-            )
+            query = query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         if user_id:
             query = query.filter(OrderModel.user_id == user_id)
         
-        orders = query.order_by(desc(OrderModel.created_at)).offset(skip).limit(limit).all()
+        next_cursor = None
+        if cursor is not None:
+            orders, next_cursor = keyset_page(query, OrderModel.created_at, OrderModel.id, cursor, limit)
+        else:
+            orders = query.order_by(desc(OrderModel.created_at), desc(OrderModel.id)).offset(skip).limit(limit).all()
         
         # Convert to response format
         result = []
@@ -86,6 +97,8 @@ class AdminOrderService:
                 delivery_address=order.delivery_address, 
                 order_notes=order.order_notes 
             ))
+        if cursor is not None:
+            return CursorPage(items=result, next_cursor=next_cursor)
         return result
     
     def get_order_by_id(self, db: Session, order_id: UUID) -> Optional[OrderModel]:
@@ -159,6 +172,8 @@ class AdminOrderService:
         )
         db.add(status_history)
 
+        sales_rollup_service.sync_order_status_change(db, order, old_status)
+
         db.commit()
         db.refresh(order)
         db.refresh(status_history)
@@ -176,12 +191,14 @@ class AdminOrderService:
     ):
         orders = db.query(OrderModel).filter(OrderModel.id.in_(order_ids)).all()
         updated_orders = []
+        status_changes = []
 
         for order in orders:
             old_status = order.status
             order.status = new_status
             order.updated_at = datetime.utcnow()
             updated_orders.append(order)
+            status_changes.append((order, old_status))
 
             status_history = OrderStatusHistoryModel(
                 order_id=order.id,
@@ -193,6 +210,8 @@ class AdminOrderService:
             )
             db.add(status_history)
 
+        sales_rollup_service.sync_order_status_changes(db, status_changes)
+
         db.commit()
 
         # Gunakan helper _convert_orders_to_response untuk konsistensi
@@ -229,9 +248,7 @@ class AdminOrderService:
         )
         
         if coffee_shop_id:
-            query = query.join(OrderItemModel).join(CoffeeMenuModel).filter(
-                CoffeeMenuModel.coffee_shop_id == coffee_shop_id
-            )
+            query = query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         
         return query.count()
     
@@ -239,13 +256,12 @@ class AdminOrderService:
         """Get today's orders summary"""
         today = date.today()
         query = db.query(OrderModel).filter(
-            func.date(OrderModel.ordered_at) == today
+            OrderModel.ordered_at >= datetime.combine(today, time.min),
+            OrderModel.ordered_at < datetime.combine(today + timedelta(days=1), time.min)
         )
         
         if coffee_shop_id:
-            query = query.join(OrderItemModel).join(CoffeeMenuModel).filter(
-                CoffeeMenuModel.coffee_shop_id == coffee_shop_id
-            )
+            query = query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         
         orders = query.all()
         
@@ -266,18 +282,7 @@ class AdminOrderService:
         }
         
         for order in orders:
-            if order.status == OrderStatus.PENDING:
-                status_counts['pending'] += 1
-            elif order.status == OrderStatus.CONFIRMED:
-                status_counts['confirmed'] += 1
-            elif order.status == OrderStatus.PREPARING:
-                status_counts['preparing'] += 1
-            elif order.status == OrderStatus.READY:
-                status_counts['ready'] += 1
-            elif order.status == OrderStatus.COMPLETED:
-                status_counts['completed'] += 1
-            elif order.status == OrderStatus.CANCELLED:
-                status_counts['cancelled'] += 1
+            status_counts[order.status.value] += 1
         
         # Get hourly distribution (last 24 hours)
         hourly_orders = {}
@@ -337,13 +342,12 @@ class AdminOrderService:
             joinedload(OrderModel.order_items).joinedload(OrderItemModel.coffee).joinedload(CoffeeMenuModel.coffee_shop),
             joinedload(OrderModel.paid_by_user)
         ).filter(
-            func.date(OrderModel.ordered_at).between(start_date, end_date)
+            OrderModel.ordered_at >= datetime.combine(start_date, time.min),
+            OrderModel.ordered_at < datetime.combine(end_date + timedelta(days=1), time.min)
         )
         
         if coffee_shop_id:
-            query = query.join(OrderItemModel).join(CoffeeMenuModel).filter(
-                CoffeeMenuModel.coffee_shop_id == coffee_shop_id
-            )
+            query = query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         
         if status:
             query = query.filter(OrderModel.status == status)
@@ -10,7 +10,8 @@ from sqlalchemy.exc import IntegrityError
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.utils.security import verify_password, get_password_hash, create_access_token, decode_jwt_token, create_verification_token
+from app.utils.password_hashing import password_hasher
+from app.utils.security import verify_password, get_password_hash, create_access_token, decode_jwt_token, create_verification_token, invalidate_principal
 from app.models.user import UserModel, Role
 from app.schemas.auth_schema import UserLogin, TokenResponse, UserRegister
 from app.repositories.user_repository import UserRepository
@@ -30,9 +31,14 @@ class AuthService:
         if not user:
             return None
             
-        if not verify_password(login_data.password, user.password_hash):
+        is_valid, new_hash = password_hasher.verify_and_update(login_data.password, user.password_hash)
+        if not is_valid:
             return None
         
+        # Hash was made with outdated settings (e.g. bcrypt rounds changed), store the rehash
+        if new_hash:
+            user.password_hash = new_hash
+        
         user.last_login = datetime.utcnow()
         self.db.commit()
         self.db.refresh(user)
@@ -124,6 +130,7 @@ class AuthService:
         
         # Mark user as verified
         self.user_repository.update_verification(user, True)
+        invalidate_principal(user.id)
         return True
     
     def validate_token(self, token: str) -> Dict[str, Any]:
@@ -219,6 +226,7 @@ class AuthService:
         # Update password and clear reset token
         self.user_repository.update_password(user, password_hash)
         self.user_repository.clear_password_reset_token(user)
+        invalidate_principal(user.id)
         
         return True
     
@@ -237,4 +245,5 @@ class AuthService:
 
         # Update password di database
         self.user_repository.update_password(user, new_password_hash)
+        invalidate_principal(user_id)
         return True
\ No newline at end of file
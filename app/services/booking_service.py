@@ -1,15 +1,16 @@
 """
 Service for handling table booking operations
 """
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import UUID
 from datetime import date, datetime, time, timedelta
 import uuid
 import random
 import string
-from sqlalchemy import and_, or_, func, cast, Date
+from sqlalchemy import and_, or_, func, cast, Date, update
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.config import settings
 from app.models.booking import BookingModel, BookingTableModel, BookingStatus, TableModel
 from app.models.coffee import CoffeeShopModel
 from app.models.operating_hours import TimeSlotModel, OperatingHoursModel, WeekDay
@@ -19,6 +20,14 @@ from app.schemas.booking_schema import (
     AvailableSlot, 
     AvailableTable
 )
+from app.services.table_allocation import TableAllocationStrategy, allocate_tables
+from app.services.table_occupancy_index import (
+    SlotLocator,
+    TableInfo,
+    booking_change,
+    fetch_booked_pairs,
+    table_occupancy_index
+)
 
 
 class BookingService:
@@ -29,6 +38,56 @@ class BookingService:
         random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
         return f"BK-{today}-{random_suffix}"
     
+    def _get_active_time_slots(self, db: Session, coffee_shop_id: UUID) -> List[TimeSlotModel]:
+        """Active time slots of a coffee shop, ordered by start time"""
+        return db.query(TimeSlotModel).filter(
+            TimeSlotModel.coffee_shop_id == coffee_shop_id,
+            TimeSlotModel.is_active == True
+        ).order_by(TimeSlotModel.start_time).all()
+
+    def _get_booked_tables_by_slot(
+        self,
+        db: Session,
+        coffee_shop_id: UUID,
+        booking_date: date,
+        time_slots: List[TimeSlotModel]
+    ) -> Dict[UUID, Set[UUID]]:
+        """
+        Map time slot id -> ids of tables already booked in that slot on the given date,
+        read straight from the database (authoritative check before writes).
+        """
+        booked_tables_by_slot: Dict[UUID, Set[UUID]] = {slot.id: set() for slot in time_slots}
+        if not time_slots:
+            return booked_tables_by_slot
+
+        locator = SlotLocator(time_slots)
+        for booked_at, table_id in fetch_booked_pairs(db, coffee_shop_id, booking_date):
+            for slot in locator.covering(booked_at.time()):
+                booked_tables_by_slot[slot.id].add(table_id)
+
+        return booked_tables_by_slot
+
+    def _find_time_slot(self, time_slots: List[TimeSlotModel], booking_time: time) -> Optional[TimeSlotModel]:
+        """First active slot that contains the given time"""
+        for slot in time_slots:
+            if slot.start_time <= booking_time < slot.end_time:
+                return slot
+        return None
+
+    def _get_booked_table_ids(
+        self,
+        db: Session,
+        coffee_shop_id: UUID,
+        booking_date: datetime
+    ) -> Optional[Set[UUID]]:
+        """Ids of tables already booked in the slot of booking_date, None if no slot covers that time"""
+        time_slots = self._get_active_time_slots(db, coffee_shop_id)
+        time_slot = self._find_time_slot(time_slots, booking_date.time())
+        if not time_slot:
+            return None
+        booked_tables_by_slot = self._get_booked_tables_by_slot(db, coffee_shop_id, booking_date.date(), [time_slot])
+        return booked_tables_by_slot[time_slot.id]
+
     def get_available_slots(
         self, 
         db: Session, 
@@ -52,74 +111,27 @@ class BookingService:
         if not operating_hours:
             return []  # Coffee shop is closed on this day
         
-        # Get time slots for the coffee shop
-        time_slots = db.query(TimeSlotModel).filter(
-            TimeSlotModel.coffee_shop_id == coffee_shop_id,
-            TimeSlotModel.is_active == True,
-            TimeSlotModel.start_time >= operating_hours.opening_time,
-            TimeSlotModel.end_time <= operating_hours.closing_time
-        ).order_by(TimeSlotModel.start_time).all()
+        # Tables, time slots and occupied-table bitmaps come from the occupancy index
+        layout, occupied_by_slot = table_occupancy_index.get_day(db, coffee_shop_id, booking_date)
+        
+        # Get time slots for the coffee shop within operating hours
+        time_slots = [
+            slot for slot in layout.time_slots
+            if slot.start_time >= operating_hours.opening_time and slot.end_time <= operating_hours.closing_time
+        ]
         
         if not time_slots:
             return []  # No time slots configured
         
-        # Get all tables for the coffee shop
-        tables = db.query(TableModel).filter(
-            TableModel.coffee_shop_id == coffee_shop_id,
-            TableModel.is_available == True
-        ).order_by(TableModel.capacity).all()
-        
-        if not tables:
+        if not layout.tables:
             return []  # No tables available
         
-        # Get all bookings for that date
-        booking_date_start = datetime.combine(booking_date, time.min)
-        booking_date_end = datetime.combine(booking_date, time.max)
-        
-        existing_bookings = db.query(BookingModel).filter(
-            BookingModel.booking_date >= booking_date_start,
-            BookingModel.booking_date <= booking_date_end,
-            BookingModel.status.in_([BookingStatus.NOCONFIRM, BookingStatus.CONFIRM, BookingStatus.SUCCESS])
-        ).all()
-        
-        # Get all booked tables for each time slot
-        booked_tables_by_slot = {}
-        for booking in existing_bookings:
-            # Extract time part
-            booking_time = booking.booking_date.time()
-            
-            # Find which time slot this booking belongs to
-            for slot in time_slots:
-                if slot.start_time <= booking_time < slot.end_time:
-                    if slot.id not in booked_tables_by_slot:
-                        booked_tables_by_slot[slot.id] = set()
-                    
-                    # Get tables associated with this booking
-                    booking_tables = db.query(BookingTableModel).filter(
-                        BookingTableModel.booking_id == booking.id
-                    ).all()
-                    
-                    for bt in booking_tables:
-                        booked_tables_by_slot[slot.id].add(bt.table_id)
-        
         # Prepare response with available tables for each slot
         result = []
         for slot in time_slots:
-            booked_tables = booked_tables_by_slot.get(slot.id, set())
-            available_tables = []
-            total_capacity = 0
-            
-            # Determine which tables are available
-            for table in tables:
-                if table.id not in booked_tables:
-                    available_tables.append(
-                        AvailableTable(
-                            id=table.id,
-                            table_number=table.table_number,
-                            capacity=table.capacity
-                        )
-                    )
-                    total_capacity += table.capacity
+            free_mask = layout.all_mask & ~occupied_by_slot.get(slot.id, 0)
+            free_tables = layout.tables_in(free_mask)
+            total_capacity = sum(table.capacity for table in free_tables)
             
             # Check if the slot has enough capacity for the guest count
             if total_capacity >= guests:
@@ -127,7 +139,14 @@ class BookingService:
                     AvailableSlot(
                         start_time=slot.start_time,
                         end_time=slot.end_time,
-                        available_tables=available_tables,
+                        available_tables=[
+                            AvailableTable(
+                                id=table.id,
+                                table_number=table.table_number,
+                                capacity=table.capacity
+                            )
+                            for table in free_tables
+                        ],
                         total_capacity=total_capacity
                     )
                 )
@@ -139,85 +158,63 @@ class BookingService:
         db: Session, 
         coffee_shop_id: UUID, 
         booking_date: datetime, 
-        guest_count: int
+        guest_count: int,
+        strategy: Optional[TableAllocationStrategy] = None
     ) -> List[TableModel]:
         """
         Algorithm to find suitable tables for the given guest count
         Returns list of tables that can accommodate the guests
-        Uses a greedy approach to minimize the number of tables used
+        The allocation strategy defaults to BOOKING_TABLE_ALLOCATION_STRATEGY
+        (optimal: fewest wasted seats, then fewest tables)
+        Free tables are read from the in-memory occupancy index
         """
-        # Get all tables from the coffee shop
-        all_tables = db.query(TableModel).filter(
-            TableModel.coffee_shop_id == coffee_shop_id,
-            TableModel.is_available == True
-        ).order_by(TableModel.capacity.desc()).all()
-        
-        # Get bookings for the same time slot to find already booked tables
-        booking_time = booking_date.time()
-        booking_date_start = datetime.combine(booking_date.date(), time.min)
-        booking_date_end = datetime.combine(booking_date.date(), time.max)
-        
-        # Find time slot for the booking time
-        time_slot = db.query(TimeSlotModel).filter(
-            TimeSlotModel.coffee_shop_id == coffee_shop_id,
-            TimeSlotModel.start_time <= booking_time,
-            TimeSlotModel.end_time > booking_time,
-            TimeSlotModel.is_active == True
-        ).first()
-        
-        if not time_slot:
-            return []  # No valid time slot
-        
-        # Get existing bookings for this time slot
-        existing_bookings = db.query(BookingModel).filter(
-            BookingModel.booking_date >= booking_date_start,
-            BookingModel.booking_date <= booking_date_end,
-            BookingModel.status.in_([BookingStatus.NOCONFIRM, BookingStatus.CONFIRM, BookingStatus.SUCCESS])
-        ).all()
-        
-        # Find already booked tables
-        booked_table_ids = set()
-        for booking in existing_bookings:
-            booking_time = booking.booking_date.time()
+        for _ in range(2):
+            layout, occupied_by_slot = table_occupancy_index.get_day(db, coffee_shop_id, booking_date.date())
             
-            # Check if this booking overlaps with the requested time slot
-            if time_slot.start_time <= booking_time < time_slot.end_time:
-                booking_tables = db.query(BookingTableModel).filter(
-                    BookingTableModel.booking_id == booking.id
-                ).all()
-                
-                for bt in booking_tables:
-                    booked_table_ids.add(bt.table_id)
-        
-        # Filter out already booked tables
-        available_tables = [table for table in all_tables if table.id not in booked_table_ids]
-        
-        # If no tables available, return empty list
-        if not available_tables:
-            return []
-        
-        # Use greedy algorithm to find tables
-        selected_tables = []
-        remaining_guests = guest_count
-        
-        # First try to find a single table that fits all guests
-        for table in available_tables:
-            if table.capacity >= guest_count:
-                return [table]  # Found a single table that fits all guests
-        
-        # If no single table fits all, use multiple tables
-        for table in available_tables:
-            if remaining_guests <= 0:
-                break
+            # Find the time slot of the booking
+            time_slot = layout.locator.first_covering(booking_date.time())
+            if not time_slot:
+                return []  # No valid time slot
             
-            selected_tables.append(table)
-            remaining_guests -= table.capacity
-        
-        # Check if we found enough tables
-        if remaining_guests <= 0:
-            return selected_tables
-        else:
-            return []  # Not enough capacity
+            # Free tables of the slot
+            free_mask = layout.all_mask & ~occupied_by_slot.get(time_slot.id, 0)
+            available_tables = layout.tables_in(free_mask)
+            
+            # If no tables available, return empty list
+            if not available_tables:
+                return []
+            
+            selected_tables = allocate_tables(
+                available_tables,
+                guest_count,
+                strategy or settings.BOOKING_TABLE_ALLOCATION_STRATEGY
+            )
+            if not selected_tables:
+                return []  # Not enough capacity
+            
+            tables = self._load_tables(db, selected_tables)
+            if tables is not None:
+                return tables
+            # A picked table was removed, disabled or shrunk after the layout was cached: reload and retry once
+            table_occupancy_index.invalidate_shop(coffee_shop_id)
+        return []
+    
+    def _load_tables(self, db: Session, tables: List[TableInfo]) -> Optional[List[TableModel]]:
+        """
+        TableModel instances for tables picked from the occupancy index, keeping
+        their order; None when one of them is gone, unavailable or smaller than
+        the index says (stale layout)
+        """
+        by_id = {
+            table.id: table
+            for table in db.query(TableModel).filter(
+                TableModel.id.in_([table.id for table in tables]),
+                TableModel.is_available == True
+            ).all()
+        }
+        if any(table.id not in by_id or by_id[table.id].capacity < table.capacity for table in tables):
+            return None
+        return [by_id[table.id] for table in tables]
     
     def create_booking(
         self, 
@@ -260,8 +257,22 @@ class BookingService:
                 booking_data.guest_count
             )
             
+            # The index may miss bookings made by other workers, confirm against the database
+            if tables_to_book and not self._check_tables_availability(db, tables_to_book, booking_data.booking_date):
+                table_occupancy_index.invalidate_day(booking_data.coffee_shop_id, booking_data.booking_date.date())
+                tables_to_book = self.find_suitable_tables(
+                    db, 
+                    booking_data.coffee_shop_id, 
+                    booking_data.booking_date, 
+                    booking_data.guest_count
+                )
+                if tables_to_book and not self._check_tables_availability(db, tables_to_book, booking_data.booking_date):
+                    return None
+            
             if not tables_to_book:
                 return None  # Couldn't find suitable tables
+            if sum(table.capacity for table in tables_to_book) < booking_data.guest_count:
+                return None  # Not enough capacity
         
         # Create the booking
         booking = BookingModel(
@@ -284,7 +295,9 @@ class BookingService:
             )
             db.add(booking_table)
         
+        change = booking_change(booking, None)
         db.commit()
+        table_occupancy_index.apply_booking_changes(db, [change])
         db.refresh(booking)
         return booking
     
@@ -294,46 +307,16 @@ class BookingService:
         tables: List[TableModel], 
         booking_date: datetime
     ) -> bool:
-        """Check if tables are available for the requested time"""
-        table_ids = [table.id for table in tables]
-        booking_time = booking_date.time()
-        booking_date_start = datetime.combine(booking_date.date(), time.min)
-        booking_date_end = datetime.combine(booking_date.date(), time.max)
-        
-        # Find time slot for the booking time
-        time_slot = db.query(TimeSlotModel).filter(
-            TimeSlotModel.coffee_shop_id == tables[0].coffee_shop_id,
-            TimeSlotModel.start_time <= booking_time,
-            TimeSlotModel.end_time > booking_time,
-            TimeSlotModel.is_active == True
-        ).first()
+        """Check if tables are available for the requested time (against the database, used before writes)"""
+        table_ids = {table.id for table in tables}
         
-        if not time_slot:
+        booked_table_ids = self._get_booked_table_ids(db, tables[0].coffee_shop_id, booking_date)
+        if booked_table_ids is None:
             return False  # No valid time slot
         
-        # Get existing bookings for the same date
-        existing_bookings = db.query(BookingModel).filter(
-            BookingModel.booking_date >= booking_date_start,
-            BookingModel.booking_date <= booking_date_end,
-            BookingModel.status.in_([BookingStatus.NOCONFIRM, BookingStatus.CONFIRM, BookingStatus.SUCCESS])
-        ).all()
-        
-        # Check for conflicts
-        for booking in existing_bookings:
-            booking_time = booking.booking_date.time()
-            
-            # Check if this booking overlaps with the requested time slot
-            if time_slot.start_time <= booking_time < time_slot.end_time:
-                # Get tables for this booking
-                booking_tables = db.query(BookingTableModel).filter(
-                    BookingTableModel.booking_id == booking.id
-                ).all()
-                
-                booked_table_ids = {bt.table_id for bt in booking_tables}
-                
-                # Check for intersection
-                if any(table_id in booked_table_ids for table_id in table_ids):
-                    return False  # Conflict found
+        # Check for intersection
+        if table_ids & booked_table_ids:
+            return False  # Conflict found
         
         return True  # No conflicts
     
@@ -387,6 +370,8 @@ class BookingService:
         if not booking:
             return None  # Booking not found or not updatable
         
+        old_booking_date = booking.booking_date
+        
         # Handle date/time update
         if booking_data.booking_date:
             # Check if tables are still available for new date/time
@@ -415,7 +400,9 @@ class BookingService:
             
             booking.guest_count = booking_data.guest_count
         
+        change = booking_change(booking, booking.status, old_booking_date)
         db.commit()
+        table_occupancy_index.apply_booking_changes(db, [change])
         db.refresh(booking)
         return booking
     
@@ -435,25 +422,32 @@ class BookingService:
         if not booking:
             return False  # Booking not found or not cancellable
         
+        old_status = booking.status
         booking.status = BookingStatus.CANCELLED
+        change = booking_change(booking, old_status)
         db.commit()
+        table_occupancy_index.apply_booking_changes(db, [change])
         return True
 
     def get_upcoming_bookings(
         self, 
         db: Session, 
-        hours_ahead: int = 24
+        hours_ahead: int = 24,
+        limit: Optional[int] = None
     ) -> List[BookingModel]:
-        """Get bookings coming up in the next X hours for reminders"""
+        """Get bookings coming up in the next X hours for reminders (soonest first, with their user)"""
         now = datetime.now()
         reminder_window = now + timedelta(hours=hours_ahead)
         
-        return db.query(BookingModel).filter(
+        query = db.query(BookingModel).options(joinedload(BookingModel.user)).filter(
             BookingModel.booking_date >= now,
             BookingModel.booking_date <= reminder_window,
             BookingModel.status.in_([BookingStatus.CONFIRM, BookingStatus.SUCCESS]),
             BookingModel.booking_reminder_sent == False
-        ).all()
+        ).order_by(BookingModel.booking_date, BookingModel.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
     
     def mark_reminder_sent(
         self, 
@@ -470,6 +464,17 @@ class BookingService:
         db.commit()
         return True
 
+    def mark_reminders_sent(self, db: Session, booking_ids: List[UUID]) -> int:
+        """Bulk variant of mark_reminder_sent for the reminder job; does not commit"""
+        if not booking_ids:
+            return 0
+        return db.execute(
+            update(BookingModel)
+            .where(BookingModel.id.in_(booking_ids))
+            .values(booking_reminder_sent=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
 
 # Create singleton instance
 booking_service = BookingService()
\ No newline at end of file
@@ -3,18 +3,21 @@
 Coffee menu service implementation
 """
 import os
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from uuid import UUID
-from sqlalchemy import func, cast, Float, or_
+from sqlalchemy import cast, case, Float, or_
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status, UploadFile
 import re
 
 # Import the new Supabase utility functions
 from app.utils.supabase_file_handler import upload_file_to_supabase, delete_file_from_supabase
+from app.utils.cache import TTLLRUCache
+from app.core.config import settings
 
 from app.models.coffee import CoffeeMenuModel, CoffeeShopModel, CoffeeVariantModel, VariantModel, VariantTypeModel
 from app.models.notification import UserFavoriteModel, RatingModel
+from app.services.rating_aggregates import apply_rating_delta
 from app.schemas.coffee_schema import (
     CoffeeMenuCreate,
     CoffeeMenuUpdate,
@@ -27,6 +30,55 @@ from app.schemas.coffee_schema import (
     RatingResponse
 )
 
+# Cache hasil get_public_menu per (coffee_shop_id, filter ternormalisasi).
+# Nilai yang disimpan tidak bergantung user; is_favorite di-overlay setelah cache hit.
+public_menu_cache = TTLLRUCache(
+    name="public_menu",
+    maxsize=settings.PUBLIC_MENU_CACHE_MAX_ENTRIES,
+    ttl=settings.PUBLIC_MENU_CACHE_TTL_SECONDS,
+)
+
+def _normalize_public_menu_filter(filter_params: CoffeeFilter) -> CoffeeFilter:
+    """
+    Trimmed, lowercased search (None when blank); the same filter is used for
+    the cache key and the query, so a cached result always matches its key
+    """
+    search = filter_params.search.strip().lower() if filter_params.search else None
+    return filter_params.model_copy(update={"search": search or None})
+
+def _public_menu_cache_key(coffee_shop_id: UUID, filter_params: CoffeeFilter) -> Tuple:
+    """Key of a normalized filter (see _normalize_public_menu_filter); equivalent queries share one entry"""
+    category = filter_params.category if filter_params.category and filter_params.category != 'all' else None
+    tags = tuple(sorted(set(filter_params.tags))) if filter_params.tags else ()
+    sort_by = filter_params.sort_by if filter_params.sort_by in ("name", "price", "rating") else None
+    sort_order = "desc" if filter_params.sort_order == "desc" else "asc"
+    return (
+        coffee_shop_id,
+        filter_params.min_price,
+        filter_params.max_price,
+        filter_params.search,
+        sort_by,
+        sort_order if sort_by else None,
+        filter_params.rating,
+        category,
+        tags,
+    )
+
+def invalidate_public_menu_cache(*coffee_shop_ids: Optional[UUID]) -> int:
+    """Drop cached public menus of the given coffee shops"""
+    shop_ids = {shop_id for shop_id in coffee_shop_ids if shop_id is not None}
+    if not shop_ids:
+        return 0
+    return public_menu_cache.invalidate(lambda key: key[0] in shop_ids)
+
+def _rating_average(coffee_menu: CoffeeMenuModel) -> Optional[float]:
+    """Stored average, None for items without ratings (as AVG over no rows)"""
+    return coffee_menu.average_rating if coffee_menu.total_ratings else None
+
+def _rated_average():
+    """SQL counterpart of _rating_average, for ORDER BY"""
+    return case((CoffeeMenuModel.total_ratings > 0, CoffeeMenuModel.average_rating), else_=None)
+
 class CoffeeMenuService:
     def __init__(self, db):
         self.db = db
@@ -57,6 +109,7 @@ class CoffeeMenuService:
         self.db.add(db_coffee_menu)
         self.db.commit()
         self.db.refresh(db_coffee_menu)
+        invalidate_public_menu_cache(db_coffee_menu.coffee_shop_id)
         return db_coffee_menu
 
     def get_coffee_menu(self, coffee_shop_id: Optional[UUID] = None, skip: int = 0, limit: int = 100) -> List[CoffeeMenuModel]:
@@ -92,6 +145,7 @@ class CoffeeMenuService:
         """Update a coffee menu item"""
         coffee = self.get_coffee_menu_by_id(coffee_id)
 
+        old_coffee_shop_id = coffee.coffee_shop_id
         old_image_url = coffee.image_url # Store the old image URL
         # print(f"coffee_menu.featured from payload: {coffee_menu.featured}")
         update_data = coffee_menu.dict(exclude_unset=True)
@@ -118,6 +172,7 @@ class CoffeeMenuService:
 
         self.db.commit()
         self.db.refresh(coffee)
+        invalidate_public_menu_cache(old_coffee_shop_id, coffee.coffee_shop_id)
         return coffee
 
     async def delete_coffee_menu(self, coffee_id: UUID) -> None:
@@ -125,8 +180,10 @@ class CoffeeMenuService:
         coffee = self.get_coffee_menu_by_id(coffee_id)
         if coffee.image_url and "/storage/v1/object/public/" in coffee.image_url:
             await delete_file_from_supabase(coffee.image_url) # Delete image from Supabase
+        coffee_shop_id = coffee.coffee_shop_id
         self.db.delete(coffee)
         self.db.commit()
+        invalidate_public_menu_cache(coffee_shop_id)
 
     def get_public_menu(
         self,
@@ -136,8 +193,34 @@ class CoffeeMenuService:
         current_user: Optional[any] = None
     ) -> List[CoffeeMenuPublicResponse]:
         """Get all available coffee menu items for public display with optional filtering"""
-        from app.models.coffee import CoffeeShopModel
+        filter_params = _normalize_public_menu_filter(filter_params)
+        cache_key = _public_menu_cache_key(coffee_shop_id, filter_params)
+        coffee_items = public_menu_cache.get(cache_key)
+        if coffee_items is None:
+            coffee_items = self._query_public_menu(db, coffee_shop_id, filter_params)
+            public_menu_cache.set(cache_key, coffee_items)
+
+        if not current_user:
+            return list(coffee_items)
+
+        # Overlay per-user favorite flags without touching the cached objects
+        user_favorites = {
+            coffee_id for coffee_id, in db.query(UserFavoriteModel.coffee_id).filter(
+                UserFavoriteModel.user_id == current_user.id
+            ).all()
+        }
+        return [
+            item.model_copy(update={"is_favorite": True}) if item.id in user_favorites else item
+            for item in coffee_items
+        ]
 
+    def _query_public_menu(
+        self,
+        db: Session,
+        coffee_shop_id: UUID,
+        filter_params: CoffeeFilter
+    ) -> List[CoffeeMenuPublicResponse]:
+        """Run the public menu query; the result is user independent (is_favorite=False)"""
         # Check if coffee shop exists
         coffee_shop = db.query(CoffeeShopModel).filter(
             CoffeeShopModel.id == coffee_shop_id
@@ -149,21 +232,14 @@ class CoffeeMenuService:
                 detail=f"Coffee shop with id {coffee_shop_id} not found"
             )
 
-        # Start with base query
+        # Start with base query; ratings come from the aggregates stored on the menu item
         query = db.query(
             CoffeeMenuModel,
-            func.avg(RatingModel.rating).label('avg_rating'),
-            func.count(RatingModel.id).label('rating_count'),
             CoffeeShopModel.name.label('coffee_shop_name')
         ).join(
             CoffeeShopModel, CoffeeMenuModel.coffee_shop_id == CoffeeShopModel.id
-        ).outerjoin(
-            RatingModel, CoffeeMenuModel.id == RatingModel.coffee_id
         ).filter(
             CoffeeMenuModel.coffee_shop_id == coffee_shop_id,
-        ).group_by(
-            CoffeeMenuModel.id,
-            CoffeeShopModel.name
         )
 
         # Apply filters
@@ -187,8 +263,11 @@ class CoffeeMenuService:
 
         
         if filter_params.rating:
-            # Filter by having average rating >= specified rating
-            query = query.having(func.avg(RatingModel.rating) >= filter_params.rating)
+            # Filter by average rating >= specified rating
+            query = query.filter(
+                CoffeeMenuModel.total_ratings > 0,
+                CoffeeMenuModel.average_rating >= filter_params.rating
+            )
 
         if filter_params.category and filter_params.category != 'all':
             query = query.filter(CoffeeMenuModel.category == filter_params.category)
@@ -211,29 +290,16 @@ class CoffeeMenuService:
                 query = query.order_by(CoffeeMenuModel.price.asc())
         elif filter_params.sort_by == "rating":
             if filter_params.sort_order == "desc":
-                query = query.order_by(func.avg(RatingModel.rating).desc())
+                query = query.order_by(_rated_average().desc().nulls_first())
             else:
-                query = query.order_by(func.avg(RatingModel.rating).asc())
+                query = query.order_by(_rated_average().asc().nulls_last())
 
         # Execute query
         results = query.all()
 
-        # Get user favorites if user is authenticated
-        user_favorites = set()
-        if current_user:
-            favorites = db.query(UserFavoriteModel).filter(
-                UserFavoriteModel.user_id == current_user.id
-            ).all()
-            user_favorites = {fav.coffee_id for fav in favorites}
-
         # Prepare response
         coffee_items = []
-        for item in results:
-            coffee_menu = item[0]
-            avg_rating = item[1]
-            rating_count = item[2]
-            coffee_shop_name = item[3]
-
+        for coffee_menu, coffee_shop_name in results:
             coffee_response = CoffeeMenuPublicResponse(
                 id=coffee_menu.id,
                 name=coffee_menu.name,
@@ -241,9 +307,9 @@ class CoffeeMenuService:
                 description=coffee_menu.description,
                 image_url=coffee_menu.image_url,
                 is_available=coffee_menu.is_available,
-                rating_average=float(avg_rating) if avg_rating else None,
-                rating_count=rating_count,
-                is_favorite=coffee_menu.id in user_favorites,
+                rating_average=_rating_average(coffee_menu),
+                rating_count=coffee_menu.total_ratings or 0,
+                is_favorite=False,
                 coffee_shop_id=coffee_menu.coffee_shop_id,
                 coffee_shop_name=coffee_shop_name,
                 category=coffee_menu.category,
@@ -262,30 +328,20 @@ class CoffeeMenuService:
         """Get detailed information about a specific coffee menu item"""
         from app.models.coffee import CoffeeShopModel
 
-        # Query for coffee details with ratings
+        # Query for coffee details; ratings come from the aggregates stored on the menu item
         coffee_query = db.query(
             CoffeeMenuModel,
-            func.avg(RatingModel.rating).label('avg_rating'),
-            func.count(RatingModel.id).label('rating_count'),
             CoffeeShopModel.name.label('coffee_shop_name')
         ).join(
             CoffeeShopModel, CoffeeMenuModel.coffee_shop_id == CoffeeShopModel.id
-        ).outerjoin(
-            RatingModel, CoffeeMenuModel.id == RatingModel.coffee_id
         ).filter(
             CoffeeMenuModel.id == coffee_id,
-        ).group_by(
-            CoffeeMenuModel.id,
-            CoffeeShopModel.name
         ).first()
 
         if not coffee_query:
             return None
 
-        coffee_menu = coffee_query[0]
-        avg_rating = coffee_query[1]
-        rating_count = coffee_query[2]
-        coffee_shop_name = coffee_query[3]
+        coffee_menu, coffee_shop_name = coffee_query
 
         is_favorite = False
         if current_user:
@@ -331,8 +387,8 @@ class CoffeeMenuService:
             description=coffee_menu.description,
             image_url=coffee_menu.image_url,
             is_available=coffee_menu.is_available,
-            rating_average=float(avg_rating) if avg_rating else None,
-            rating_count=rating_count,
+            rating_average=_rating_average(coffee_menu),
+            rating_count=coffee_menu.total_ratings or 0,
             is_favorite=is_favorite,
             coffee_shop_id=coffee_menu.coffee_shop_id,
             coffee_shop_name=coffee_shop_name,
@@ -406,30 +462,18 @@ class CoffeeMenuService:
         
         favorites = db.query(
             CoffeeMenuModel,
-            func.avg(RatingModel.rating).label('avg_rating'),
-            func.count(RatingModel.id).label('rating_count'),
             CoffeeShopModel.name.label('coffee_shop_name')
         ).join(
             UserFavoriteModel, CoffeeMenuModel.id == UserFavoriteModel.coffee_id
         ).join(
             CoffeeShopModel, CoffeeMenuModel.coffee_shop_id == CoffeeShopModel.id
-        ).outerjoin(
-            RatingModel, CoffeeMenuModel.id == RatingModel.coffee_id
         ).filter(
             UserFavoriteModel.user_id == user_id
             # Tidak perlu filter is_available di sini, biarkan frontend yang memutuskan
-        ).group_by(
-            CoffeeMenuModel.id,
-            CoffeeShopModel.name
         ).all()
 
         favorite_items = []
-        for item in favorites:
-            coffee_menu = item[0]
-            avg_rating = item[1]
-            rating_count = item[2]
-            coffee_shop_name = item[3]
-
+        for coffee_menu, coffee_shop_name in favorites:
             coffee_response = CoffeeMenuPublicResponse(
                 id=coffee_menu.id,
                 name=coffee_menu.name,
@@ -437,8 +481,8 @@ class CoffeeMenuService:
                 description=coffee_menu.description,
                 image_url=coffee_menu.image_url,
                 is_available=coffee_menu.is_available,
-                rating_average=float(avg_rating) if avg_rating else None,
-                rating_count=rating_count,
+                rating_average=_rating_average(coffee_menu),
+                rating_count=coffee_menu.total_ratings or 0,
                 is_favorite=True, # Karena ini daftar favorit, pasti true
                 coffee_shop_id=coffee_menu.coffee_shop_id,
                 coffee_shop_name=coffee_shop_name,
@@ -451,26 +495,30 @@ class CoffeeMenuService:
     
     def add_rating(self, db: Session, coffee_id: UUID, user_id: UUID, rating_data: RatingCreate) -> bool:
         # Check if coffee exists and is available
-        coffee = db.query(CoffeeMenuModel).filter(
+        coffee_exists = db.query(CoffeeMenuModel.id).filter(
             CoffeeMenuModel.id == coffee_id
         ).first()
 
-        if not coffee:
+        if not coffee_exists:
             return False
 
-        # Check if user already rated this coffee
+        # Check if user already rated this coffee; lock it so concurrent edits see each other's value
         existing_rating = db.query(RatingModel).filter(
             RatingModel.coffee_id == coffee_id,
             RatingModel.user_id == user_id
-        ).first()
+        ).with_for_update().first()
 
         if existing_rating:
-            # Update existing rating
+            # Update existing rating: the count stays, the sum moves by the difference
+            sum_delta = rating_data.rating - existing_rating.rating
+            count_delta = 0
             existing_rating.rating = rating_data.rating
             existing_rating.review = rating_data.review
             db.add(existing_rating)
         else:
             # Create new rating
+            sum_delta = rating_data.rating
+            count_delta = 1
             new_rating = RatingModel(
                 user_id=user_id,
                 coffee_id=coffee_id,
@@ -479,25 +527,12 @@ class CoffeeMenuService:
             )
             db.add(new_rating)
 
-        # Recalculate average rating and total ratings for the coffee item
-        # Ini akan di-trigger secara otomatis oleh database hook atau trigger jika ada,
-        # atau harus dipanggil secara eksplisit di sini.
-        # Untuk kepastian, kita hitung ulang dan update langsung modelnya.
-        all_ratings_for_coffee = db.query(RatingModel).filter(RatingModel.coffee_id == coffee_id).all()
-        
-        total_scores = sum(r.rating for r in all_ratings_for_coffee)
-        total_ratings_count = len(all_ratings_for_coffee)
-
-        if total_ratings_count > 0:
-            coffee.average_rating = total_scores / total_ratings_count
-        else:
-            coffee.average_rating = 0.0 # No ratings, average is 0
-        coffee.total_ratings = total_ratings_count
-        
-        db.add(coffee)
+        # Aggregat rating diperbarui dengan satu UPDATE atomik (tanpa memuat semua rating)
+        db.flush()
+        coffee_shop_id = apply_rating_delta(db, coffee_id, sum_delta, count_delta)
         db.commit()
+        invalidate_public_menu_cache(coffee_shop_id)
 
-        db.refresh(coffee)
         if existing_rating:
             db.refresh(existing_rating)
         
@@ -8,6 +8,7 @@ from app.core.database import get_db
 from app.models.coffee import CoffeeShopModel
 from app.repositories.coffee_shop_repository import CoffeeShopRepository
 from app.schemas.coffe_shop_schema import CoffeeShopCreate, CoffeeShopUpdate
+from app.services.coffee_menu_service import invalidate_public_menu_cache
 
 class CoffeeShopService:
     def __init__(self, db: Session):
@@ -34,9 +35,12 @@ class CoffeeShopService:
 
     def update_coffee_shop(self, coffee_shop_id: UUID, update_data: CoffeeShopUpdate) -> CoffeeShopModel:
         coffee_shop = self.get_coffee_shop_by_id(coffee_shop_id)
-        return self.coffee_shop_repo.update(coffee_shop, update_data)
+        updated = self.coffee_shop_repo.update(coffee_shop, update_data)
+        invalidate_public_menu_cache(coffee_shop_id) # Nama kedai ikut tersimpan di cache menu
+        return updated
 
     def delete_coffee_shop(self, coffee_shop_id: UUID) -> bool:
         coffee_shop = self.get_coffee_shop_by_id(coffee_shop_id)
         self.coffee_shop_repo.delete(coffee_shop)
+        invalidate_public_menu_cache(coffee_shop_id)
         return True
@@ -1,11 +1,6 @@
-import logging
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-
 from app.core.config import settings
-
-logger = logging.getLogger(__name__)
+from app.services.mailer import OutgoingEmail, email_dispatcher
+from app.utils.email_templates import email_templates
 
 
 def send_email(
@@ -15,76 +10,29 @@ def send_email(
     text_content: str = None,
 ) -> bool:
     """
-    Send email using Mailtrap SMTP
+    Queue an email for delivery over the pooled SMTP connections
     """
-    message = MIMEMultipart("alternative")
-    message["Subject"] = subject
-    message["From"] = f"{settings.EMAILS_FROM_NAME} <{settings.EMAILS_FROM_EMAIL}>"
-    message["To"] = email_to
-    
-    # Add text/plain part
-    if text_content:
-        message.attach(MIMEText(text_content, "plain"))
-    
-    # Add text/html part
-    if html_content:
-        message.attach(MIMEText(html_content, "html"))
-    
-    try:
-        with smtplib.SMTP(settings.MAILTRAP_HOST, settings.MAILTRAP_PORT) as server:
-            server.starttls()
-            server.login(settings.MAILTRAP_USERNAME, settings.MAILTRAP_PASSWORD)
-            server.sendmail(
-                settings.EMAILS_FROM_EMAIL,
-                email_to,
-                message.as_string()
-            )
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
-        return False
+    return email_dispatcher.enqueue(
+        OutgoingEmail(
+            to_email=email_to,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content,
+        )
+    )
 
 
 def send_verification_email(email_to: str, verification_token: str) -> bool:
     """
     Send verification email
     """
-    verification_link = f"{settings.FRONTEND_URL}/verify-email?token={verification_token}"
-    
-    subject = "Coffee Shop - Email Verification"
-    
-    html_content = f"""
-    <html>
-        <body>
-            <p>Hi there,</p>
-            <p>Thank you for signing up with our Coffee Shop!</p>
-            <p>Please click the link below to verify your email address:</p>
-            <p><a href="{verification_link}">Verify Email</a></p>
-            <p>If you didn't register for an account, please ignore this email.</p>
-            <p>Thanks,<br>Coffee Shop Team</p>
-        </body>
-    </html>
-    """
-    
-    text_content = f"""
-    Hi there,
-    
-    Thank you for signing up with our Coffee Shop!
-    
-    Please click the link below to verify your email address:
-    {verification_link}
-    
-    If you didn't register for an account, please ignore this email.
-    
-    Thanks,
-    Coffee Shop Team
-    """
-    
+    context = {"verification_link": f"{settings.FRONTEND_URL}/verify-email?token={verification_token}"}
+
     return send_email(
         email_to=email_to,
-        subject=subject,
-        html_content=html_content,
-        text_content=text_content
+        subject="Coffee Shop - Email Verification",
+        html_content=email_templates.render("verification.html", **context),
+        text_content=email_templates.render("verification.txt", **context)
     )
 
 
@@ -92,43 +40,11 @@ def send_password_reset_email(email_to: str, reset_token: str) -> bool:
     """
     Send password reset email
     """
-    reset_link = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
-    
-    subject = "Coffee Shop - Password Reset"
-    
-    html_content = f"""
-    <html>
-        <body>
-            <p>Hi there,</p>
-            <p>You requested to reset your password for your Coffee Shop account.</p>
-            <p>Please click the link below to reset your password:</p>
-            <p><a href="{reset_link}">Reset Password</a></p>
-            <p>This link will expire in 1 hour for security reasons.</p>
-            <p>If you didn't request a password reset, please ignore this email.</p>
-            <p>Thanks,<br>Coffee Shop Team</p>
-        </body>
-    </html>
-    """
-    
-    text_content = f"""
-    Hi there,
-    
-    You requested to reset your password for your Coffee Shop account.
-    
-    Please click the link below to reset your password:
-    {reset_link}
-    
-    This link will expire in 1 hour for security reasons.
-    
-    If you didn't request a password reset, please ignore this email.
-    
-    Thanks,
-    Coffee Shop Team
-    """
-    
+    context = {"reset_link": f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"}
+
     return send_email(
         email_to=email_to,
-        subject=subject,
-        html_content=html_content,
-        text_content=text_content
-    )
\ No newline at end of file
+        subject="Coffee Shop - Password Reset",
+        html_content=email_templates.render("password_reset.html", **context),
+        text_content=email_templates.render("password_reset.txt", **context)
+    )
@@ -0,0 +1,210 @@
+"""
+Streaming exports of raw orders and order line items as CSV or NDJSON
+"""
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Query, Session, aliased
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.coffee import CoffeeMenuModel, CoffeeShopModel, VariantModel
+from app.models.order import OrderItemModel, OrderItemVariantModel, OrderModel, OrderStatus
+from app.models.user import UserModel
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExportDataset(NamedTuple):
+    columns: List[str]
+    build: Callable[[Session], Query]  # Must select exactly `columns`, in order
+
+
+def _orders_query(db: Session) -> Query:
+    payer = aliased(UserModel)
+    return db.query(
+        OrderModel.order_id, OrderModel.ordered_at, OrderModel.status, OrderModel.total_price,
+        CoffeeShopModel.id, CoffeeShopModel.name, UserModel.name, UserModel.email,
+        payer.name, OrderModel.paid_at, OrderModel.delivery_method,
+    )\
+        .join(UserModel, UserModel.id == OrderModel.user_id)\
+        .outerjoin(payer, payer.id == OrderModel.paid_by_user_id)\
+        .outerjoin(CoffeeShopModel, CoffeeShopModel.id == OrderModel.coffee_shop_id)
+
+
+def _order_items_query(db: Session) -> Query:
+    # Variant names per line item; a correlated subquery keeps one row per item.
+    # unit_price is what the customer paid (menu price plus variants at order time),
+    # not the menu's current price; subtotal is always unit_price * quantity
+    variant_names = select(func.string_agg(VariantModel.name, ", "))\
+        .join(OrderItemVariantModel, OrderItemVariantModel.variant_id == VariantModel.id)\
+        .where(OrderItemVariantModel.order_item_id == OrderItemModel.id)\
+        .correlate(OrderItemModel)\
+        .scalar_subquery()
+
+    return db.query(
+        OrderModel.order_id, OrderModel.ordered_at, OrderModel.status,
+        CoffeeShopModel.id, CoffeeShopModel.name,
+        CoffeeMenuModel.name, OrderItemModel.quantity, OrderItemModel.subtotal // OrderItemModel.quantity,
+        OrderItemModel.subtotal, variant_names,
+    )\
+        .join(OrderItemModel, OrderItemModel.order_id == OrderModel.id)\
+        .join(CoffeeMenuModel, CoffeeMenuModel.id == OrderItemModel.coffee_id)\
+        .outerjoin(CoffeeShopModel, CoffeeShopModel.id == OrderModel.coffee_shop_id)
+
+
+EXPORT_DATASETS = {
+    "orders": ExportDataset(
+        ["order_id", "ordered_at", "status", "total_price", "coffee_shop_id", "coffee_shop_name",
+         "customer_name", "customer_email", "paid_by_name", "paid_at", "delivery_method"],
+        _orders_query,
+    ),
+    "order_items": ExportDataset(
+        ["order_id", "ordered_at", "status", "coffee_shop_id", "coffee_shop_name",
+         "item_name", "quantity", "unit_price", "subtotal", "variants"],
+        _order_items_query,
+    ),
+}
+
+
+def _plain(value: Any) -> Any:
+    """Column value as a CSV/JSON scalar"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def csv_chunks(rows: Iterable[Sequence[Any]], chunk_bytes: int = settings.EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """Encode rows (the first one being the header) as CSV, yielding ~chunk_bytes at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                  chunk_bytes: int = settings.EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """Encode rows as one JSON object per line, yielding ~chunk_bytes at a time"""
+    lines: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row)), ensure_ascii=False, separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(lines).encode()
+            lines.clear()
+            size = 0
+    if lines:
+        yield "".join(lines).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode_export(columns: Sequence[str], rows: Iterable[Sequence[Any]], fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    if fmt == "csv":
+        chunks = csv_chunks(_prepend(columns, rows))
+    elif fmt == "ndjson":
+        chunks = ndjson_chunks(columns, rows)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return gzip_chunks(chunks) if gzip else chunks
+
+
+def _prepend(first: Sequence[Any], rows: Iterable[Sequence[Any]]) -> Iterator[Sequence[Any]]:
+    yield first
+    yield from rows
+
+
+class ExportService:
+    """
+    Streams export rows from a server-side cursor (yield_per), so memory stays
+    flat however many rows the date range covers. Rows are selected as plain
+    columns, never as ORM entities, so nothing accumulates in the session.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 yield_per: int = settings.EXPORT_YIELD_PER):
+        self.session_factory = session_factory
+        self.yield_per = yield_per
+
+    def query(
+        self,
+        db: Session,
+        dataset: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        coffee_shop_id: Optional[UUID] = None,
+        status: Optional[OrderStatus] = None,
+    ) -> Query:
+        if dataset not in EXPORT_DATASETS:
+            raise ValueError(f"Unknown export dataset: {dataset}")
+
+        query = EXPORT_DATASETS[dataset].build(db)
+        if start_date:
+            query = query.filter(OrderModel.ordered_at >= datetime.combine(start_date, time.min))
+        if end_date:
+            query = query.filter(OrderModel.ordered_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        if coffee_shop_id:
+            query = query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
+        if status:
+            query = query.filter(OrderModel.status == status)
+        return query.order_by(OrderModel.ordered_at, OrderModel.id)
+
+    def rows(self, db: Session, dataset: str, **filters) -> Iterator[List[Any]]:
+        for row in self.query(db, dataset, **filters).yield_per(self.yield_per):
+            yield [_plain(value) for value in row]
+
+    def stream(self, dataset: str, fmt: str = "csv", gzip: bool = False, **filters) -> Iterator[bytes]:
+        """
+        Encoded export body. Opens its own session, because the response body is
+        produced after the request handler (and its session dependency) returned.
+        """
+        # Reject bad arguments here, before the response has started
+        if dataset not in EXPORT_DATASETS:
+            raise ValueError(f"Unknown export dataset: {dataset}")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        columns = EXPORT_DATASETS[dataset].columns
+
+        def body() -> Iterator[bytes]:
+            db = self.session_factory()
+            try:
+                yield from encode_export(columns, self.rows(db, dataset, **filters), fmt, gzip)
+            finally:
+                db.close()
+
+        return body()
+
+    def filename(self, dataset: str, fmt: str, gzip: bool = False) -> str:
+        return f"{dataset}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{fmt}" + (".gz" if gzip else "")
+
+
+export_service = ExportService()
@@ -0,0 +1,286 @@
+"""
+Outbound email: pooled, reused SMTP connections and an in-process dispatch queue
+"""
+import asyncio
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.utils.metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+
+class OutgoingEmail(NamedTuple):
+    to_email: str
+    subject: str
+    html_content: Optional[str]
+    text_content: Optional[str] = None
+    to_name: Optional[str] = None
+    attempts: int = 0
+
+
+def build_message(email: OutgoingEmail, from_email: str, from_name: str) -> Message:
+    message = MIMEMultipart("alternative")
+    message["Subject"] = email.subject
+    message["From"] = f"{from_name} <{from_email}>"
+    message["To"] = f"{email.to_name} <{email.to_email}>" if email.to_name else email.to_email
+
+    # text/plain first, clients show the last alternative they support
+    if email.text_content:
+        message.attach(MIMEText(email.text_content, "plain"))
+    if email.html_content:
+        message.attach(MIMEText(email.html_content, "html"))
+    return message
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` authenticated SMTP connections open and hands them out
+    to sender threads. Idle connections are checked with NOOP before reuse and
+    replaced when the server dropped them, so STARTTLS/LOGIN happen once per
+    connection instead of once per message.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        use_starttls: bool,
+        size: int,
+        timeout: float,
+        idle_check_seconds: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.size = size
+        self.timeout = timeout
+        self.idle_check_seconds = idle_check_seconds
+        self._idle: "queue.LifoQueue[tuple]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    connection, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - last_used < self.idle_check_seconds or self._is_alive(connection):
+                    return connection
+                self._close(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection: smtplib.SMTP, broken: bool = False) -> None:
+        if broken:
+            self._close(connection)
+        else:
+            self._idle.put((connection, time.monotonic()))
+        self._slots.release()
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(connection)
+
+    def _connect(self) -> smtplib.SMTP:
+        with external_call("smtp", "connect"):
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_starttls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password)
+        self.connections_opened += 1
+        return connection
+
+    def _is_alive(self, connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def _close(self, connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+
+class EmailDispatcher:
+    """
+    In-process queue in front of the SMTP pool. `enqueue` never blocks the
+    caller; sender tasks take up to `batch_size` queued messages at a time and
+    send them over one pooled connection in a worker thread. Failed messages
+    are re-queued with exponential backoff up to `max_attempts`.
+    Queued messages are lost if the process dies; callers that need stronger
+    delivery guarantees should keep their own record (e.g. NotificationModel).
+    """
+
+    def __init__(self, pool: SMTPConnectionPool, from_email: str, from_name: str,
+                 batch_size: int, max_attempts: int, backoff_seconds: float):
+        self.pool = pool
+        self.from_email = from_email
+        self.from_name = from_name
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"queued": 0, "sent": 0, "retried": 0, "failed": 0}
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._run_sender()) for _ in range(self.pool.size)]
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Email queue stopped with %d unsent messages", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        await asyncio.to_thread(self.pool.close_all)
+
+    def enqueue(self, email: OutgoingEmail) -> bool:
+        """Queue a message; safe to call from the event loop or from worker threads"""
+        self.stats["queued"] += 1
+        if self._queue is None or self._loop is None:
+            # Dispatcher not running (scripts, CLI): send inline
+            return self._send_batch([email]) == 1
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._queue.put_nowait(email)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, email)
+        return True
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _run_sender(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._send_batch, batch)
+            except Exception as e:
+                logger.error("Email sender error: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _send_batch(self, batch: List[OutgoingEmail]) -> int:
+        """Send messages over one pooled connection; returns how many were accepted"""
+        try:
+            connection = self.pool.acquire()
+        except (smtplib.SMTPException, OSError) as e:
+            # Could not connect / authenticate
+            for failed in batch:
+                self._retry_later(failed, e)
+            return 0
+
+        sent = 0
+        try:
+            for index, email in enumerate(batch):
+                try:
+                    message = build_message(email, self.from_email, self.from_name).as_string()
+                except Exception as e:
+                    # Retrying cannot fix a message that does not render
+                    self.stats["failed"] += 1
+                    logger.error("Failed to build email to %s: %s", email.to_email, e)
+                    continue
+                try:
+                    with external_call("smtp", "send"):
+                        connection.sendmail(self.from_email, [email.to_email], message)
+                    sent += 1
+                except smtplib.SMTPServerDisconnected as e:
+                    self._drop_connection(connection, batch[index:], e)
+                    connection = None
+                    break
+                except smtplib.SMTPException as e:
+                    # Refused recipient / data error: the server reset the
+                    # transaction, the connection stays usable
+                    self._retry_later(email, e)
+                except OSError as e:
+                    self._drop_connection(connection, batch[index:], e)
+                    connection = None
+                    break
+        finally:
+            if connection is not None:
+                self.pool.release(connection)
+
+        self.stats["sent"] += sent
+        return sent
+
+    def _drop_connection(self, connection: smtplib.SMTP, unsent: List[OutgoingEmail], error: Exception) -> None:
+        """Connection is gone: close it and retry the unsent messages later"""
+        self.pool.release(connection, broken=True)
+        for failed in unsent:
+            self._retry_later(failed, error)
+
+    def _retry_later(self, email: OutgoingEmail, error: Exception) -> None:
+        attempts = email.attempts + 1
+        if attempts >= self.max_attempts or self._loop is None or self._queue is None:
+            self.stats["failed"] += 1
+            logger.error("Failed to send email to %s after %d attempts: %s", email.to_email, attempts, error)
+            return
+
+        self.stats["retried"] += 1
+        delay = self.backoff_seconds * (2 ** (attempts - 1))
+        logger.warning("Email to %s failed (%s), retrying in %.1fs", email.to_email, error, delay)
+        retry = email._replace(attempts=attempts)
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, self._queue.put_nowait, retry)
+
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.MAILTRAP_HOST,
+    port=settings.MAILTRAP_PORT,
+    username=settings.MAILTRAP_USERNAME,
+    password=settings.MAILTRAP_PASSWORD,
+    use_starttls=settings.MAIL_USE_STARTTLS,
+    size=settings.MAIL_POOL_SIZE,
+    timeout=settings.MAIL_TIMEOUT_SECONDS,
+)
+
+email_dispatcher = EmailDispatcher(
+    pool=smtp_pool,
+    from_email=settings.EMAILS_FROM_EMAIL,
+    from_name=settings.EMAILS_FROM_NAME or "CoffeeBooking System",
+    batch_size=settings.MAIL_BATCH_SIZE,
+    max_attempts=settings.MAIL_MAX_ATTEMPTS,
+    backoff_seconds=settings.MAIL_RETRY_BACKOFF_SECONDS,
+)
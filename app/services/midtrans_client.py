@@ -0,0 +1,224 @@
+"""
+Async Midtrans API client: pooled keep-alive connections, per-call deadlines,
+jittered retries for idempotent calls and a circuit breaker
+"""
+import asyncio
+import base64
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.utils.metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying on idempotent calls
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class MidtransError(Exception):
+    """Midtrans answered with an error or could not be reached"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class MidtransUnavailableError(MidtransError):
+    """Circuit is open, calls are rejected without contacting Midtrans"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open);
+    a success closes the circuit again, a failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise MidtransUnavailableError("Payment gateway temporarily unavailable (circuit open)")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Midtrans circuit opened after %d consecutive failures", self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """A call ended without an answer either way (e.g. cancelled); lets the next call be the trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class MidtransClient:
+    """
+    One shared httpx.AsyncClient per process (created lazily, closed on shutdown).
+
+    Only idempotent calls (status lookups) are retried on timeouts and 5xx/429.
+    Charges are retried only when the connection could not be established,
+    i.e. when Midtrans never received the request.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        server_key: str,
+        timeout: float,
+        connect_timeout: float,
+        max_connections: int,
+        max_retries: int,
+        backoff_base: float,
+        breaker: CircuitBreaker,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker = breaker
+        auth = base64.b64encode(f"{server_key}:".encode("ascii")).decode("ascii")
+        self._headers = {
+            "Authorization": f"Basic {auth}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def charge(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with external_call("midtrans", "charge"):
+            return await self._request("POST", "/v2/charge", json=payload, idempotent=False)
+
+    async def create_token(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with external_call("midtrans", "token"):
+            return await self._request("POST", "/v2/token", json=payload, idempotent=False)
+
+    async def get_status(self, order_id: str) -> Dict[str, Any]:
+        with external_call("midtrans", "status"):
+            return await self._request("GET", f"/v2/{order_id}/status", idempotent=True)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def _request(self, method: str, path: str, idempotent: bool, **kwargs: Any) -> Dict[str, Any]:
+        # Overall deadline for the call including retries
+        deadline = time.monotonic() + self.timeout * (self.max_retries + 1)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                response = await self._get_client().request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                never_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if (idempotent or never_sent) and await self._backoff(attempt, deadline):
+                    attempt += 1
+                    continue
+                raise MidtransError(f"{type(e).__name__}: {e}") from e
+            except httpx.HTTPError as e:
+                # Not a transport problem, but no usable answer either (e.g. DecodingError)
+                self.breaker.record_failure()
+                raise MidtransError(f"{type(e).__name__}: {e}") from e
+            except BaseException:
+                # Cancelled (worker stopping) or unexpected: never leave a half-open trial marked in flight
+                self.breaker.release_trial()
+                raise
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                self.breaker.record_failure()
+                if idempotent and await self._backoff(attempt, deadline):
+                    attempt += 1
+                    continue
+                raise MidtransError(f"HTTP {response.status_code}: {response.text[:200]}", response.status_code)
+
+            # Any other answer means Midtrans is up, even a 4xx for a bad request
+            self.breaker.record_success()
+            if response.is_error:
+                raise MidtransError(f"HTTP {response.status_code}: {response.text[:200]}", response.status_code)
+            try:
+                return response.json()
+            except ValueError:
+                # e.g. an HTML page from a proxy in front of Midtrans
+                raise MidtransError("invalid JSON response", response.status_code)
+
+    async def _backoff(self, attempt: int, deadline: float) -> bool:
+        """Sleep with full jitter before the next attempt, False when out of retries or time"""
+        if attempt >= self.max_retries:
+            return False
+        delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+
+def _default_base_url() -> str:
+    if settings.MIDTRANS_API_BASE_URL:
+        return settings.MIDTRANS_API_BASE_URL
+    return "https://api.sandbox.midtrans.com" if settings.MIDTRANS_SANDBOX else "https://api.midtrans.com"
+
+
+midtrans_client = MidtransClient(
+    base_url=_default_base_url(),
+    server_key=settings.MIDTRANS_SERVER_KEY,
+    timeout=settings.MIDTRANS_TIMEOUT_SECONDS,
+    connect_timeout=settings.MIDTRANS_CONNECT_TIMEOUT_SECONDS,
+    max_connections=settings.MIDTRANS_MAX_CONNECTIONS,
+    max_retries=settings.MIDTRANS_MAX_RETRIES,
+    backoff_base=settings.MIDTRANS_RETRY_BACKOFF_SECONDS,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.MIDTRANS_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=settings.MIDTRANS_CIRCUIT_RESET_SECONDS,
+    ),
+)
@@ -0,0 +1,91 @@
+"""
+Local fake of the Midtrans Core API for development, manual tests and the
+midtrans_client benchmark:
+
+    uvicorn app.services.midtrans_fake_server:app --port 8099
+
+Point the app at it with MIDTRANS_API_BASE_URL=http://127.0.0.1:8099.
+FAKE_MIDTRANS_LATENCY_MS and FAKE_MIDTRANS_FAILURE_RATE (0-1, answered with 503)
+simulate a slow or flaky gateway. POST /_fake/{order_id}/{transaction_status}
+moves an order to settlement/expire/cancel/deny.
+"""
+import asyncio
+import os
+import random
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from fastapi import FastAPI, HTTPException, Request
+
+LATENCY_SECONDS = float(os.getenv("FAKE_MIDTRANS_LATENCY_MS", "50")) / 1000
+FAILURE_RATE = float(os.getenv("FAKE_MIDTRANS_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Fake Midtrans")
+transactions: Dict[str, Dict[str, Any]] = {}
+
+
+async def _simulate_gateway() -> None:
+    await asyncio.sleep(LATENCY_SECONDS)
+    if random.random() < FAILURE_RATE:
+        raise HTTPException(status_code=503, detail="fake gateway failure")
+
+
+def _transaction(payload: Dict[str, Any]) -> Dict[str, Any]:
+    details = payload.get("transaction_details", {})
+    order_id = details.get("order_id")
+    if not order_id:
+        raise HTTPException(status_code=400, detail="transaction_details.order_id is required")
+    if order_id in transactions:
+        # Midtrans rejects a second charge for the same order id
+        raise HTTPException(status_code=406, detail="order_id has already been taken")
+
+    transaction_id = str(uuid.uuid4())
+    transaction = {
+        "status_code": "201",
+        "status_message": "Success, transaction is created",
+        "transaction_id": transaction_id,
+        "order_id": order_id,
+        "gross_amount": f"{details.get('gross_amount', 0)}.00",
+        "payment_type": payload.get("payment_type", "credit_card"),
+        "transaction_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "transaction_status": "pending",
+        "actions": [
+            {"name": "generate-qr-code", "method": "GET", "url": f"https://fake.midtrans/qr/{transaction_id}"},
+            {"name": "deeplink-redirect", "method": "GET", "url": f"https://fake.midtrans/deeplink/{transaction_id}"},
+        ],
+    }
+    if payload.get("payment_type") == "bank_transfer":
+        transaction["va_numbers"] = [{"bank": "bca", "va_number": str(random.randint(10**10, 10**11 - 1))}]
+    transactions[order_id] = transaction
+    return transaction
+
+
+@app.post("/v2/charge")
+async def charge(request: Request):
+    await _simulate_gateway()
+    return _transaction(await request.json())
+
+
+@app.post("/v2/token")
+async def token(request: Request):
+    await _simulate_gateway()
+    transaction = _transaction(await request.json())
+    return {"token": transaction["transaction_id"], "redirect_url": f"https://fake.midtrans/snap/{transaction['transaction_id']}"}
+
+
+@app.get("/v2/{order_id}/status")
+async def get_status(order_id: str):
+    await _simulate_gateway()
+    if order_id not in transactions:
+        raise HTTPException(status_code=404, detail="Transaction doesn't exist.")
+    return transactions[order_id]
+
+
+@app.post("/_fake/{order_id}/{transaction_status}")
+async def set_status(order_id: str, transaction_status: str):
+    if order_id not in transactions:
+        raise HTTPException(status_code=404, detail="Transaction doesn't exist.")
+    transactions[order_id]["transaction_status"] = transaction_status
+    transactions[order_id]["status_code"] = "200"
+    return transactions[order_id]
@@ -1,58 +1,96 @@
 """
 Service for sending notifications (email)
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import Optional
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.orm import Session
-import os
-from jinja2 import Template
 
 from app.models.order import OrderModel, OrderStatus
 from app.models.booking import BookingModel, BookingStatus
 from app.models.user import UserModel
-from app.core.config import settings
+from app.services.mailer import OutgoingEmail, email_dispatcher
+from app.utils.email_templates import email_templates
+
+# Email content per status; "subject" is formatted with the order/booking id
+ORDER_STATUS_MESSAGES = {
+    OrderStatus.PENDING: {
+        "subject": "Order {id} - Received",
+        "title": "Order Received",
+        "message": "We have received your order and it's being processed.",
+        "color": "#fbbf24"  # yellow
+    },
+    OrderStatus.CONFIRMED: {
+        "subject": "Order {id} - Confirmed",
+        "title": "Order Confirmed",
+        "message": "Your order has been confirmed and is being prepared.",
+        "color": "#3b82f6"  # blue
+    },
+    OrderStatus.PREPARING: {
+        "subject": "Order {id} - Being Prepared",
+        "title": "Order Being Prepared",
+        "message": "Your delicious coffee is being prepared by our baristas.",
+        "color": "#f59e0b"  # orange
+    },
+    OrderStatus.READY: {
+        "subject": "Order {id} - Ready for Pickup",
+        "title": "Order Ready!",
+        "message": "Your order is ready for pickup. Please come to collect it.",
+        "color": "#10b981"  # green
+    },
+    OrderStatus.COMPLETED: {
+        "subject": "Order {id} - Completed",
+        "title": "Order Completed",
+        "message": "Thank you! Your order has been completed. We hope you enjoyed it!",
+        "color": "#059669"  # dark green
+    },
+    OrderStatus.CANCELLED: {
+        "subject": "Order {id} - Cancelled",
+        "title": "Order Cancelled",
+        "message": "Your order has been cancelled. If you have any questions, please contact us.",
+        "color": "#ef4444"  # red
+    }
+}
+
+BOOKING_STATUS_MESSAGES = {
+    BookingStatus.NOCONFIRM: {
+        "subject": "Booking {id} - Pending Confirmation",
+        "title": "Booking Received",
+        "message": "We have received your table booking request and it's being processed.",
+        "color": "#fbbf24"
+    },
+    BookingStatus.CONFIRM: {
+        "subject": "Booking {id} - Confirmed",
+        "title": "Booking Confirmed",
+        "message": "Great news! Your table booking has been confirmed.",
+        "color": "#10b981"
+    },
+    BookingStatus.SUCCESS: {
+        "subject": "Booking {id} - Completed",
+        "title": "Thank You!",
+        "message": "Your booking is complete. We look forward to seeing you!",
+        "color": "#059669"
+    },
+    BookingStatus.CANCELLED: {
+        "subject": "Booking {id} - Cancelled",
+        "title": "Booking Cancelled",
+        "message": "Your table booking has been cancelled. If you have any questions, please contact us.",
+        "color": "#ef4444"
+    }
+}
 
 class NotificationService:
-    def __init__(self):
-        self.smtp_server = settings.MAILTRAP_HOST
-        self.smtp_port = settings.MAILTRAP_PORT
-        self.smtp_username = settings.MAILTRAP_USERNAME
-        self.smtp_password = settings.MAILTRAP_PASSWORD
-        self.sender_email = settings.EMAILS_FROM_EMAIL
-        self.sender_name = settings.EMAILS_FROM_NAME or "CoffeeBooking System"
-
-
     async def send_email(self, to_email: str, to_name: str, subject: str, html_content: str, text_content: str = None):
-        """Send email notification"""
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = f"{to_name} <{to_email}>"
-
-            # Add text version if provided
-            if text_content:
-                text_part = MIMEText(text_content, 'plain')
-                msg.attach(text_part)
-
-            # Add HTML version
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
-
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-                
-            return True
-        except Exception as e:
-            print(f"Failed to send email: {str(e)}")
-            return False
+        """Queue email notification; delivery and retries happen in the email dispatcher"""
+        return email_dispatcher.enqueue(
+            OutgoingEmail(
+                to_email=to_email,
+                to_name=to_name,
+                subject=subject,
+                html_content=html_content,
+                text_content=text_content,
+            )
+        )
 
     async def send_order_status_notification(self, db: Session, order_id: UUID, new_status: OrderStatus, changed_by_user_id: UUID):
         """Send order status change notification to customer"""
@@ -70,99 +108,12 @@ class NotificationService:
         admin = db.query(UserModel).filter(UserModel.id == changed_by_user_id).first()
         admin_name = admin.name if admin else "Admin"
 
-        # Prepare email content based on status
-        status_messages = {
-            OrderStatus.PENDING: {
-                "subject": f"Order {order.order_id} - Received",
-                "title": "Order Received",
-                "message": "We have received your order and it's being processed.",
-                "color": "#fbbf24"  # yellow
-            },
-            OrderStatus.CONFIRMED: {
-                "subject": f"Order {order.order_id} - Confirmed",
-                "title": "Order Confirmed",
-                "message": "Your order has been confirmed and is being prepared.",
-                "color": "#3b82f6"  # blue
-            },
-            OrderStatus.PREPARING: {
-                "subject": f"Order {order.order_id} - Being Prepared",
-                "title": "Order Being Prepared",
-                "message": "Your delicious coffee is being prepared by our baristas.",
-                "color": "#f59e0b"  # orange
-            },
-            OrderStatus.READY: {
-                "subject": f"Order {order.order_id} - Ready for Pickup",
-                "title": "Order Ready!",
-                "message": "Your order is ready for pickup. Please come to collect it.",
-                "color": "#10b981"  # green
-            },
-            OrderStatus.COMPLETED: {
-                "subject": f"Order {order.order_id} - Completed",
-                "title": "Order Completed",
-                "message": "Thank you! Your order has been completed. We hope you enjoyed it!",
-                "color": "#059669"  # dark green
-            },
-            OrderStatus.CANCELLED: {
-                "subject": f"Order {order.order_id} - Cancelled",
-                "title": "Order Cancelled",
-                "message": "Your order has been cancelled. If you have any questions, please contact us.",
-                "color": "#ef4444"  # red
-            }
-        }
-
-        status_info = status_messages.get(new_status, status_messages[OrderStatus.PENDING])
-
-        # HTML email template
-        html_template = Template("""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{{ subject }}</title>
-            <style>
-                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-                .header { background: {{ color }}; color: white; padding: 20px; border-radius: 5px 5px 0 0; }
-                .content { background: #f9f9f9; padding: 20px; border-radius: 0 0 5px 5px; }
-                .order-details { background: white; padding: 15px; border-radius: 5px; margin: 15px 0; }
-                .footer { text-align: center; margin-top: 20px; color: #666; font-size: 12px; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>{{ title }}</h1>
-                </div>
-                <div class="content">
-                    <p>Dear {{ customer_name }},</p>
-                    <p>{{ message }}</p>
-                    
-                    <div class="order-details">
-                        <h3>Order Details:</h3>
-                        <p><strong>Order ID:</strong> {{ order_id }}</p>
-                        <p><strong>Status:</strong> {{ status }}</p>
-                        <p><strong>Total Amount:</strong> Rp {{ total_price:,}}</p>
-                        <p><strong>Ordered At:</strong> {{ ordered_at }}</p>
-                        {% if coffee_shop_name %}
-                        <p><strong>Coffee Shop:</strong> {{ coffee_shop_name }}</p>
-                        {% endif %}
-                    </div>
-                    
-                    <p>If you have any questions, please don't hesitate to contact us.</p>
-                    <p>Thank you for choosing our service!</p>
-                </div>
-                <div class="footer">
-                    <p>This is an automated message. Please do not reply to this email.</p>
-                    <p>Updated by: {{ admin_name }} at {{ current_time }}</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """)
+        status_info = ORDER_STATUS_MESSAGES.get(new_status, ORDER_STATUS_MESSAGES[OrderStatus.PENDING])
+        subject = status_info["subject"].format(id=order.order_id)
 
-        html_content = html_template.render(
-            subject=status_info["subject"],
+        html_content = email_templates.render(
+            "order_status.html",
+            subject=subject,
             title=status_info["title"],
             message=status_info["message"],
             color=status_info["color"],
@@ -179,7 +130,7 @@ class NotificationService:
         return await self.send_email(
             to_email=customer.email,
             to_name=customer.name,
-            subject=status_info["subject"],
+            subject=subject,
             html_content=html_content
         )
 
@@ -199,99 +150,12 @@ class NotificationService:
         admin = db.query(UserModel).filter(UserModel.id == changed_by_user_id).first()
         admin_name = admin.name if admin else "System"
 
-        # Prepare email content based on status
-        status_messages = {
-            BookingStatus.PENDING: {
-                "subject": f"Booking {booking.booking_id} - Pending Confirmation",
-                "title": "Booking Received",
-                "message": "We have received your table booking request and it's being processed.",
-                "color": "#fbbf24"
-            },
-            BookingStatus.CONFIRMED: {
-                "subject": f"Booking {booking.booking_id} - Confirmed",
-                "title": "Booking Confirmed",
-                "message": "Great news! Your table booking has been confirmed.",
-                "color": "#10b981"
-            },
-            BookingStatus.CANCELLED: {
-                "subject": f"Booking {booking.booking_id} - Cancelled",
-                "title": "Booking Cancelled",
-                "message": "Your table booking has been cancelled. If you have any questions, please contact us.",
-                "color": "#ef4444"
-            },
-            BookingStatus.COMPLETED: {
-                "subject": f"Booking {booking.booking_id} - Completed",
-                "title": "Thank You!",
-                "message": "Thank you for dining with us! We hope you had a wonderful experience.",
-                "color": "#059669"
-            }
-        }
+        status_info = BOOKING_STATUS_MESSAGES.get(new_status, BOOKING_STATUS_MESSAGES[BookingStatus.NOCONFIRM])
+        subject = status_info["subject"].format(id=booking.booking_id)
 
-        status_info = status_messages.get(new_status, status_messages[BookingStatus.PENDING])
-
-        # HTML email template
-        html_template = Template("""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{{ subject }}</title>
-            <style>
-                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-                .header { background: {{ color }}; color: white; padding: 20px; border-radius: 5px 5px 0 0; }
-                .content { background: #f9f9f9; padding: 20px; border-radius: 0 0 5px 5px; }
-                .booking-details { background: white; padding: 15px; border-radius: 5px; margin: 15px 0; }
-                .footer { text-align: center; margin-top: 20px; color: #666; font-size: 12px; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>{{ title }}</h1>
-                </div>
-                <div class="content">
-                    <p>Dear {{ customer_name }},</p>
-                    <p>{{ message }}</p>
-                    
-                    <div class="booking-details">
-                        <h3>Booking Details:</h3>
-                        <p><strong>Booking ID:</strong> {{ booking_id }}</p>
-                        <p><strong>Status:</strong> {{ status }}</p>
-                        <p><strong>Date & Time:</strong> {{ booking_date }}</p>
-                        <p><strong>Guest Count:</strong> {{ guest_count }}</p>
-                        <p><strong>Table Count:</strong> {{ table_count }}</p>
-                        {% if coffee_shop_name %}
-                        <p><strong>Coffee Shop:</strong> {{ coffee_shop_name }}</p>
-                        {% endif %}
-                    </div>
-                    
-                    {% if new_status == 'CONFIRMED' %}
-                    <div style="background: #d1fae5; padding: 15px; border-radius: 5px; margin: 15px 0;">
-                        <p><strong>Important Reminders:</strong></p>
-                        <ul>
-                            <li>Please arrive on time for your reservation</li>
-                            <li>If you need to cancel or modify your booking, please contact us at least 2 hours in advance</li>
-                            <li>Late arrivals may result in table reassignment</li>
-                        </ul>
-                    </div>
-                    {% endif %}
-                    
-                    <p>If you have any questions, please don't hesitate to contact us.</p>
-                    <p>Thank you for choosing our service!</p>
-                </div>
-                <div class="footer">
-                    <p>This is an automated message. Please do not reply to this email.</p>
-                    <p>Updated by: {{ admin_name }} at {{ current_time }}</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """)
-
-        html_content = html_template.render(
-            subject=status_info["subject"],
+        html_content = email_templates.render(
+            "booking_status.html",
+            subject=subject,
             title=status_info["title"],
             message=status_info["message"],
             color=status_info["color"],
@@ -310,9 +174,43 @@ class NotificationService:
         return await self.send_email(
             to_email=customer.email,
             to_name=customer.name,
-            subject=status_info["subject"],
+            subject=subject,
             html_content=html_content
         )
 
+    def queue_booking_reminder(self, booking: BookingModel) -> bool:
+        """Queue the reminder for an upcoming booking (booking.user must be loaded); sync, for the reminder job"""
+        customer = booking.user
+        if not customer:
+            return False
+
+        subject = f"Booking {booking.booking_id} - Reminder"
+        html_content = email_templates.render(
+            "booking_status.html",
+            subject=subject,
+            title="Booking Reminder",
+            message="This is a reminder of your upcoming table booking. We look forward to seeing you!",
+            color="#3b82f6",
+            customer_name=customer.name,
+            booking_id=booking.booking_id,
+            status=booking.status.value.title(),
+            booking_date=booking.booking_date.strftime("%B %d, %Y at %I:%M %p"),
+            guest_count=booking.guest_count,
+            table_count=booking.table_count,
+            coffee_shop_name=None,
+            admin_name="System",
+            current_time=datetime.now().strftime("%B %d, %Y at %I:%M %p"),
+            new_status=booking.status.value
+        )
+
+        return email_dispatcher.enqueue(
+            OutgoingEmail(
+                to_email=customer.email,
+                to_name=customer.name,
+                subject=subject,
+                html_content=html_content,
+            )
+        )
+
 # Create instance
 notification_service = NotificationService()
\ No newline at end of file
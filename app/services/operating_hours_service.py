@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.models.operating_hours import WeekDay
 from app.repositories.operating_hours_repository import operating_hours_repository, time_slot_repository
+from app.services.table_occupancy_index import table_occupancy_index
 from app.schemas.operating_hours_schema import (
     OperatingHoursCreate, 
     OperatingHoursUpdate, 
@@ -83,9 +84,11 @@ class OperatingHoursService:
 class TimeSlotService:
     def create_time_slot(self, db: Session, time_slot_data: TimeSlotCreate):
         """Create new time slot"""
-        return time_slot_repository.create_time_slot(
+        time_slot = time_slot_repository.create_time_slot(
             db, time_slot_data=time_slot_data
         )
+        table_occupancy_index.invalidate_shop(time_slot.coffee_shop_id)
+        return time_slot
     
     def update_time_slot(
         self, 
@@ -94,11 +97,17 @@ class TimeSlotService:
         time_slot_data: TimeSlotUpdate
     ):
         """Update time slot"""
-        return time_slot_repository.update_time_slot(
+        existing = time_slot_repository.get_time_slot(db, time_slot_id)
+        time_slot = time_slot_repository.update_time_slot(
             db, 
             time_slot_id=time_slot_id, 
             time_slot_data=time_slot_data
         )
+        if existing:
+            table_occupancy_index.invalidate_shop(existing.coffee_shop_id)
+        if time_slot:
+            table_occupancy_index.invalidate_shop(time_slot.coffee_shop_id)
+        return time_slot
     
     def get_time_slot(self, db: Session, time_slot_id: UUID):
         """Get time slot by id"""
@@ -131,11 +140,17 @@ class TimeSlotService:
             slot = self.create_time_slot(db, slot_data)
             result.append(slot)
         
+        table_occupancy_index.invalidate_shop(coffee_shop_id)
         return result
     
     def delete_time_slot(self, db: Session, time_slot_id: UUID) -> bool:
         """Delete time slot"""
-        return time_slot_repository.delete_time_slot(db, time_slot_id)
+        time_slot = time_slot_repository.get_time_slot(db, time_slot_id)
+        coffee_shop_id = time_slot.coffee_shop_id if time_slot else None
+        deleted = time_slot_repository.delete_time_slot(db, time_slot_id)
+        if deleted:
+            table_occupancy_index.invalidate_shop(coffee_shop_id)
+        return deleted
 
 operating_hours_service = OperatingHoursService()
 time_slot_service = TimeSlotService()
\ No newline at end of file
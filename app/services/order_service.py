@@ -2,8 +2,8 @@
 import uuid
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, desc, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import or_, and_, desc, func, insert
 
 from app.models.booking import BookingModel
 from app.models.order import (
@@ -16,59 +16,99 @@ from app.models.coffee import CoffeeMenuModel, CoffeeVariantModel, VariantModel,
 from app.models.order_status_history import OrderStatusHistoryModel
 from app.models.user import UserModel
 from app.schemas.order_schema import OrderCreate, OrderFilterParams
+from app.schemas.pagination_schema import CursorPage
+from app.utils.pagination import keyset_page
 
 
 class OrderService:
     def create_order(self, db: Session, order_data: OrderCreate, user_id: uuid.UUID):
         """Create a new order with order items and variants"""
-        # Calculate total price
+        # Muat semua kopi, varian dan pasangan kopi-varian yang valid dengan tiga query IN
+        coffee_ids = {item.coffee_id for item in order_data.order_items}
+        variant_ids = {
+            variant_data.variant_id
+            for item in order_data.order_items
+            for variant_data in item.variants
+        }
+
+        coffees = {
+            coffee.id: coffee
+            for coffee in db.query(CoffeeMenuModel).filter(CoffeeMenuModel.id.in_(coffee_ids)).all()
+        } if coffee_ids else {}
+        variants = {
+            variant.id: variant
+            for variant in db.query(VariantModel).filter(VariantModel.id.in_(variant_ids)).all()
+        } if variant_ids else {}
+        valid_coffee_variants = set(
+            db.query(CoffeeVariantModel.coffee_id, CoffeeVariantModel.variant_id).filter(
+                CoffeeVariantModel.coffee_id.in_(coffee_ids),
+                CoffeeVariantModel.variant_id.in_(variant_ids)
+            ).all()
+        ) if variant_ids else set()
+
+        # Satu order hanya untuk satu kedai; kedainya disimpan di orders.coffee_shop_id
+        coffee_shop_ids = {coffee.coffee_shop_id for coffee in coffees.values()}
+        if len(coffee_shop_ids) > 1:
+            raise ValueError("All items in an order must come from the same coffee shop")
+        coffee_shop_id = next(iter(coffee_shop_ids), None)
+
+        # Validasi dan hitung harga di memori
         total_price = 0
-        order_items_data = []
-        
-        # Process each order item
+        order_id = uuid.uuid4()
+        now = datetime.utcnow()
+        order_item_rows = []
+        order_item_variant_rows = []
+
         for item in order_data.order_items:
-            # Get coffee price
-            coffee = db.query(CoffeeMenuModel).filter_by(id=item.coffee_id).first()
+            coffee = coffees.get(item.coffee_id)
             if not coffee or not coffee.is_available:
                 raise ValueError(f"Coffee with ID {item.coffee_id} not available")
             
             item_price = coffee.price
+            order_item_id = uuid.uuid4()
             
-            # Get variant prices
-            variants_data = []
             for variant_data in item.variants:
-                variant = db.query(VariantModel).filter_by(id=variant_data.variant_id).first()
+                variant = variants.get(variant_data.variant_id)
                 if not variant or not variant.is_available:
                     raise ValueError(f"Variant with ID {variant_data.variant_id} not available")
                 
                 # Cek apakah varian ini terhubung dengan kopi
                 # Ini penting untuk mencegah user memilih varian yang tidak valid untuk kopi tsb
-                coffee_variant = db.query(CoffeeMenuModel).join(CoffeeMenuModel.coffee_variants)\
-                                .filter(CoffeeMenuModel.id == coffee.id, CoffeeVariantModel.variant_id == variant.id).first()
-                if not coffee_variant:
+                if (coffee.id, variant.id) not in valid_coffee_variants:
                     raise ValueError(f"Variant {variant.name} is not available for coffee {coffee.name}")
 
                 item_price += variant.additional_price
-                variants_data.append(variant_data)
+                order_item_variant_rows.append({
+                    "id": uuid.uuid4(),
+                    "order_item_id": order_item_id,
+                    "variant_id": variant.id,
+                    "created_at": now,
+                    "updated_at": now,
+                })
             
             # Calculate subtotal for this item
             subtotal = item_price * item.quantity
             total_price += subtotal
             
-            order_items_data.append({
+            order_item_rows.append({
+                "id": order_item_id,
+                "order_id": order_id,
                 "coffee_id": item.coffee_id,
                 "quantity": item.quantity,
                 "subtotal": subtotal,
-                "variants": variants_data
+                "created_at": now,
+                "updated_at": now,
             })
         
         # Create order
         order = OrderModel(
+            id=order_id,
             order_id=f"ORD-{uuid.uuid4().hex[:8].upper()}",
             user_id=user_id,
+            coffee_shop_id=coffee_shop_id,
             total_price=total_price,
             status=OrderStatus.PENDING,
-            ordered_at=datetime.utcnow(),
+            ordered_at=now,
             delivery_method=order_data.delivery_info.delivery_method,
             recipient_name=order_data.delivery_info.name, 
             recipient_phone_number=order_data.delivery_info.phone_number, 
@@ -77,26 +117,13 @@ class OrderService:
             # booking_id=order_data.booking_id # Ini harusnya di set di tempat lain jika booking_id ada
         )
         db.add(order)
-        db.flush() # Flush untuk mendapatkan order.id
+        db.flush() # Order harus ada sebelum item (foreign key)
 
-        # Buat order items
-        for item_data in order_items_data:
-            order_item = OrderItemModel(
-                order_id=order.id,
-                coffee_id=item_data["coffee_id"],
-                quantity=item_data["quantity"],
-                subtotal=item_data["subtotal"]
-            )
-            db.add(order_item)
-            db.flush() # Flush untuk mendapatkan order_item.id
-            
-            # Create order item variants
-            for variant_data in item_data["variants"]:
-                order_item_variant = OrderItemVariantModel(
-                    order_item_id=order_item.id,
-                    variant_id=variant_data.variant_id
-                )
-                db.add(order_item_variant)
+        # Bulk insert order items dan varian dengan UUID dari klien
+        if order_item_rows:
+            db.execute(insert(OrderItemModel), order_item_rows)
+        if order_item_variant_rows:
+            db.execute(insert(OrderItemVariantModel), order_item_variant_rows)
 
         if order_data.booking_id:
             booking = db.query(BookingModel).filter(BookingModel.id == order_data.booking_id).first()
@@ -120,7 +147,11 @@ class OrderService:
         return order
 
     def get_user_orders(self, db: Session, user_id: uuid.UUID, params: OrderFilterParams):
-        """Get all orders for a user with optional filtering"""
+        """
+        Get all orders for a user with optional filtering, most recent first.
+        With `params.cursor` set (empty for the first page) pages by keyset
+        instead of offset and returns a CursorPage.
+        """
         query = db.query(OrderModel).filter(
             or_(
                 OrderModel.user_id == user_id,  # Orders created by user
@@ -129,8 +160,8 @@ class OrderService:
         ).options(
             joinedload(OrderModel.user),
             joinedload(OrderModel.paid_by_user),
-            joinedload(OrderModel.order_items).joinedload(OrderItemModel.coffee),
-            joinedload(OrderModel.order_items).joinedload(OrderItemModel.variants).joinedload(OrderItemVariantModel.variant).joinedload(VariantModel.variant_type)
+            selectinload(OrderModel.order_items).joinedload(OrderItemModel.coffee),
+            selectinload(OrderModel.order_items).selectinload(OrderItemModel.variants).joinedload(OrderItemVariantModel.variant).joinedload(VariantModel.variant_type)
         )
         
         # Apply filters
@@ -148,13 +179,17 @@ class OrderService:
         if params.end_date:
             query = query.filter(OrderModel.ordered_at <= params.end_date)
         
-        # Sort by most recent first
-        query = query.order_by(desc(OrderModel.ordered_at))
-        
-        # Apply pagination
-        query = query.limit(params.limit).offset(params.offset)
-        
-        orders = query.all()
+        next_cursor = None
+        if params.cursor is not None:
+            orders, next_cursor = keyset_page(query, OrderModel.ordered_at, OrderModel.id, params.cursor, params.limit)
+        else:
+            # Sort by most recent first
+            query = query.order_by(desc(OrderModel.ordered_at), desc(OrderModel.id))
+            
+            # Apply pagination
+            query = query.limit(params.limit).offset(params.offset)
+            
+            orders = query.all()
         
         # Enrich with paid_by_user_name
         for order in orders:
@@ -172,6 +207,8 @@ class OrderService:
                     variant_item.variant_type = variant.variant_type.name
                     variant_item.additional_price = variant.additional_price
         
+        if params.cursor is not None:
+            return CursorPage(items=orders, next_cursor=next_cursor)
         return orders
 
     def get_payable_orders(
@@ -194,9 +231,7 @@ class OrderService:
         
         # Filter by coffee shop if specified
         if coffee_shop_id:
-            query = query.join(OrderItemModel).join(CoffeeMenuModel).filter(
-                CoffeeMenuModel.coffee_shop_id == coffee_shop_id
-            )
+            query = query.filter(OrderModel.coffee_shop_id == coffee_shop_id)
         
         # Sort by most recent first
         query = query.order_by(desc(OrderModel.ordered_at))
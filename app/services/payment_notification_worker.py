@@ -0,0 +1,214 @@
+"""
+Queue-backed processing of Midtrans webhook notifications
+"""
+import asyncio
+import logging
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Set
+from uuid import UUID, uuid4
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.payment_notification_event import NotificationEventStatus, PaymentNotificationEventModel
+from app.services.payment_service import payment_service
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentNotificationWorker:
+    """
+    The webhook route only verifies the signature and stores the raw event;
+    the (order_id, transaction_status, status_code) unique key drops duplicate
+    deliveries. Events are then applied by background lanes:
+
+    - an order always maps to the same lane, so its events run in arrival order
+    - the event row is locked (FOR UPDATE SKIP LOCKED) and marked PROCESSED in the
+      same transaction as the state transition, so it is applied exactly once
+      even with several app processes
+    - a sweeper re-queues PENDING events left behind (failed attempts, restarts,
+      events stored by another process), oldest first
+    """
+
+    def __init__(self, lanes: int, max_attempts: int, sweep_interval: float, retry_after: float):
+        self.lane_count = lanes
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self.retry_after = retry_after
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._queued: Set[UUID] = set()
+        self._lags: Deque[float] = deque(maxlen=1000)
+        self.counters = {"received": 0, "duplicates": 0, "processed": 0, "skipped": 0, "failed_attempts": 0, "failed": 0}
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queues = [asyncio.Queue() for _ in range(self.lane_count)]
+        self._tasks = [asyncio.create_task(self._run_lane(queue)) for queue in self._queues]
+        self._tasks.append(asyncio.create_task(self._run_sweeper()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queued.clear()
+
+    def ingest(self, db: Session, notification: Dict[str, Any]) -> Optional[UUID]:
+        """Store a verified notification; returns the new event id, None for a duplicate delivery"""
+        now = datetime.utcnow()
+        stmt = pg_insert(PaymentNotificationEventModel).values(
+            id=uuid4(),
+            order_id=notification["order_id"],
+            transaction_status=str(notification.get("transaction_status", "")),
+            status_code=str(notification.get("status_code", "")),
+            payload=notification,
+            status=NotificationEventStatus.PENDING,
+            attempts=0,
+            received_at=now,
+            created_at=now,
+            updated_at=now,
+        ).on_conflict_do_nothing(
+            constraint="uq_payment_notification_events_delivery"
+        ).returning(PaymentNotificationEventModel.id)
+
+        event_id = db.execute(stmt).scalar()
+        db.commit()
+
+        self.counters["received"] += 1
+        if event_id is None:
+            self.counters["duplicates"] += 1
+            logger.info("Duplicate Midtrans notification ignored: %s %s",
+                        notification.get("order_id"), notification.get("transaction_status"))
+        return event_id
+
+    def enqueue(self, event_id: UUID, order_id: str) -> None:
+        if not self._queues or event_id in self._queued:
+            return  # Not started (scripts); the sweeper of a running process picks it up
+        self._queued.add(event_id)
+        lane = zlib.crc32(order_id.encode()) % len(self._queues)
+        self._queues[lane].put_nowait(event_id)
+
+    def stats(self, db: Session) -> Dict[str, Any]:
+        pending_count, oldest_pending = db.query(
+            func.count(PaymentNotificationEventModel.id),
+            func.min(PaymentNotificationEventModel.received_at),
+        ).filter(PaymentNotificationEventModel.status == NotificationEventStatus.PENDING).one()
+
+        lags = sorted(self._lags)
+        return {
+            "queue_depth": sum(queue.qsize() for queue in self._queues),
+            "queue_depth_by_lane": [queue.qsize() for queue in self._queues],
+            "pending_events": pending_count,
+            "oldest_pending_age_seconds": (
+                round((datetime.utcnow() - oldest_pending).total_seconds(), 3) if oldest_pending else 0.0
+            ),
+            "processing_lag_seconds": {
+                "avg": round(sum(lags) / len(lags), 3) if lags else 0.0,
+                "p95": round(lags[max(int(len(lags) * 0.95) - 1, 0)], 3) if lags else 0.0,
+                "max": round(lags[-1], 3) if lags else 0.0,
+            },
+            **self.counters,
+        }
+
+    async def _run_lane(self, queue: asyncio.Queue) -> None:
+        while True:
+            event_id = await queue.get()
+            try:
+                await asyncio.to_thread(self._process_event, event_id)
+            except Exception as e:
+                logger.error("Payment notification worker error for event %s: %s", event_id, e)
+            finally:
+                self._queued.discard(event_id)
+                queue.task_done()
+
+    async def _run_sweeper(self) -> None:
+        while True:
+            try:
+                for event_id, order_id in await asyncio.to_thread(self._find_stale_events):
+                    self.enqueue(event_id, order_id)
+            except Exception as e:
+                logger.error("Payment notification sweeper error: %s", e)
+            await asyncio.sleep(self.sweep_interval)
+
+    def _find_stale_events(self) -> List[tuple]:
+        db = SessionLocal()
+        try:
+            return db.query(PaymentNotificationEventModel.id, PaymentNotificationEventModel.order_id).filter(
+                PaymentNotificationEventModel.status == NotificationEventStatus.PENDING,
+                PaymentNotificationEventModel.updated_at <= datetime.utcnow() - timedelta(seconds=self.retry_after),
+            ).order_by(PaymentNotificationEventModel.received_at).limit(500).all()
+        finally:
+            db.close()
+
+    def _process_event(self, event_id: UUID) -> None:
+        db = SessionLocal()
+        try:
+            event = db.query(PaymentNotificationEventModel).filter(
+                PaymentNotificationEventModel.id == event_id,
+                PaymentNotificationEventModel.status == NotificationEventStatus.PENDING,
+            ).with_for_update(skip_locked=True).first()
+            if not event:
+                return  # Already handled, or being handled by another process
+
+            # Keep per-order ordering: an older pending event (e.g. a failed attempt) goes first
+            earlier_pending = db.query(PaymentNotificationEventModel.id).filter(
+                PaymentNotificationEventModel.order_id == event.order_id,
+                PaymentNotificationEventModel.status == NotificationEventStatus.PENDING,
+                PaymentNotificationEventModel.received_at < event.received_at,
+            ).first()
+            if earlier_pending:
+                db.rollback()
+                return  # The sweeper replays this order's events oldest first
+
+            try:
+                applied = payment_service.apply_notification(db, event.payload)
+            except Exception as e:
+                db.rollback()
+                self._record_failure(db, event_id, e)
+                return
+
+            now = datetime.utcnow()
+            event.status = NotificationEventStatus.PROCESSED if applied else NotificationEventStatus.SKIPPED
+            event.attempts += 1
+            event.processed_at = now
+            received_at = event.received_at
+            db.commit()
+
+            self.counters["processed" if applied else "skipped"] += 1
+            self._lags.append((now - received_at).total_seconds())
+        finally:
+            db.close()
+
+    def _record_failure(self, db: Session, event_id: UUID, error: Exception) -> None:
+        event = db.query(PaymentNotificationEventModel).filter(
+            PaymentNotificationEventModel.id == event_id
+        ).with_for_update().first()
+        if not event:
+            return
+
+        event.attempts += 1
+        event.last_error = str(error)[:2000]
+        if event.attempts >= self.max_attempts:
+            event.status = NotificationEventStatus.FAILED
+            self.counters["failed"] += 1
+            logger.error("Payment notification %s %s failed permanently: %s", event.order_id, event.transaction_status, error)
+        else:
+            self.counters["failed_attempts"] += 1
+            logger.warning("Payment notification %s %s attempt %d failed: %s",
+                           event.order_id, event.transaction_status, event.attempts, error)
+        db.commit()
+
+
+payment_notification_worker = PaymentNotificationWorker(
+    lanes=settings.PAYMENT_NOTIFICATION_WORKER_LANES,
+    max_attempts=settings.PAYMENT_NOTIFICATION_MAX_ATTEMPTS,
+    sweep_interval=settings.PAYMENT_NOTIFICATION_SWEEP_INTERVAL_SECONDS,
+    retry_after=settings.PAYMENT_NOTIFICATION_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,207 @@
+"""
+Background reconciliation of PENDING payments with the Midtrans status API
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.order import OrderModel, StatusType, TransactionModel
+from app.services.midtrans_client import MidtransError, midtrans_client
+from app.services.sales_rollup_service import sales_rollup_service
+
+logger = logging.getLogger(__name__)
+
+class PaymentReconciler:
+    """
+    Every tick, claims the PENDING transactions whose next_check_at has
+    passed, polls Midtrans with bounded concurrency (no transaction open) and
+    applies each answer in a short transaction of its own, so webhook
+    processing never waits on a poll. Several processes can run it; claimed
+    rows are skipped by the others.
+
+    The poll interval adapts to the age of the transaction: `base_interval`
+    during its first `ramp` seconds, doubling every `ramp` seconds after that,
+    capped at `max_interval`; it is stored as next_check_at, so due rows are
+    selected in SQL. Expired transactions are polled for another
+    `expiry_grace` so Midtrans' final "expire" is still picked up.
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float,
+        base_interval: float,
+        max_interval: float,
+        ramp: float,
+        expiry_grace: float,
+        batch_size: int,
+        concurrency: int,
+    ):
+        self.tick_seconds = tick_seconds
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.ramp = ramp
+        self.expiry_grace = expiry_grace
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"ticks": 0, "polled": 0, "updated": 0, "errors": 0, "last_tick_at": None}
+
+    def poll_interval(self, transaction: TransactionModel, now: datetime) -> int:
+        age = max((now - transaction.transaction_time).total_seconds(), 0)
+        return int(min(self.max_interval, self.base_interval * 2 ** int(age // self.ramp)))
+
+    def staleness_bound(self, transaction: TransactionModel, now: datetime) -> Optional[int]:
+        """How old a served PENDING status can be; None when the reconciler is not running here"""
+        if self._task is None:
+            return None
+        return self.poll_interval(transaction, now) + int(self.tick_seconds)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Payment reconciler tick failed: %s", e)
+            await asyncio.sleep(self.tick_seconds)
+
+    async def run_once(self) -> int:
+        """One reconciliation pass, returns the number of transactions that changed"""
+        due = await asyncio.to_thread(self._claim_due)
+        if not due:
+            return 0
+
+        # No transaction is open while Midtrans is polled
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def poll(midtrans_order_id: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await midtrans_client.get_status(midtrans_order_id)
+                except MidtransError as e:
+                    self.stats["errors"] += 1
+                    logger.warning("Reconciler status poll failed for %s: %s", midtrans_order_id, e)
+                    return None
+
+        results = await asyncio.gather(*(poll(midtrans_order_id) for _, midtrans_order_id in due))
+        return await asyncio.to_thread(self._apply_results, due, results)
+
+    def _claim_due(self) -> List[Tuple[UUID, str]]:
+        """
+        Picks the PENDING transactions whose next_check_at has passed and
+        pushes it back by `base_interval` in one short transaction. That lease
+        keeps other processes (and the next tick) off them while they are
+        polled, and is also the retry delay when a poll fails.
+        """
+        from app.services.payment_service import payment_service
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            self.stats["ticks"] += 1
+            self.stats["last_tick_at"] = now
+
+            rows = db.query(TransactionModel.id, OrderModel)\
+                .join(OrderModel, TransactionModel.order_id == OrderModel.id)\
+                .filter(
+                    TransactionModel.status == StatusType.PENDING,
+                    or_(
+                        TransactionModel.expiry_time.is_(None),
+                        TransactionModel.expiry_time > now - timedelta(seconds=self.expiry_grace),
+                    ),
+                    or_(TransactionModel.next_check_at.is_(None), TransactionModel.next_check_at <= now),
+                )\
+                .order_by(TransactionModel.next_check_at.asc().nullsfirst())\
+                .limit(self.batch_size)\
+                .with_for_update(of=TransactionModel, skip_locked=True)\
+                .all()
+            if not rows:
+                return []
+
+            due = [(transaction_id, payment_service.midtrans_order_id(order)) for transaction_id, order in rows]
+            db.execute(
+                update(TransactionModel)
+                .where(TransactionModel.id.in_([transaction_id for transaction_id, _ in due]))
+                .values(next_check_at=now + timedelta(seconds=self.base_interval)),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+            return due
+        finally:
+            db.close()
+
+    def _apply_results(self, due: List[Tuple[UUID, str]], results: List[Optional[Dict[str, Any]]]) -> int:
+        """Applies each answer in its own short transaction, re-locking the row first"""
+        db = SessionLocal()
+        polled = updated = 0
+        try:
+            for (transaction_id, _), payment_data in zip(due, results):
+                if payment_data is None:
+                    continue
+                polled += 1
+                if self._apply_result(db, transaction_id, payment_data):
+                    updated += 1
+        finally:
+            db.close()
+
+        self.stats["polled"] += polled
+        self.stats["updated"] += updated
+        if updated:
+            logger.info("Payment reconciler updated %s of %s polled transactions", updated, polled)
+        return updated
+
+    def _apply_result(self, db: Session, transaction_id: UUID, payment_data: Dict[str, Any]) -> bool:
+        from app.services.payment_service import payment_service
+
+        now = datetime.utcnow()
+        try:
+            transaction = db.query(TransactionModel)\
+                .filter(TransactionModel.id == transaction_id)\
+                .with_for_update()\
+                .first()
+            if transaction is None or transaction.status != StatusType.PENDING:
+                db.rollback()
+                return False  # Settled by a webhook while it was being polled
+
+            order = db.query(OrderModel)\
+                .options(joinedload(OrderModel.user), joinedload(OrderModel.paid_by_user))\
+                .filter(OrderModel.id == transaction.order_id)\
+                .first()
+            old_status = payment_service.apply_gateway_status(db, order, transaction, payment_data, order.paid_by_user)
+            transaction.status_checked_at = now
+            transaction.next_check_at = now + timedelta(seconds=self.poll_interval(transaction, now))
+            changed = old_status != order.status
+            if changed:
+                sales_rollup_service.sync_order_status_changes(db, [(order, old_status)])
+            db.commit()
+            return changed
+        except Exception:
+            db.rollback()
+            raise
+
+
+payment_reconciler = PaymentReconciler(
+    tick_seconds=settings.PAYMENT_RECONCILER_TICK_SECONDS,
+    base_interval=settings.PAYMENT_RECONCILER_BASE_INTERVAL_SECONDS,
+    max_interval=settings.PAYMENT_RECONCILER_MAX_INTERVAL_SECONDS,
+    ramp=settings.PAYMENT_RECONCILER_RAMP_SECONDS,
+    expiry_grace=settings.PAYMENT_RECONCILER_EXPIRY_GRACE_SECONDS,
+    batch_size=settings.PAYMENT_RECONCILER_BATCH_SIZE,
+    concurrency=settings.PAYMENT_RECONCILER_CONCURRENCY,
+)
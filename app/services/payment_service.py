@@ -4,7 +4,6 @@ Enhanced payment service for handling Midtrans integration with pay for others f
 import uuid
 import json
 import hashlib
-import requests
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
@@ -16,6 +15,9 @@ from app.models.order import OrderModel, OrderStatus, TransactionModel, StatusTy
 from app.models.order_status_history import OrderStatusHistoryModel
 from app.models.user import UserModel
 from app.models.notification import NotificationModel
+from app.services.midtrans_client import MidtransError, midtrans_client
+from app.services.payment_reconciler import payment_reconciler
+from app.services.sales_rollup_service import sales_rollup_service
 from app.schemas.payment_schema import (
     PaymentRequest, 
     PaymentResponse, 
@@ -30,18 +32,8 @@ logger = logging.getLogger(__name__)
 
 class PaymentService:
     def __init__(self):
-        self.api_base_url = "https://api.sandbox.midtrans.com" if settings.MIDTRANS_SANDBOX else "https://api.midtrans.com"
         self.client_key = settings.MIDTRANS_CLIENT_KEY
         self.server_key = settings.MIDTRANS_SERVER_KEY
-        
-    def _get_auth_header(self):
-        """Get authorization header for Midtrans API"""
-        import base64
-        auth_string = f"{self.server_key}:"
-        auth_bytes = auth_string.encode("ascii")
-        base64_bytes = base64.b64encode(auth_bytes)
-        base64_auth = base64_bytes.decode("ascii")
-        return {"Authorization": f"Basic {base64_auth}"}
     
     def _process_midtrans_response_data(
         self, 
@@ -139,7 +131,7 @@ class PaymentService:
             "can_be_paid_by_others": can_be_paid_by_others
         }
     
-    def pay_for_others(self, db: Session, payment_data: PayForOthersRequest, payer_user_id: uuid.UUID):
+    async def pay_for_others(self, db: Session, payment_data: PayForOthersRequest, payer_user_id: uuid.UUID):
         """Create a payment transaction for someone else's order"""
         # Get the order
         order = db.query(OrderModel).filter(
@@ -211,35 +203,25 @@ class PaymentService:
 
         # Handle different payment methods
         payment_type = payment_data.payment_method
-        if payment_type == "credit_card":
-            endpoint = f"{self.api_base_url}/v2/token"
-        elif payment_type == "bank_transfer":
-            endpoint = f"{self.api_base_url}/v2/charge"
+        if payment_type == "bank_transfer":
             payload["payment_type"] = "bank_transfer"
             payload["bank_transfer"] = {
                 "bank": "bca"
             }
-        else:
-            endpoint = f"{self.api_base_url}/v2/charge"
+        elif payment_type != "credit_card":
             payload["payment_type"] = payment_type
 
-        # Make request to Midtrans API
-        headers = self._get_auth_header()
-        headers["Content-Type"] = "application/json"
-
         midtrans_response = {}
         response_data = {}
 
         try:
-            response = requests.post(
-                endpoint,
-                headers=headers,
-                data=json.dumps(payload)
-            )
-            response.raise_for_status()
-            midtrans_response = response.json()
+            # Make request to Midtrans API
+            if payment_type == "credit_card":
+                midtrans_response = await midtrans_client.create_token(payload)
+            else:
+                midtrans_response = await midtrans_client.charge(payload)
 
-            logger.info(f"Pay for others payment request created: {midtrans_response}")
+            logger.info("Pay for others payment request created: %s", midtrans_response)
 
             # Pindahkan panggilan _process_midtrans_response_data ke sini
             response_data = self._process_midtrans_response_data(
@@ -255,8 +237,8 @@ class PaymentService:
                 note=payment_data.note
             )
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Payment gateway error: {str(e)}")
+        except MidtransError as e:
+            logger.error("Payment gateway error: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Payment gateway error: {str(e)}"
@@ -310,7 +292,7 @@ class PaymentService:
         return PayForOthersResponse(**response_data)
 
 
-    def create_payment(self, db: Session, payment_data: PaymentRequest, user_id: uuid.UUID):
+    async def create_payment(self, db: Session, payment_data: PaymentRequest, user_id: uuid.UUID):
         """Create a payment transaction for an order with Midtrans"""
         # Get the order
         order = db.query(OrderModel).filter(
@@ -365,35 +347,25 @@ class PaymentService:
 
         # Handle different payment methods
         payment_type = payment_data.payment_method
-        if payment_type == "credit_card":
-            endpoint = f"{self.api_base_url}/v2/token"
-        elif payment_type == "bank_transfer":
-            endpoint = f"{self.api_base_url}/v2/charge"
+        if payment_type == "bank_transfer":
             payload["payment_type"] = "bank_transfer"
             payload["bank_transfer"] = {
                 "bank": "bca"
             }
-        else:
-            endpoint = f"{self.api_base_url}/v2/charge"
+        elif payment_type != "credit_card":
             payload["payment_type"] = payment_type
 
-        # Make request to Midtrans API
-        headers = self._get_auth_header()
-        headers["Content-Type"] = "application/json"
-
         midtrans_response = {}
         response_data = {}
 
         try:
-            response = requests.post(
-                endpoint,
-                headers=headers,
-                data=json.dumps(payload)
-            )
-            response.raise_for_status()
-            midtrans_response = response.json()
+            # Make request to Midtrans API
+            if payment_type == "credit_card":
+                midtrans_response = await midtrans_client.create_token(payload)
+            else:
+                midtrans_response = await midtrans_client.charge(payload)
 
-            logger.info(f"Payment request created: {midtrans_response}")
+            logger.info("Payment request created: %s", midtrans_response)
 
             # Pindahkan panggilan _process_midtrans_response_data ke sini
             response_data = self._process_midtrans_response_data(
@@ -405,8 +377,8 @@ class PaymentService:
                 expiry_time=expiry_time # Gunakan variabel yang sudah didefinisikan
             )
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Payment gateway error: {str(e)}")
+        except MidtransError as e:
+            logger.error("Payment gateway error: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Payment gateway error: {str(e)}"
@@ -445,8 +417,114 @@ class PaymentService:
         # Prepare response using the helper - ini sudah dipindahkan ke atas
         return PaymentResponse(**response_data)
     
+    def midtrans_order_id(self, order: OrderModel) -> str:
+        """Order id used at Midtrans (pay-for-others payments carry a -PFO- suffix)"""
+        if order.paid_by_user_id and order.paid_by_user_id != order.user_id:
+            return f"{order.order_id}-PFO-{order.paid_by_user_id.hex[:8]}"
+        return order.order_id
+
+    def apply_gateway_status(
+        self,
+        db: Session,
+        order: OrderModel,
+        transaction: TransactionModel,
+        payment_data: Dict[str, Any],
+        paid_by_user: Optional[UserModel],
+        changed_by_user_id: Optional[uuid.UUID] = None
+    ) -> OrderStatus:
+        """
+        Apply a Midtrans status API answer to a PENDING transaction and its order,
+        with notifications and status history. Does not commit; returns the
+        previous order status so callers can sync the sales rollup.
+        """
+        old_order_status = order.status # Capture old status before change
+        
+        if payment_data.get("transaction_status") == "settlement":
+            transaction.status = StatusType.SUCCESS
+            transaction.payment_time = datetime.now()
+            order.status = OrderStatus.CONFIRMED # Status baru: CONFIRMED
+            order.paid_at = datetime.utcnow()
+
+            # Create notifications for successful payment
+            if order.paid_by_user_id != order.user_id:
+                notification_original = NotificationModel(
+                    type="payment_success",
+                    message=f"Your order {order.order_id} has been paid successfully by {paid_by_user.name if paid_by_user else 'someone'}.",
+                    is_read=False,
+                    user_id=order.user_id
+                )
+                db.add(notification_original)
+
+                notification_payer = NotificationModel(
+                    type="payment_success",
+                    message=f"Payment for order {order.order_id} (for {order.user.name}) has been completed successfully.",
+                    is_read=False,
+                    user_id=order.paid_by_user_id
+                )
+                db.add(notification_payer)
+            else:
+                notification = NotificationModel(
+                    type="payment_success",
+                    message=f"Payment for order {order.order_id} has been completed successfully.",
+                    is_read=False,
+                    user_id=order.user_id
+                )
+                db.add(notification)
+
+        elif payment_data.get("transaction_status") in ["expire", "cancel", "deny"]:
+            transaction.status = StatusType.FAILED
+            order.status = OrderStatus.CANCELLED # Status baru: CANCELLED
+            user_who_was_paying_id = order.paid_by_user_id
+            order.paid_by_user_id = None
+
+            # Create notifications for failed payment
+            if user_who_was_paying_id and user_who_was_paying_id != order.user_id:
+                notification_original = NotificationModel(
+                    type="payment_failed",
+                    message=f"Payment for your order {order.order_id} has failed or been cancelled. The order is now available for payment again.",
+                    is_read=False,
+                    user_id=order.user_id
+                )
+                db.add(notification_original)
+
+                notification_payer = NotificationModel(
+                    type="payment_failed",
+                    message=f"Payment for order {order.order_id} (for {order.user.name}) has failed or been cancelled.",
+                    is_read=False,
+                    user_id=user_who_was_paying_id
+                )
+                db.add(notification_payer)
+            else:
+                notification = NotificationModel(
+                    type="payment_failed",
+                    message=f"Payment for order {order.order_id} has failed or been cancelled.",
+                    is_read=False,
+                    user_id=order.user_id
+                )
+                db.add(notification)
+
+        # --- ADD HISTORY RECORD FOR THIS STATUS CHANGE ---
+        if old_order_status != order.status:
+            status_history_entry = OrderStatusHistoryModel(
+                order_id=order.id,
+                old_status=old_order_status,
+                new_status=order.status,
+                changed_by_user_id=changed_by_user_id, # User who initiated check, None for the reconciler
+                notes=f"Status updated via payment check. Midtrans: {payment_data.get('transaction_status')}",
+                changed_at=datetime.utcnow()
+            )
+            db.add(status_history_entry)
+        # --- END ADD HISTORY ---
+
+        return old_order_status
+
     def check_payment_status(self, db: Session, order_id: uuid.UUID, user_id: uuid.UUID):
-        """Check the status of a payment for an order and update history"""
+        """
+        Payment status of an order, served from the database.
+        PENDING transactions are kept in sync by the payment reconciler; the
+        response reports when Midtrans was last asked (last_checked_at) and
+        the staleness bound for this transaction (max_staleness_seconds).
+        """
         order = db.query(OrderModel).filter(
             OrderModel.id == order_id
         ).filter(
@@ -469,112 +547,9 @@ class PaymentService:
                 UserModel.id == order.paid_by_user_id
             ).first()
 
-        old_order_status = order.status # Capture old status before change
-
+        max_staleness_seconds = None
         if transaction.status == StatusType.PENDING:
-            try:
-                check_order_id = order.order_id
-                if order.paid_by_user_id and order.paid_by_user_id != order.user_id:
-                    check_order_id = f"{order.order_id}-PFO-{order.paid_by_user_id.hex[:8]}"
-
-                endpoint = f"{self.api_base_url}/v2/{check_order_id}/status"
-                headers = self._get_auth_header()
-
-                response = requests.get(endpoint, headers=headers)
-                response.raise_for_status()
-
-                payment_data = response.json()
-                logger.info(f"Payment status check: {payment_data}")
-
-                if payment_data.get("transaction_status") == "settlement":
-                    transaction.status = StatusType.SUCCESS
-                    transaction.payment_time = datetime.now()
-                    order.status = OrderStatus.CONFIRMED # Status baru: CONFIRMED
-                    order.paid_at = datetime.utcnow()
-
-                    # Create notifications for successful payment
-                    if order.paid_by_user_id != order.user_id:
-                        notification_original = NotificationModel(
-                            type="payment_success",
-                            message=f"Your order {order.order_id} has been paid successfully by {paid_by_user.name if paid_by_user else 'someone'}.",
-                            is_read=False,
-                            user_id=order.user_id
-                        )
-                        db.add(notification_original)
-
-                        notification_payer = NotificationModel(
-                            type="payment_success",
-                            message=f"Payment for order {order.order_id} (for {order.user.name}) has been completed successfully.",
-                            is_read=False,
-                            user_id=order.paid_by_user_id
-                        )
-                        db.add(notification_payer)
-                    else:
-                        notification = NotificationModel(
-                            type="payment_success",
-                            message=f"Payment for order {order.order_id} has been completed successfully.",
-                            is_read=False,
-                            user_id=order.user_id
-                        )
-                        db.add(notification)
-
-                elif payment_data.get("transaction_status") in ["expire", "cancel", "deny"]:
-                    transaction.status = StatusType.FAILED
-                    order.status = OrderStatus.CANCELLED # Status baru: CANCELLED
-                    user_who_was_paying_id = order.paid_by_user_id
-                    order.paid_by_user_id = None
-
-                    # Create notifications for failed payment
-                    if user_who_was_paying_id and user_who_was_paying_id != order.user_id:
-                        notification_original = NotificationModel(
-                            type="payment_failed",
-                            message=f"Payment for your order {order.order_id} has failed or been cancelled. The order is now available for payment again.",
-                            is_read=False,
-                            user_id=order.user_id
-                        )
-                        db.add(notification_original)
-
-                        notification_payer = NotificationModel(
-                            type="payment_failed",
-                            message=f"Payment for order {order.order_id} (for {order.user.name}) has failed or been cancelled.",
-                            is_read=False,
-                            user_id=user_who_was_paying_id
-                        )
-                        db.add(notification_payer)
-                    else:
-                        notification = NotificationModel(
-                            type="payment_failed",
-                            message=f"Payment for order {order.order_id} has failed or been cancelled.",
-                            is_read=False,
-                            user_id=order.user_id
-                        )
-                        db.add(notification)
-
-                # --- ADD HISTORY RECORD FOR THIS STATUS CHANGE ---
-                if old_order_status != order.status:
-                    status_history_entry = OrderStatusHistoryModel(
-                        order_id=order.id,
-                        old_status=old_order_status,
-                        new_status=order.status,
-                        changed_by_user_id=user_id, # User who initiated check (or system)
-                        notes=f"Status updated via payment check. Midtrans: {payment_data.get('transaction_status')}",
-                        changed_at=datetime.utcnow()
-                    )
-                    db.add(status_history_entry)
-                # --- END ADD HISTORY ---
-
-                db.commit()
-                db.refresh(transaction)
-                db.refresh(order) # Refresh order to ensure history is loaded
-
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error checking payment status: {str(e)}")
-                db.rollback()
-                pass
-            except Exception as e:
-                logger.error(f"Error processing payment status update for order {order_id}: {str(e)}")
-                db.rollback()
-                pass
+            max_staleness_seconds = payment_reconciler.staleness_bound(transaction, datetime.utcnow())
 
         return {
             "order_id": order.id,
@@ -586,6 +561,8 @@ class PaymentService:
             "payment_time": transaction.payment_time,
             "paid_by_user_id": order.paid_by_user_id,
             "paid_by_user_name": paid_by_user.name if paid_by_user else None,
+            "last_checked_at": transaction.status_checked_at,
+            "max_staleness_seconds": max_staleness_seconds,
         } 
     
     def _verify_notification_signature(self, notification: Dict[str, Any]) -> bool:
@@ -609,181 +586,197 @@ class PaymentService:
         # Compare with received signature
         return signature_key == expected_signature
     
-    def process_notification(self, db: Session, notification: Dict[str, Any]):
+    def verify_notification(self, notification: Dict[str, Any]) -> None:
+        """Reject notifications with a bad signature or without order_id (raises ValueError)"""
+        if not settings.MIDTRANS_SANDBOX:
+            is_valid_signature = self._verify_notification_signature(notification)
+            if not is_valid_signature:
+                logger.warning("Invalid notification signature received")
+                raise ValueError("Invalid signature")
+
+        if not notification.get("order_id"):
+            raise ValueError("Missing order_id in notification")
+
+    def apply_notification(self, db: Session, notification: Dict[str, Any]) -> bool:
         """
-        Process payment notification webhook from Midtrans
-        Enhanced to handle pay-for-others transactions and update history
+        Apply the state transition of a verified Midtrans notification without committing.
+        Returns False when there was nothing to apply (transaction already final).
+        Handles pay-for-others transactions and records order status history.
         """
-        try:
-            logger.info(f"Received payment notification: {notification}")
+        order_id = notification.get("order_id")
+        original_order_id = order_id
+        is_pay_for_others = "-PFO-" in order_id
+        if is_pay_for_others:
+            original_order_id = order_id.split("-PFO-")[0]
 
-            if not settings.MIDTRANS_SANDBOX:
-                is_valid_signature = self._verify_notification_signature(notification)
-                if not is_valid_signature:
-                    logger.warning("Invalid notification signature received")
-                    raise ValueError("Invalid signature")
+        order = db.query(OrderModel).filter(
+            OrderModel.order_id == original_order_id
+        ).first()
+
+        if not order:
+            logger.error("Order with ID %s not found", original_order_id)
+            raise ValueError(f"Order with ID {original_order_id} not found")
 
-            order_id = notification.get("order_id")
-            if not order_id:
-                raise ValueError("Missing order_id in notification")
+        # Row lock: the payment reconciler may be applying a status poll for the same transaction
+        transaction = db.query(TransactionModel).filter(
+            TransactionModel.order_id == order.id
+        ).order_by(TransactionModel.created_at.desc()).with_for_update().first()
+
+        if not transaction:
+            logger.error("No transaction found for order %s", original_order_id)
+            raise ValueError(f"No transaction found for order {original_order_id}")
 
-            original_order_id = order_id
-            is_pay_for_others = "-PFO-" in order_id
-            if is_pay_for_others:
-                original_order_id = order_id.split("-PFO-")[0]
+        # A final transaction is never moved again (late retries, webhook after a status poll)
+        if transaction.status != StatusType.PENDING:
+            logger.info("Transaction for order %s already %s, notification skipped", original_order_id, transaction.status.value)
+            return False
 
-            order = db.query(OrderModel).filter(
-                OrderModel.order_id == original_order_id
+        transaction_status = notification.get("transaction_status")
+        logger.info("Processing transaction status: %s for order %s", transaction_status, original_order_id)
+
+        payer_user = None
+        if order.paid_by_user_id:
+            payer_user = db.query(UserModel).filter(
+                UserModel.id == order.paid_by_user_id
             ).first()
 
-            if not order:
-                logger.error(f"Order with ID {original_order_id} not found")
-                raise ValueError(f"Order with ID {original_order_id} not found")
-
-            transaction = db.query(TransactionModel).filter(
-                TransactionModel.order_id == order.id
-            ).order_by(TransactionModel.created_at.desc()).first()
-
-            if not transaction:
-                logger.error(f"No transaction found for order {original_order_id}")
-                raise ValueError(f"No transaction found for order {original_order_id}")
-
-            transaction_status = notification.get("transaction_status")
-            logger.info(f"Processing transaction status: {transaction_status} for order {original_order_id}")
-
-            payer_user = None
-            if order.paid_by_user_id:
-                payer_user = db.query(UserModel).filter(
-                    UserModel.id == order.paid_by_user_id
-                ).first()
-
-            old_order_status = order.status # Capture old status before change
-
-            if transaction_status in ["settlement", "capture"]:
-                transaction.status = StatusType.SUCCESS
-                transaction.payment_time = datetime.now()
-                order.status = OrderStatus.CONFIRMED # Set to CONFIRMED
-                order.paid_at = datetime.utcnow()
-
-                # Create notifications
-                if is_pay_for_others and payer_user and order.paid_by_user_id != order.user_id:
-                    user_notification_original = NotificationModel(
-                        type="payment_success",
-                        message=f"Your order {order.order_id} has been paid successfully by {payer_user.name}. Thank you!",
-                        is_read=False,
-                        user_id=order.user_id
-                    )
-                    db.add(user_notification_original)
-
-                    user_notification_payer = NotificationModel(
-                        type="payment_success",
-                        message=f"Payment for order {order.order_id} (for {order.user.name}) has been completed successfully. Thank you for your kindness!",
-                        is_read=False,
-                        user_id=order.paid_by_user_id
-                    )
-                    db.add(user_notification_payer)
-                else:
-                    user_notification = NotificationModel(
-                        type="payment_success",
-                        message=f"Your payment for order {order.order_id} has been completed successfully.",
-                        is_read=False,
-                        user_id=order.user_id
-                    )
-                    db.add(user_notification)
-                logger.info(f"Payment successful for order {original_order_id}")
-
-            elif transaction_status == "pending":
-                logger.info(f"Payment pending for order {original_order_id}")
-                # No change to order.status here as it should be PROCESSING from create_payment
-
-            elif transaction_status in ["expire", "cancel", "deny"]:
-                transaction.status = StatusType.FAILED
-                order.status = OrderStatus.CANCELLED # Set to CANCELLED
-
-                paid_by_user_id = order.paid_by_user_id
-                order.paid_by_user_id = None
-
-                # Create notifications
-                if is_pay_for_others and payer_user and paid_by_user_id != order.user_id:
-                    user_notification_original = NotificationModel(
-                        type="payment_failed",
-                        message=f"Payment for your order {order.order_id} has failed or been cancelled. The order is now available for payment again.",
-                        is_read=False,
-                        user_id=order.user_id
-                    )
-                    db.add(user_notification_original)
-
-                    user_notification_payer = NotificationModel(
-                        type="payment_failed",
-                        message=f"Payment for order {order.order_id} (for {order.user.name}) has failed or been cancelled.",
-                        is_read=False,
-                        user_id=paid_by_user_id
-                    )
-                    db.add(user_notification_payer)
-                else:
-                    user_notification = NotificationModel(
-                        type="payment_failed",
-                        message=f"Your payment for order {order.order_id} has failed or been cancelled.",
-                        is_read=False,
-                        user_id=order.user_id
-                    )
-                    db.add(user_notification)
-                logger.info(f"Payment failed for order {original_order_id}: {transaction_status}")
-
-            # --- ADD HISTORY RECORD FOR THIS STATUS CHANGE ---
-            if old_order_status != order.status:
-                status_history_entry = OrderStatusHistoryModel(
-                    order_id=order.id,
-                    old_status=old_order_status,
-                    new_status=order.status,
-                    changed_by_user_id=None, # Changed by system (webhook)
-                    notes=f"Status updated via Midtrans webhook: {transaction_status}.",
-                    changed_at=datetime.utcnow()
+        old_order_status = order.status # Capture old status before change
+
+        if transaction_status in ["settlement", "capture"]:
+            transaction.status = StatusType.SUCCESS
+            transaction.payment_time = datetime.now()
+            order.status = OrderStatus.CONFIRMED # Set to CONFIRMED
+            order.paid_at = datetime.utcnow()
+
+            # Create notifications
+            if is_pay_for_others and payer_user and order.paid_by_user_id != order.user_id:
+                user_notification_original = NotificationModel(
+                    type="payment_success",
+                    message=f"Your order {order.order_id} has been paid successfully by {payer_user.name}. Thank you!",
+                    is_read=False,
+                    user_id=order.user_id
                 )
-                db.add(status_history_entry)
-            # --- END ADD HISTORY ---
-
-            # Save additional payment details if available
-            payment_details = {}
-            payment_type = notification.get("payment_type")
-            if payment_type:
-                payment_details["payment_type"] = payment_type
-
-                if payment_type == "bank_transfer":
-                    if "va_numbers" in notification:
-                        payment_details["va_numbers"] = notification["va_numbers"]
-                elif payment_type == "credit_card":
-                    if "masked_card" in notification:
-                        payment_details["masked_card"] = notification["masked_card"]
-                elif payment_type == "gopay":
-                    if "actions" in notification:
-                        payment_details["actions"] = notification["actions"]
-                        for action in notification["actions"]:
-                            if action.get("name") == "generate_qr_code" and action.get("url"):
-                                payment_details["qr_code_url"] = action.get("url")
-                                break
-
-            if is_pay_for_others:
-                payment_details["is_pay_for_others"] = True
-                if payer_user:
-                    payment_details["paid_by_user_name"] = payer_user.name
-                    payment_details["paid_by_user_email"] = payer_user.email
-
-            if payment_details:
-                existing_note = order.payment_note or ""
-                payment_details_json = json.dumps(payment_details)
-                order.payment_note = f"{existing_note}\nPayment Details: {payment_details_json}" if existing_note else f"Payment Details: {payment_details_json}"
+                db.add(user_notification_original)
 
-            db.commit()
-            db.refresh(order)
-            db.refresh(transaction)
+                user_notification_payer = NotificationModel(
+                    type="payment_success",
+                    message=f"Payment for order {order.order_id} (for {order.user.name}) has been completed successfully. Thank you for your kindness!",
+                    is_read=False,
+                    user_id=order.paid_by_user_id
+                )
+                db.add(user_notification_payer)
+            else:
+                user_notification = NotificationModel(
+                    type="payment_success",
+                    message=f"Your payment for order {order.order_id} has been completed successfully.",
+                    is_read=False,
+                    user_id=order.user_id
+                )
+                db.add(user_notification)
+            logger.info("Payment successful for order %s", original_order_id)
+
+        elif transaction_status == "pending":
+            logger.info("Payment pending for order %s", original_order_id)
+            # No change to order.status here as it should be PROCESSING from create_payment
+
+        elif transaction_status in ["expire", "cancel", "deny"]:
+            transaction.status = StatusType.FAILED
+            order.status = OrderStatus.CANCELLED # Set to CANCELLED
+
+            paid_by_user_id = order.paid_by_user_id
+            order.paid_by_user_id = None
+
+            # Create notifications
+            if is_pay_for_others and payer_user and paid_by_user_id != order.user_id:
+                user_notification_original = NotificationModel(
+                    type="payment_failed",
+                    message=f"Payment for your order {order.order_id} has failed or been cancelled. The order is now available for payment again.",
+                    is_read=False,
+                    user_id=order.user_id
+                )
+                db.add(user_notification_original)
+
+                user_notification_payer = NotificationModel(
+                    type="payment_failed",
+                    message=f"Payment for order {order.order_id} (for {order.user.name}) has failed or been cancelled.",
+                    is_read=False,
+                    user_id=paid_by_user_id
+                )
+                db.add(user_notification_payer)
+            else:
+                user_notification = NotificationModel(
+                    type="payment_failed",
+                    message=f"Your payment for order {order.order_id} has failed or been cancelled.",
+                    is_read=False,
+                    user_id=order.user_id
+                )
+                db.add(user_notification)
+            logger.info("Payment failed for order %s: %s", original_order_id, transaction_status)
+
+        # --- ADD HISTORY RECORD FOR THIS STATUS CHANGE ---
+        if old_order_status != order.status:
+            status_history_entry = OrderStatusHistoryModel(
+                order_id=order.id,
+                old_status=old_order_status,
+                new_status=order.status,
+                changed_by_user_id=None, # Changed by system (webhook)
+                notes=f"Status updated via Midtrans webhook: {transaction_status}.",
+                changed_at=datetime.utcnow()
+            )
+            db.add(status_history_entry)
+        # --- END ADD HISTORY ---
+
+        # Save additional payment details if available
+        payment_details = {}
+        payment_type = notification.get("payment_type")
+        if payment_type:
+            payment_details["payment_type"] = payment_type
+
+            if payment_type == "bank_transfer":
+                if "va_numbers" in notification:
+                    payment_details["va_numbers"] = notification["va_numbers"]
+            elif payment_type == "credit_card":
+                if "masked_card" in notification:
+                    payment_details["masked_card"] = notification["masked_card"]
+            elif payment_type == "gopay":
+                if "actions" in notification:
+                    payment_details["actions"] = notification["actions"]
+                    for action in notification["actions"]:
+                        if action.get("name") == "generate_qr_code" and action.get("url"):
+                            payment_details["qr_code_url"] = action.get("url")
+                            break
+
+        if is_pay_for_others:
+            payment_details["is_pay_for_others"] = True
+            if payer_user:
+                payment_details["paid_by_user_name"] = payer_user.name
+                payment_details["paid_by_user_email"] = payer_user.email
+
+        if payment_details:
+            existing_note = order.payment_note or ""
+            payment_details_json = json.dumps(payment_details)
+            order.payment_note = f"{existing_note}\nPayment Details: {payment_details_json}" if existing_note else f"Payment Details: {payment_details_json}"
+
+        sales_rollup_service.sync_order_status_change(db, order, old_order_status)
+        return True
 
-            logger.info(f"Successfully processed notification for order {original_order_id}")
-            return True
+    def process_notification(self, db: Session, notification: Dict[str, Any]):
+        """
+        Process payment notification webhook from Midtrans inline
+        (the webhook route queues notifications, see payment_notification_worker)
+        """
+        try:
+            logger.info("Received payment notification: %s", notification)
+            self.verify_notification(notification)
+            applied = self.apply_notification(db, notification)
+            db.commit()
+            logger.info("Successfully processed notification for order %s", notification.get('order_id'))
+            return applied
 
         except Exception as e:
-            logger.error(f"Error processing payment notification: {str(e)}")
+            logger.error("Error processing payment notification: %s", e)
             raise
+
     def get_transaction_details(self, db: Session, order_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
         transaction = db.query(TransactionModel).filter(
             TransactionModel.order_id == order_id,
@@ -0,0 +1,163 @@
+"""
+Denormalized rating aggregates on coffee_menus (rating_sum, total_ratings, average_rating)
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import Float, and_, case, cast, func, or_, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.coffee import CoffeeMenuModel
+from app.models.notification import RatingModel
+
+logger = logging.getLogger(__name__)
+
+# pg advisory lock key, only one process verifies at a time
+RATING_VERIFIER_LOCK_KEY = 0x52415447  # "RATG"
+
+
+def apply_rating_delta(db: Session, coffee_id: UUID, sum_delta: int, count_delta: int) -> Optional[UUID]:
+    """
+    Adjust the aggregates of one menu item in a single UPDATE. The right-hand
+    sides read the row as locked by the UPDATE itself, so concurrent ratings
+    never lose increments. Does not commit; returns the item's coffee shop id,
+    None when the item does not exist.
+    """
+    new_sum = CoffeeMenuModel.rating_sum + sum_delta
+    new_count = CoffeeMenuModel.total_ratings + count_delta
+    return db.execute(
+        update(CoffeeMenuModel)
+        .where(CoffeeMenuModel.id == coffee_id)
+        .values(
+            rating_sum=new_sum,
+            total_ratings=new_count,
+            average_rating=case((new_count > 0, cast(new_sum, Float) / new_count), else_=0.0),
+        )
+        .returning(CoffeeMenuModel.coffee_shop_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+class RatingAggregateVerifier:
+    """
+    Periodically recomputes the aggregates from the ratings table and repairs
+    rows that drifted (manual SQL, deleted ratings, a bug). Drifted rows are
+    locked before being recomputed, so a rating committed concurrently is
+    either already counted by the recompute or applied as a delta after it.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"runs": 0, "repaired": 0, "last_run_at": None}
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error("Rating aggregate verification failed: %s", e)
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            locked = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": RATING_VERIFIER_LOCK_KEY}).scalar()
+            if not locked:
+                return 0  # Another process is verifying
+            repaired = self.verify(db)
+            db.commit()
+            return repaired
+        finally:
+            db.close()
+
+    def verify(self, db: Session, repair: bool = True) -> int:
+        """Returns the number of drifted menu items; repairs them unless repair=False (does not commit)"""
+        from app.services.coffee_menu_service import invalidate_public_menu_cache
+
+        drifted = self._drifted_ids(db)
+        self.stats["runs"] += 1
+        self.stats["last_run_at"] = datetime.utcnow()
+        if not drifted or not repair:
+            return len(drifted)
+
+        # Lock first: the recompute below then runs on a fresh snapshot that
+        # includes every rating whose delta has already been applied
+        db.query(CoffeeMenuModel.id).filter(CoffeeMenuModel.id.in_(drifted))\
+            .order_by(CoffeeMenuModel.id).with_for_update().all()
+        actual = self._actual(db, drifted)
+        shop_ids: Set[UUID] = set()
+        for coffee_id, shop_id, rating_sum, rating_count in actual:
+            db.execute(
+                update(CoffeeMenuModel)
+                .where(CoffeeMenuModel.id == coffee_id)
+                .values(
+                    rating_sum=rating_sum,
+                    total_ratings=rating_count,
+                    average_rating=rating_sum / rating_count if rating_count else 0.0,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            shop_ids.add(shop_id)
+
+        self.stats["repaired"] += len(actual)
+        logger.warning("Repaired rating aggregates of %d menu item(s)", len(actual))
+        invalidate_public_menu_cache(*shop_ids)
+        return len(actual)
+
+    def _ratings_subquery(self, db: Session, coffee_ids: Optional[List[UUID]] = None):
+        query = db.query(
+            RatingModel.coffee_id.label("coffee_id"),
+            func.sum(RatingModel.rating).label("rating_sum"),
+            func.count(RatingModel.id).label("rating_count"),
+        )
+        if coffee_ids is not None:
+            query = query.filter(RatingModel.coffee_id.in_(coffee_ids))
+        return query.group_by(RatingModel.coffee_id).subquery()
+
+    def _drifted_ids(self, db: Session) -> List[UUID]:
+        actual = self._ratings_subquery(db)
+        actual_sum = func.coalesce(actual.c.rating_sum, 0)
+        actual_count = func.coalesce(actual.c.rating_count, 0)
+        rows = db.query(CoffeeMenuModel.id)\
+            .outerjoin(actual, actual.c.coffee_id == CoffeeMenuModel.id)\
+            .filter(or_(
+                CoffeeMenuModel.rating_sum.is_distinct_from(actual_sum),
+                CoffeeMenuModel.total_ratings.is_distinct_from(actual_count),
+                and_(actual_count > 0, func.abs(
+                    CoffeeMenuModel.average_rating - cast(actual_sum, Float) / actual_count
+                ) > 1e-9),
+            ))\
+            .all()
+        return [coffee_id for coffee_id, in rows]
+
+    def _actual(self, db: Session, coffee_ids: List[UUID]):
+        actual = self._ratings_subquery(db, coffee_ids)
+        return db.query(
+            CoffeeMenuModel.id,
+            CoffeeMenuModel.coffee_shop_id,
+            func.coalesce(actual.c.rating_sum, 0),
+            func.coalesce(actual.c.rating_count, 0),
+        ).outerjoin(actual, actual.c.coffee_id == CoffeeMenuModel.id)\
+            .filter(CoffeeMenuModel.id.in_(coffee_ids))\
+            .all()
+
+
+rating_aggregate_verifier = RatingAggregateVerifier(
+    interval_seconds=settings.RATING_VERIFIER_INTERVAL_SECONDS,
+)
@@ -0,0 +1,173 @@
+"""
+Maintenance of the daily_shop_sales rollup used by sales/revenue analytics
+"""
+import logging
+from typing import Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import func, distinct, delete, literal, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.order import OrderModel, OrderItemModel, OrderStatus
+from app.models.coffee import CoffeeMenuModel
+from app.models.daily_shop_sales import DailyShopSalesModel
+
+logger = logging.getLogger(__name__)
+
+# First key of the per-(shop, day) pg advisory locks taken while a rollup row is rebuilt
+ROLLUP_LOCK_CLASS = 0x524F4C4C  # "ROLL"
+
+
+class SalesRollupService:
+    """
+    Keeps one row per (coffee shop, day) with revenue, order count, items sold
+    and distinct customers of COMPLETED orders.
+
+    A (shop, day) row is always rebuilt from its source orders instead of being
+    adjusted with deltas, so distinct customer counts stay exact and an order
+    that leaves COMPLETED is removed from the rollup as well.
+    """
+
+    def refresh(
+        self,
+        db: Session,
+        start_date: date,
+        end_date: date,
+        coffee_shop_ids: Optional[Sequence[UUID]] = None,
+    ) -> int:
+        """
+        Rebuild rollup rows for the date range (inclusive), optionally limited to some shops.
+        Does not commit; returns the number of rows written.
+
+        With shops given, each (shop, day) is locked until the caller commits,
+        so concurrent rebuilds of the same row run one after the other and the
+        second one sees (and replaces) the first one's row.
+        """
+        if coffee_shop_ids is not None:
+            self._lock_rows(db, start_date, end_date, coffee_shop_ids)
+
+        sales_date = func.date(OrderModel.ordered_at)
+
+        delete_stmt = delete(DailyShopSalesModel).where(
+            DailyShopSalesModel.sales_date >= start_date,
+            DailyShopSalesModel.sales_date <= end_date,
+        )
+        if coffee_shop_ids is not None:
+            delete_stmt = delete_stmt.where(DailyShopSalesModel.coffee_shop_id.in_(coffee_shop_ids))
+        db.execute(delete_stmt)
+
+        now = datetime.utcnow()
+        source = db.query(
+            func.gen_random_uuid(),
+            CoffeeMenuModel.coffee_shop_id,
+            sales_date,
+            func.sum(OrderItemModel.subtotal),
+            func.count(distinct(OrderModel.id)),
+            func.sum(OrderItemModel.quantity),
+            func.count(distinct(OrderModel.user_id)),
+            literal(now),
+            literal(now),
+        ).join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
+         .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
+         .filter(
+            OrderModel.status == OrderStatus.COMPLETED,
+            sales_date >= start_date,
+            sales_date <= end_date,
+        )
+        if coffee_shop_ids is not None:
+            source = source.filter(CoffeeMenuModel.coffee_shop_id.in_(coffee_shop_ids))
+        source = source.group_by(CoffeeMenuModel.coffee_shop_id, sales_date)
+
+        insert_stmt = insert(DailyShopSalesModel).from_select(
+            [
+                DailyShopSalesModel.id,
+                DailyShopSalesModel.coffee_shop_id,
+                DailyShopSalesModel.sales_date,
+                DailyShopSalesModel.total_revenue,
+                DailyShopSalesModel.order_count,
+                DailyShopSalesModel.items_sold,
+                DailyShopSalesModel.distinct_customers,
+                DailyShopSalesModel.created_at,
+                DailyShopSalesModel.updated_at,
+            ],
+            source.statement,
+        )
+        # Unlocked full-range backfills can still race a status change; the last writer wins
+        insert_stmt = insert_stmt.on_conflict_do_update(
+            constraint="uq_daily_shop_sales_shop_date",
+            set_={
+                "total_revenue": insert_stmt.excluded.total_revenue,
+                "order_count": insert_stmt.excluded.order_count,
+                "items_sold": insert_stmt.excluded.items_sold,
+                "distinct_customers": insert_stmt.excluded.distinct_customers,
+                "updated_at": insert_stmt.excluded.updated_at,
+            },
+        )
+        return db.execute(insert_stmt).rowcount
+
+    def _lock_rows(self, db: Session, start_date: date, end_date: date, coffee_shop_ids: Sequence[UUID]) -> None:
+        """Transaction-scoped locks per (shop, day), always taken in the same order to avoid deadlocks"""
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        for day in days:
+            for shop_id in sorted(set(coffee_shop_ids)):
+                db.execute(
+                    text("SELECT pg_advisory_xact_lock(:class_key, hashtext(:row_key))"),
+                    {"class_key": ROLLUP_LOCK_CLASS, "row_key": f"{shop_id}:{day.isoformat()}"},
+                )
+
+    def sync_order_status_changes(
+        self,
+        db: Session,
+        changes: Iterable[Tuple[OrderModel, Optional[OrderStatus]]],
+    ) -> None:
+        """
+        Update the rollup for orders whose status moved into or out of COMPLETED.
+        `changes` holds (order, old_status) pairs with order.status already set.
+        Must run inside the caller's transaction, before commit.
+        """
+        changed: List[OrderModel] = [
+            order for order, old_status in changes
+            if (old_status == OrderStatus.COMPLETED) != (order.status == OrderStatus.COMPLETED)
+        ]
+        if not changed:
+            return
+
+        # Session uses autoflush=False, the new statuses must be visible to the rebuild query
+        db.flush()
+
+        shop_ids = [
+            shop_id for shop_id, in db.query(distinct(CoffeeMenuModel.coffee_shop_id))
+                                      .join(OrderItemModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)
+                                      .filter(OrderItemModel.order_id.in_([order.id for order in changed]))
+                                      .all()
+        ]
+        if not shop_ids:
+            return
+
+        for day in sorted({order.ordered_at.date() for order in changed}):
+            self.refresh(db, day, day, shop_ids)
+
+    def sync_order_status_change(self, db: Session, order: OrderModel, old_status: Optional[OrderStatus]) -> None:
+        """Single-order shortcut for sync_order_status_changes"""
+        self.sync_order_status_changes(db, [(order, old_status)])
+
+    def backfill(self, db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+        """Rebuild the rollup for a date range (defaults to the full order history) and commit"""
+        if start_date is None or end_date is None:
+            first_day, last_day = db.query(
+                func.min(func.date(OrderModel.ordered_at)),
+                func.max(func.date(OrderModel.ordered_at)),
+            ).one()
+            if first_day is None:
+                return 0
+            start_date = start_date or first_day
+            end_date = end_date or last_day
+
+        rows = self.refresh(db, start_date, end_date)
+        db.commit()
+        logger.info("daily_shop_sales backfilled %d rows for %s to %s", rows, start_date, end_date)
+        return rows
+
+
+sales_rollup_service = SalesRollupService()
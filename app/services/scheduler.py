@@ -0,0 +1,283 @@
+"""
+In-process scheduler for periodic maintenance jobs: booking reminders,
+expiry of stale PENDING transactions and cancellation of abandoned orders
+"""
+import asyncio
+import logging
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Select, and_, exists, insert, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.notification import NotificationModel
+from app.models.order import OrderModel, OrderStatus, StatusType, TransactionModel
+from app.models.order_status_history import OrderStatusHistoryModel
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# First key of the per-job pg advisory locks; the second one is derived from the job name
+SCHEDULER_LOCK_CLASS = 0x4A4F4253  # "JOBS"
+
+job_run_duration = Histogram(
+    "scheduled_job_duration_seconds", "Run time of scheduled jobs", ("job", "outcome"),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+job_runs = Counter("scheduled_job_runs", "Scheduled job runs by outcome", ("job", "outcome"))
+job_items = Counter("scheduled_job_items", "Rows handled by scheduled jobs", ("job",))
+
+
+class ScheduledJob(NamedTuple):
+    name: str
+    interval_seconds: float
+    run: Callable[[Session], int]  # Commits its own batches, returns the number of rows handled
+
+
+class JobScheduler:
+    """
+    Runs each registered job every `interval_seconds` in a worker thread.
+    Every run first takes a session-level advisory lock for its job on a
+    dedicated connection, so across processes only one runs a given job at a
+    time, while the job itself can commit batch by batch. The lock goes away
+    with the connection if the process dies.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, interval_seconds: float, run: Callable[[Session], int]) -> None:
+        self.jobs[name] = ScheduledJob(name, interval_seconds, run)
+        self.stats[name] = {"runs": 0, "skipped": 0, "errors": 0, "items": 0,
+                            "last_run_at": None, "last_duration_ms": None}
+        for outcome in ("ok", "error"):
+            job_run_duration.labels(name, outcome)
+        for outcome in ("ok", "error", "skipped"):
+            job_runs.labels(name, outcome)
+        job_items.labels(name)
+
+    async def start(self) -> None:
+        if self.enabled and not self._tasks:
+            self._tasks = [asyncio.create_task(self._run(job)) for job in self.jobs.values()]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, job: ScheduledJob) -> None:
+        while True:
+            await asyncio.sleep(job.interval_seconds)
+            try:
+                await asyncio.to_thread(self.run_once, job.name)
+            except Exception as e:
+                logger.error("Scheduled job %s failed: %s", job.name, e)
+
+    def run_once(self, name: str) -> Optional[int]:
+        """Run one job now; returns the rows it handled, None when another process holds its lock"""
+        job = self.jobs[name]
+        lock_key = zlib.crc32(name.encode()) & 0x7FFFFFFF
+        with engine.connect() as lock_connection:
+            locked = lock_connection.execute(
+                text("SELECT pg_try_advisory_lock(:class_key, :job_key)"),
+                {"class_key": SCHEDULER_LOCK_CLASS, "job_key": lock_key},
+            ).scalar()
+            lock_connection.commit()
+            if not locked:
+                self.stats[name]["skipped"] += 1
+                job_runs.labels(name, "skipped").inc()
+                return None
+            try:
+                return self._timed_run(job)
+            finally:
+                lock_connection.execute(
+                    text("SELECT pg_advisory_unlock(:class_key, :job_key)"),
+                    {"class_key": SCHEDULER_LOCK_CLASS, "job_key": lock_key},
+                )
+                lock_connection.commit()
+
+    def _timed_run(self, job: ScheduledJob) -> int:
+        stats = self.stats[job.name]
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            items = job.run(db)
+        except Exception:
+            db.rollback()
+            stats["errors"] += 1
+            job_run_duration.labels(job.name, "error").observe(time.perf_counter() - started)
+            job_runs.labels(job.name, "error").inc()
+            raise
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - started
+        stats["runs"] += 1
+        stats["items"] += items
+        stats["last_run_at"] = datetime.utcnow()
+        stats["last_duration_ms"] = round(elapsed * 1000, 1)
+        job_run_duration.labels(job.name, "ok").observe(elapsed)
+        job_runs.labels(job.name, "ok").inc()
+        job_items.labels(job.name).inc(items)
+        if items:
+            logger.info("Scheduled job %s handled %d row(s) in %.0f ms", job.name, items, elapsed * 1000)
+        return items
+
+
+def _has_live_transaction(cutoff: datetime):
+    """The order has a paid transaction, or a pending one the reconciler may still resolve"""
+    return exists().where(
+        TransactionModel.order_id == OrderModel.id,
+        or_(
+            TransactionModel.status == StatusType.SUCCESS,
+            and_(
+                TransactionModel.status == StatusType.PENDING,
+                or_(TransactionModel.expiry_time.is_(None), TransactionModel.expiry_time > cutoff),
+            ),
+        ),
+    )
+
+
+def _cancel_orders(db: Session, candidates: Select, statuses: List[OrderStatus], notes: str, message: str) -> int:
+    """
+    Cancel the orders whose ids `candidates` selects and that are still in
+    one of `statuses` (rows locked by someone else are skipped), and
+    add their status history and notifications (owner, plus whoever was
+    paying) in the same transaction. Does not commit; returns the number of
+    orders cancelled.
+    """
+    previous = select(OrderModel.id, OrderModel.status, OrderModel.paid_by_user_id)\
+        .where(OrderModel.id.in_(candidates), OrderModel.status.in_(statuses))\
+        .with_for_update(skip_locked=True)\
+        .subquery()
+    cancelled = db.execute(
+        update(OrderModel)
+        .where(OrderModel.id == previous.c.id)
+        .values(status=OrderStatus.CANCELLED, paid_by_user_id=None)
+        .returning(OrderModel.id, OrderModel.order_id, OrderModel.user_id, previous.c.status, previous.c.paid_by_user_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not cancelled:
+        return 0
+
+    now = datetime.utcnow()
+    history_rows = []
+    notification_rows = []
+    for order_pk, order_code, user_id, old_status, payer_id in cancelled:
+        history_rows.append({
+            "id": uuid.uuid4(),
+            "order_id": order_pk,
+            "old_status": old_status,
+            "new_status": OrderStatus.CANCELLED,
+            "changed_by_user_id": None,
+            "notes": notes,
+            "changed_at": now,
+            "created_at": now,
+            "updated_at": now,
+        })
+        for recipient_id in {user_id, payer_id} - {None}:
+            notification_rows.append({
+                "id": uuid.uuid4(),
+                "type": "order_cancelled",
+                "message": message.format(order_id=order_code),
+                "is_read": False,
+                "user_id": recipient_id,
+                "created_at": now,
+                "updated_at": now,
+            })
+    db.execute(insert(OrderStatusHistoryModel), history_rows)
+    db.execute(insert(NotificationModel), notification_rows)
+    return len(cancelled)
+
+
+def send_booking_reminders(db: Session) -> int:
+    """Queue reminder emails for upcoming bookings, marking each batch as sent"""
+    from app.services.booking_service import booking_service
+    from app.services.notification_services import notification_service
+
+    sent = 0
+    while True:
+        bookings = booking_service.get_upcoming_bookings(
+            db, hours_ahead=settings.BOOKING_REMINDER_HOURS_AHEAD, limit=settings.SCHEDULER_BATCH_SIZE,
+        )
+        reminded = [booking.id for booking in bookings if notification_service.queue_booking_reminder(booking)]
+        booking_service.mark_reminders_sent(db, reminded)
+        db.commit()
+        sent += len(reminded)
+        # Bookings whose email could not be queued stay unmarked for the next run
+        if len(bookings) < settings.SCHEDULER_BATCH_SIZE or len(reminded) < len(bookings):
+            return sent
+
+
+def expire_pending_transactions(db: Session) -> int:
+    """
+    Mark PENDING transactions as FAILED once the reconciler stopped polling
+    them (expiry plus grace) and cancel their orders when nothing else can
+    still pay for them.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.PAYMENT_RECONCILER_EXPIRY_GRACE_SECONDS)
+    expired = 0
+    while True:
+        batch = select(TransactionModel.id)\
+            .where(TransactionModel.status == StatusType.PENDING, TransactionModel.expiry_time <= cutoff)\
+            .limit(settings.SCHEDULER_BATCH_SIZE)\
+            .with_for_update(skip_locked=True)
+        order_ids = db.execute(
+            update(TransactionModel)
+            .where(TransactionModel.id.in_(batch))
+            .values(status=StatusType.FAILED)
+            .returning(TransactionModel.order_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if order_ids:
+            _cancel_orders(
+                db,
+                select(OrderModel.id).where(OrderModel.id.in_(set(order_ids)), ~_has_live_transaction(cutoff)),
+                [OrderStatus.PENDING, OrderStatus.PROCESSING],
+                notes="Cancelled automatically: payment expired",
+                message="Payment for order {order_id} has expired and the order was cancelled.",
+            )
+        db.commit()
+        expired += len(order_ids)
+        if len(order_ids) < settings.SCHEDULER_BATCH_SIZE:
+            return expired
+
+
+def cancel_abandoned_orders(db: Session) -> int:
+    """Cancel PENDING orders older than ORDER_AUTO_CANCEL_AFTER_HOURS that nobody is paying for"""
+    now = datetime.utcnow()
+    created_before = now - timedelta(hours=settings.ORDER_AUTO_CANCEL_AFTER_HOURS)
+    transaction_cutoff = now - timedelta(seconds=settings.PAYMENT_RECONCILER_EXPIRY_GRACE_SECONDS)
+    cancelled = 0
+    while True:
+        batch = select(OrderModel.id)\
+            .where(
+                OrderModel.status == OrderStatus.PENDING,
+                OrderModel.ordered_at < created_before,
+                ~_has_live_transaction(transaction_cutoff),
+            )\
+            .limit(settings.SCHEDULER_BATCH_SIZE)
+        count = _cancel_orders(
+            db, batch, [OrderStatus.PENDING],
+            notes=f"Cancelled automatically: unpaid after {settings.ORDER_AUTO_CANCEL_AFTER_HOURS} hours",
+            message="Order {order_id} was not paid in time and has been cancelled.",
+        )
+        db.commit()
+        cancelled += count
+        if count < settings.SCHEDULER_BATCH_SIZE:
+            return cancelled
+
+
+job_scheduler = JobScheduler(enabled=settings.SCHEDULER_ENABLED)
+job_scheduler.register("booking_reminders", settings.BOOKING_REMINDER_INTERVAL_SECONDS, send_booking_reminders)
+job_scheduler.register("transaction_expiry", settings.TRANSACTION_EXPIRY_INTERVAL_SECONDS, expire_pending_transactions)
+job_scheduler.register("order_auto_cancel", settings.ORDER_AUTO_CANCEL_INTERVAL_SECONDS, cancel_abandoned_orders)
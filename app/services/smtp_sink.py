@@ -0,0 +1,83 @@
+"""
+Minimal local SMTP sink for development and the mailer benchmark.
+Accepts every message and only counts it (no STARTTLS / AUTH):
+
+    python -m app.services.smtp_sink --port 2525
+
+Point the app at it with MAILTRAP_HOST=127.0.0.1, MAILTRAP_PORT=2525, MAIL_USE_STARTTLS=false.
+"""
+import asyncio
+from typing import Optional
+
+
+class SMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 2525):
+        self.host = host
+        self.port = port
+        self.messages = 0
+        self.connections = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 smtp-sink ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith("EHLO"):
+                    writer.write(b"250-smtp-sink\r\n250-8BITMIME\r\n250 SIZE 10485760\r\n")
+                    await writer.drain()
+                elif command.startswith("HELO"):
+                    await reply("250 smtp-sink")
+                elif command == "DATA":
+                    await reply("354 end data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    self.messages += 1
+                    await reply("250 OK queued")
+                elif command == "QUIT":
+                    await reply("221 bye")
+                    break
+                else:
+                    # MAIL, RCPT, RSET, NOOP
+                    await reply("250 OK")
+        finally:
+            writer.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        sink = SMTPSink(args.host, args.port)
+        await sink.start()
+        print(f"SMTP sink listening on {args.host}:{args.port}")
+        try:
+            while True:
+                await asyncio.sleep(10)
+                print(f"{sink.messages} messages over {sink.connections} connections")
+        finally:
+            await sink.stop()
+
+    asyncio.run(serve())
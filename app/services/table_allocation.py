@@ -0,0 +1,134 @@
+"""
+Table allocation strategies used to auto-assign tables to a booking
+"""
+import enum
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+
+# Upper bound on (number of tables x searched seat sums) for the optimal search,
+# bigger problems fall back to best-fit
+OPTIMAL_SEARCH_BUDGET = 200_000
+
+
+class TableAllocationStrategy(str, enum.Enum):
+    GREEDY = "greedy"      # largest tables first (previous behaviour)
+    BEST_FIT = "best_fit"  # smallest single table that fits, else large tables + smallest fitting remainder
+    OPTIMAL = "optimal"    # minimum wasted seats, then fewest tables
+
+
+T = TypeVar("T")  # anything with a `capacity` attribute
+
+
+def _greedy(capacities: Tuple[int, ...], guests: int) -> Optional[Dict[int, int]]:
+    descending = sorted(capacities, reverse=True)
+    if descending and descending[0] >= guests:
+        # Any single table that fits, largest first as before
+        return {descending[0]: 1}
+
+    picked: Counter = Counter()
+    remaining = guests
+    for capacity in descending:
+        if remaining <= 0:
+            break
+        picked[capacity] += 1
+        remaining -= capacity
+    return dict(picked) if remaining <= 0 else None
+
+
+def _best_fit(capacities: Tuple[int, ...], guests: int) -> Optional[Dict[int, int]]:
+    if sum(capacities) < guests:
+        return None
+
+    pool = sorted(capacities)
+    picked: Counter = Counter()
+    remaining = guests
+    while remaining > 0:
+        fitting = [capacity for capacity in pool if capacity >= remaining]
+        if fitting:
+            capacity = fitting[0]
+        else:
+            capacity = pool[-1]
+        pool.remove(capacity)
+        picked[capacity] += 1
+        remaining -= capacity
+    return dict(picked)
+
+
+@lru_cache(maxsize=1024)
+def _optimal(capacities: Tuple[int, ...], guests: int) -> Optional[Dict[int, int]]:
+    """
+    Bounded subset-sum over the capacity multiset: the smallest reachable seat
+    total >= guests, reached with the fewest tables. A minimal subset never
+    exceeds guests + largest capacity - 1 seats, which bounds the search.
+    Cached per (sorted capacity multiset, guests).
+    """
+    if not capacities or sum(capacities) < guests:
+        return None
+
+    limit = min(sum(capacities), guests + max(capacities) - 1)
+    if len(capacities) * (limit + 1) > OPTIMAL_SEARCH_BUDGET:
+        return _best_fit(capacities, guests)
+
+    unreachable = len(capacities) + 1
+    # fewest[s] = fewest tables seating exactly s (s capped at limit)
+    fewest = [0] + [unreachable] * limit
+    taken: List[bytearray] = []
+    for capacity in capacities:
+        row = bytearray(limit + 1)
+        for total in range(limit, capacity - 1, -1):
+            candidate = fewest[total - capacity] + 1
+            if candidate < fewest[total]:
+                fewest[total] = candidate
+                row[total] = 1
+        taken.append(row)
+
+    best_total = next((total for total in range(guests, limit + 1) if fewest[total] < unreachable), None)
+    if best_total is None:
+        return None
+
+    picked: Counter = Counter()
+    total = best_total
+    for index in range(len(capacities) - 1, -1, -1):
+        if total and taken[index][total]:
+            picked[capacities[index]] += 1
+            total -= capacities[index]
+    return dict(picked)
+
+
+_SOLVERS = {
+    TableAllocationStrategy.GREEDY: _greedy,
+    TableAllocationStrategy.BEST_FIT: _best_fit,
+    TableAllocationStrategy.OPTIMAL: _optimal,
+}
+
+
+def allocate_tables(
+    tables: Sequence[T],
+    guests: int,
+    strategy: TableAllocationStrategy = TableAllocationStrategy.OPTIMAL
+) -> List[T]:
+    """
+    Pick tables seating at least `guests`, empty list if the tables cannot.
+    Strategies only decide how many tables of each capacity to use, so results
+    are cached per capacity multiset; concrete tables are then taken in the
+    order they were given.
+    """
+    if guests <= 0 or not tables:
+        return []
+
+    counts = _SOLVERS[strategy](tuple(sorted(table.capacity for table in tables)), guests)
+    if not counts:
+        return []
+
+    remaining = dict(counts)
+    selected = []
+    for table in tables:
+        if remaining.get(table.capacity, 0) > 0:
+            selected.append(table)
+            remaining[table.capacity] -= 1
+    return selected
+
+
+def wasted_seats(tables: Sequence[T], guests: int) -> int:
+    return sum(table.capacity for table in tables) - guests if tables else 0
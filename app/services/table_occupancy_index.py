@@ -0,0 +1,323 @@
+"""
+In-memory table occupancy index used to answer booking availability
+"""
+import logging
+import threading
+import time as monotonic_clock
+from bisect import bisect_right
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.booking import BookingModel, BookingTableModel, BookingStatus, TableModel
+from app.models.operating_hours import TimeSlotModel
+from app.utils.cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Status booking yang masih menempati meja
+ACTIVE_BOOKING_STATUSES = [BookingStatus.NOCONFIRM, BookingStatus.CONFIRM, BookingStatus.SUCCESS]
+
+
+class SlotInfo(NamedTuple):
+    id: UUID
+    start_time: time
+    end_time: time
+
+
+class TableInfo(NamedTuple):
+    id: UUID
+    table_number: str
+    capacity: int
+
+
+class SlotLocator:
+    """
+    Finds the time slots covering a time of day.
+    Slots are sorted by start_time; a running max of end_time lets the
+    backwards scan stop early even if slots overlap.
+    """
+
+    def __init__(self, time_slots: Sequence[Any]):
+        self.time_slots = list(time_slots)
+        self._starts = [slot.start_time for slot in self.time_slots]
+        self._max_end_so_far: List[time] = []
+        for slot in self.time_slots:
+            previous = self._max_end_so_far[-1] if self._max_end_so_far else slot.end_time
+            self._max_end_so_far.append(max(slot.end_time, previous))
+
+    def covering(self, at: time) -> List[Any]:
+        """Every slot with start_time <= at < end_time"""
+        result = []
+        index = bisect_right(self._starts, at) - 1
+        while index >= 0 and self._max_end_so_far[index] > at:
+            if at < self.time_slots[index].end_time:
+                result.append(self.time_slots[index])
+            index -= 1
+        return result
+
+    def first_covering(self, at: time) -> Optional[Any]:
+        """Earliest starting slot that contains the given time"""
+        slots = self.covering(at)
+        return slots[-1] if slots else None
+
+
+def fetch_booked_pairs(db: Session, coffee_shop_id: UUID, booking_date: date) -> List[Tuple[datetime, UUID]]:
+    """(booking time, table_id) of every active booking of a shop on one day, in one joined query"""
+    return db.query(BookingModel.booking_date, BookingTableModel.table_id)\
+        .join(BookingTableModel, BookingTableModel.booking_id == BookingModel.id)\
+        .join(TableModel, BookingTableModel.table_id == TableModel.id)\
+        .filter(
+            TableModel.coffee_shop_id == coffee_shop_id,
+            BookingModel.booking_date >= datetime.combine(booking_date, time.min),
+            BookingModel.booking_date <= datetime.combine(booking_date, time.max),
+            BookingModel.status.in_(ACTIVE_BOOKING_STATUSES)
+        ).all()
+
+
+class ShopLayout:
+    """
+    Available tables of a shop mapped to bit positions (capacity ascending,
+    so bit order is also the listing order) plus its active time slots.
+    """
+
+    def __init__(self, tables: List[TableInfo], time_slots: List[SlotInfo]):
+        self.tables = tables
+        self.bit_of = {table.id: bit for bit, table in enumerate(tables)}
+        self.all_mask = (1 << len(tables)) - 1
+        self.time_slots = time_slots
+        self.locator = SlotLocator(time_slots)
+
+    def mask_of(self, table_ids: Iterable[UUID]) -> int:
+        """Bitmask of the given tables, tables outside the layout are ignored"""
+        mask = 0
+        for table_id in table_ids:
+            bit = self.bit_of.get(table_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def tables_in(self, mask: int) -> List[TableInfo]:
+        """Tables whose bit is set, in capacity ascending order"""
+        result = []
+        while mask:
+            lowest = mask & -mask
+            result.append(self.tables[lowest.bit_length() - 1])
+            mask ^= lowest
+        return result
+
+    def capacity_of(self, mask: int) -> int:
+        return sum(table.capacity for table in self.tables_in(mask))
+
+
+class DayOccupancy:
+    """
+    Per time slot bitmask of occupied tables for one (shop, day).
+    `contended` marks bits held by more than one booking in the slot; releasing
+    such a bit cannot be done by clearing it, so the entry is reloaded instead.
+    """
+
+    __slots__ = ("layout", "occupied", "contended", "loaded_at")
+
+    def __init__(self, layout: ShopLayout, occupied: Dict[UUID, int], contended: Dict[UUID, int], loaded_at: float):
+        self.layout = layout
+        self.occupied = occupied
+        self.contended = contended
+        self.loaded_at = loaded_at
+
+
+class BookingOccupancyChange(NamedTuple):
+    booking_id: UUID
+    old_status: Optional[BookingStatus]
+    new_status: BookingStatus
+    old_booking_date: datetime
+    new_booking_date: datetime
+
+
+def booking_change(
+    booking: BookingModel,
+    old_status: Optional[BookingStatus],
+    old_booking_date: Optional[datetime] = None
+) -> BookingOccupancyChange:
+    """Capture a booking change before commit (committed instances are expired)"""
+    return BookingOccupancyChange(
+        booking_id=booking.id,
+        old_status=old_status,
+        new_status=booking.status,
+        old_booking_date=old_booking_date or booking.booking_date,
+        new_booking_date=booking.booking_date,
+    )
+
+
+class TableOccupancyIndex:
+    """
+    For each (shop, date, time slot) a bitset over that shop's tables.
+
+    Entries are built lazily with one query and then kept up to date by the
+    booking write paths via apply_booking_changes. The index lives in process
+    memory, so bookings written by other workers are only seen once an entry is
+    reloaded; entries are therefore reloaded after `ttl` seconds regardless of
+    incremental updates, and writes must still be validated against the database.
+    """
+
+    def __init__(self, ttl: float, maxsize: int, debug_check: bool = False):
+        self.ttl = ttl
+        self.debug_check = debug_check
+        self._layouts = TTLLRUCache("table_occupancy_layouts", maxsize=maxsize, ttl=ttl)
+        self._days = TTLLRUCache("table_occupancy_days", maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        # Bumped on every change of a shop; a load that raced with a change is not cached
+        self._generations: Dict[UUID, int] = {}
+
+    def get_layout(self, db: Session, coffee_shop_id: UUID) -> ShopLayout:
+        layout = self._layouts.get(coffee_shop_id)
+        if layout is not None:
+            return layout
+
+        tables = db.query(TableModel.id, TableModel.table_number, TableModel.capacity).filter(
+            TableModel.coffee_shop_id == coffee_shop_id,
+            TableModel.is_available == True
+        ).order_by(TableModel.capacity, TableModel.table_number).all()
+        time_slots = db.query(TimeSlotModel.id, TimeSlotModel.start_time, TimeSlotModel.end_time).filter(
+            TimeSlotModel.coffee_shop_id == coffee_shop_id,
+            TimeSlotModel.is_active == True
+        ).order_by(TimeSlotModel.start_time).all()
+
+        layout = ShopLayout(
+            [TableInfo(*row) for row in tables],
+            [SlotInfo(*row) for row in time_slots],
+        )
+        self._layouts.set(coffee_shop_id, layout)
+        return layout
+
+    def get_day(self, db: Session, coffee_shop_id: UUID, booking_date: date) -> Tuple[ShopLayout, Dict[UUID, int]]:
+        """Layout of the shop and its occupied-table bitmask per time slot id for the date"""
+        key = (coffee_shop_id, booking_date)
+        day = self._days.get(key)
+        if day is not None and monotonic_clock.monotonic() - day.loaded_at > self.ttl:
+            day = None
+
+        if day is None:
+            generation = self._generations.get(coffee_shop_id, 0)
+            day = self._load_day(db, self.get_layout(db, coffee_shop_id), coffee_shop_id, booking_date)
+            with self._lock:
+                if self._generations.get(coffee_shop_id, 0) == generation:
+                    self._days.set(key, day)
+        elif self.debug_check:
+            day = self._verify_day(db, key, day)
+
+        return day.layout, day.occupied
+
+    def apply_booking_changes(self, db: Session, changes: Iterable[BookingOccupancyChange]) -> None:
+        """Update cached bitmaps after committed booking changes (creation, move, status change)"""
+        changes = [
+            change for change in changes
+            if (change.old_status in ACTIVE_BOOKING_STATUSES) != (change.new_status in ACTIVE_BOOKING_STATUSES)
+            or (change.new_status in ACTIVE_BOOKING_STATUSES and change.old_booking_date != change.new_booking_date)
+        ]
+        if not changes:
+            return
+
+        tables_by_booking: Dict[UUID, Tuple[UUID, List[UUID]]] = {}
+        rows = db.query(BookingTableModel.booking_id, TableModel.coffee_shop_id, TableModel.id)\
+            .join(TableModel, BookingTableModel.table_id == TableModel.id)\
+            .filter(BookingTableModel.booking_id.in_([change.booking_id for change in changes]))\
+            .all()
+        for booking_id, coffee_shop_id, table_id in rows:
+            tables_by_booking.setdefault(booking_id, (coffee_shop_id, []))[1].append(table_id)
+
+        for change in changes:
+            if change.booking_id not in tables_by_booking:
+                continue
+            coffee_shop_id, table_ids = tables_by_booking[change.booking_id]
+            if change.old_status in ACTIVE_BOOKING_STATUSES:
+                self._apply(coffee_shop_id, change.old_booking_date, table_ids, occupy=False)
+            if change.new_status in ACTIVE_BOOKING_STATUSES:
+                self._apply(coffee_shop_id, change.new_booking_date, table_ids, occupy=True)
+
+    def invalidate_shop(self, coffee_shop_id: UUID) -> None:
+        """Drop the layout and every cached day of a shop (tables or time slots changed)"""
+        with self._lock:
+            self._bump(coffee_shop_id)
+            self._layouts.invalidate(lambda key: key == coffee_shop_id)
+            self._days.invalidate(lambda key: key[0] == coffee_shop_id)
+
+    def invalidate_day(self, coffee_shop_id: UUID, booking_date: date) -> None:
+        with self._lock:
+            self._bump(coffee_shop_id)
+            self._days.invalidate(lambda key: key == (coffee_shop_id, booking_date))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "layouts": self._layouts.stats(),
+            "days": self._days.stats(),
+            "debug_check": self.debug_check,
+        }
+
+    def _bump(self, coffee_shop_id: UUID) -> None:
+        self._generations[coffee_shop_id] = self._generations.get(coffee_shop_id, 0) + 1
+
+    def _load_day(self, db: Session, layout: ShopLayout, coffee_shop_id: UUID, booking_date: date) -> DayOccupancy:
+        occupied = {slot.id: 0 for slot in layout.time_slots}
+        contended = dict(occupied)
+        for booked_at, table_id in fetch_booked_pairs(db, coffee_shop_id, booking_date):
+            flag = layout.mask_of([table_id])
+            if not flag:
+                continue
+            for slot in layout.locator.covering(booked_at.time()):
+                contended[slot.id] |= occupied[slot.id] & flag
+                occupied[slot.id] |= flag
+        return DayOccupancy(layout, occupied, contended, monotonic_clock.monotonic())
+
+    def _verify_day(self, db: Session, key: Tuple[UUID, date], day: DayOccupancy) -> DayOccupancy:
+        """Debug mode: compare the cached bitmaps with the database and prefer the database"""
+        fresh = self._load_day(db, day.layout, key[0], key[1])
+        if fresh.occupied == day.occupied:
+            return day
+
+        mismatched = [
+            str(slot_id) for slot_id, mask in fresh.occupied.items()
+            if day.occupied.get(slot_id) != mask
+        ]
+        logger.warning(
+            "Table occupancy index mismatch for shop %s on %s (slots %s), using database state",
+            key[0], key[1], ", ".join(mismatched),
+        )
+        fresh.loaded_at = day.loaded_at
+        with self._lock:
+            self._days.set(key, fresh)
+        return fresh
+
+    def _apply(self, coffee_shop_id: UUID, booking_date: datetime, table_ids: List[UUID], occupy: bool) -> None:
+        key = (coffee_shop_id, booking_date.date())
+        with self._lock:
+            self._bump(coffee_shop_id)
+            day = self._days.peek(key)
+            if day is None:
+                return
+
+            layout = day.layout
+            mask = layout.mask_of(table_ids)
+            occupied = dict(day.occupied)
+            contended = dict(day.contended)
+            for slot in layout.locator.covering(booking_date.time()):
+                if occupy:
+                    contended[slot.id] |= occupied[slot.id] & mask
+                    occupied[slot.id] |= mask
+                elif contended[slot.id] & mask:
+                    self._days.invalidate(lambda cached_key: cached_key == key)
+                    return
+                else:
+                    occupied[slot.id] &= ~mask
+
+            self._days.set(key, DayOccupancy(layout, occupied, contended, day.loaded_at))
+
+
+table_occupancy_index = TableOccupancyIndex(
+    ttl=settings.BOOKING_OCCUPANCY_TTL_SECONDS,
+    maxsize=settings.BOOKING_OCCUPANCY_MAX_ENTRIES,
+    debug_check=settings.BOOKING_OCCUPANCY_DEBUG_CHECK,
+)
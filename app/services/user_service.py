@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from sqlalchemy import and_, func
 from sqlalchemy.orm import Session, joinedload, relationship
@@ -10,11 +10,13 @@ from app.models.notification import UserFavoriteModel
 from app.models.order import OrderModel, OrderStatus
 from app.models.user import UserModel, Role
 from app.schemas.auth_schema import UserRegister
+from app.schemas.pagination_schema import CursorPage
 from app.schemas.user_schema import UserCreate, UserUpdate, UserProfile, CoffeeMenuPublicResponse # Import CoffeeMenuPublicResponse
-from app.utils.security import get_password_hash
+from app.utils.security import get_password_hash, invalidate_principal
 from app.repositories.user_repository import UserRepository
 from app.repositories.role_repository import RoleRepository
 from app.services.order_service import order_service
+from app.utils.pagination import keyset_page
 
 class UserService:
     def __init__(self, db: Session = Depends(get_db)):
@@ -37,14 +39,24 @@ class UserService:
         """Get user by email"""
         return self.user_repository.get_by_email(email)
     
-    def get_users(self, skip: int = 0, limit: int = 100) -> List[UserModel]:
-        """Get list of users with pagination"""
-        users_query = self.db.query(UserModel).options(joinedload(UserModel.role)).offset(skip).limit(limit)
-        users = users_query.all()
+    def get_users(
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Union[List[UserModel], CursorPage]:
+        """
+        Get list of users with pagination, newest first. Passing `cursor`
+        (empty for the first page) switches from OFFSET paging to keyset
+        paging and returns a CursorPage.
+        """
+        users_query = self.db.query(UserModel).options(joinedload(UserModel.role))
+        next_cursor = None
+        if cursor is not None:
+            users, next_cursor = keyset_page(users_query, UserModel.created_at, UserModel.id, cursor, limit)
+        else:
+            users = users_query.order_by(UserModel.created_at.desc(), UserModel.id.desc()).offset(skip).limit(limit).all()
 
         user_ids = [user.id for user in users]
         if not user_ids: 
-            return []
+            return CursorPage(items=[], next_cursor=None) if cursor is not None else []
         
         order_stats_query = self.db.query(
             OrderModel.user_id,
@@ -83,6 +95,8 @@ class UserService:
                 user.role_value = user.role
          
 
+        if cursor is not None:
+            return CursorPage(items=users, next_cursor=next_cursor)
         return users
 
 
@@ -143,6 +157,7 @@ class UserService:
 
 
         self.db.commit()
+        invalidate_principal(user_id)
         self.db.refresh(user) # Refresh user to get updated data, including role relationship
         return user
 
@@ -170,7 +185,9 @@ class UserService:
         if user_data.password:
             update_data["password_hash"] = get_password_hash(user_data.password)
         
-        return self.user_repository.update(user, update_data)
+        updated_user = self.user_repository.update(user, update_data)
+        invalidate_principal(user_id)
+        return updated_user
     
     def get_user_profile(self, user_id: UUID) -> UserProfile:
         """Get user profile with favorites and other related data"""
@@ -250,7 +267,10 @@ class UserService:
                 detail=f"User with id {user_id} not found"
             )
         
-        return self.user_repository.set_user_role(user, role)
+        updated_user = self.user_repository.set_user_role(user, role)
+        invalidate_principal(user_id)
+        return updated_user
     
     def delete_user(self, user_id: UUID) -> None:
-        self.user_repository.delete(user_id)
\ No newline at end of file
+        self.user_repository.delete(user_id)
+        invalidate_principal(user_id)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import threading
+import weakref
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from cachetools import TTLCache
+
+
+class TTLLRUCache:
+    """
+    Thread-safe, size-bounded cache with per-entry TTL.
+    When full, the least recently used entry is evicted (cachetools.TTLCache).
+    Hit/miss counters are kept for monitoring.
+    """
+
+    _instances: "weakref.WeakSet[TTLLRUCache]" = weakref.WeakSet()
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        TTLLRUCache._instances.add(self)
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, counting a hit or miss"""
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None without touching the hit/miss counters"""
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every key matching predicate, returns the number of dropped entries"""
+        with self._lock:
+            stale_keys = [key for key in list(self._cache.keys()) if predicate(key)]
+            for key in stale_keys:
+                self._cache.pop(key, None)
+            return len(stale_keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    @classmethod
+    def instances(cls) -> List["TTLLRUCache"]:
+        """Live caches, for metrics"""
+        return sorted(cls._instances, key=lambda cache: cache.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,67 @@
+"""
+Email template registry: one shared Jinja2 Environment, templates compiled once
+"""
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
+
+from app.core.config import settings
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "email")
+DEFAULT_BYTECODE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "coffee-shop-email-templates")
+
+
+class EmailTemplateRegistry:
+    """
+    Loads email templates from `template_dir` through one Environment and keeps
+    the compiled Template objects for the life of the process (no mtime checks).
+    With `bytecode_cache_dir` set, compiled bytecode is also stored on disk so a
+    restarted worker skips the parse/compile step.
+    `preload()` compiles everything at startup; otherwise templates are
+    compiled on first use.
+    """
+
+    def __init__(self, template_dir: str, bytecode_cache_dir: Optional[str] = None):
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False,
+            cache_size=-1,
+        )
+        self._templates: Dict[str, Template] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Template:
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    template = self.env.get_template(name)
+                    self._templates[name] = template
+        return template
+
+    def render(self, name: str, **context: Any) -> str:
+        return self.get(name).render(**context)
+
+    def preload(self) -> int:
+        """Compile every template in the directory, returns how many were loaded"""
+        names = self.env.list_templates()
+        for name in names:
+            self.get(name)
+        return len(names)
+
+
+email_templates = EmailTemplateRegistry(
+    template_dir=settings.EMAIL_TEMPLATE_DIR or DEFAULT_TEMPLATE_DIR,
+    bytecode_cache_dir=settings.EMAIL_TEMPLATE_BYTECODE_CACHE_DIR or DEFAULT_BYTECODE_CACHE_DIR,
+)
@@ -1,6 +1,31 @@
+"""
+Application logging: records go through a queue to a listener thread, which
+formats them (JSON or text) and writes them to the console and logs/app.log.
+Modules log through their own `logging.getLogger(__name__)`; app.* loggers
+propagate to the "app" logger configured here, so the record keeps the module
+name (and LOG_SAMPLE_RATES can target it). Callers only pay for creating the
+record and enqueueing it; message args are rendered in the listener, so log
+with %-style args rather than f-strings:
+
+    logger.info("Payment request created: %s", midtrans_response)
+
+Args are therefore rendered after the call returns, so do not pass objects
+that are mutated right after logging.
+"""
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+from app.core.config import settings
 
 # Define log file path
 LOG_DIR = "logs"
@@ -9,9 +34,107 @@ if not os.path.exists(LOG_DIR):
 
 LOG_FILE = os.path.join(LOG_DIR, "app.log")
 
-# Configure logger
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO) # Set the logging level (INFO, DEBUG, WARNING, ERROR, CRITICAL)
+# Set per HTTP request by RequestIdMiddleware, copied onto every record logged while handling it
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including `extra=` fields and the request id"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id; runs on the caller's side, where the context is"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of the DEBUG/INFO records of noisy loggers (and their
+    children); warnings and errors always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rates or record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        while name:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return random.random() < rate
+            name = name.rpartition(".")[0]
+        return True
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"app.services.payment_service=0.1,app.services.mailer=0.5" -> {logger name: rate}"""
+    rates = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, rate = item.partition("=")
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueues records without formatting them (the listener formats), and drops
+    records instead of blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks reference live frames; render them before handing the record over
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+def _formatters(fmt: str):
+    if fmt == "json":
+        return JsonFormatter(), JsonFormatter()
+    return (
+        logging.Formatter('%(name)s - %(levelname)s - [%(request_id)s] %(message)s'),
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'),
+    )
+
 
 # Create handlers
 # Console handler
@@ -19,19 +142,61 @@ c_handler = logging.StreamHandler()
 # File handler (for writing logs to a file, rotating at 5MB, keeping 5 backup files)
 f_handler = RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=5) # 5 MB per file
 
-# Create formatters and add it to handlers
-c_format = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
-f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+c_format, f_format = _formatters(settings.LOG_FORMAT)
 c_handler.setFormatter(c_format)
 f_handler.setFormatter(f_format)
 
-# Add handlers to the logger
-logger.addHandler(c_handler)
-logger.addHandler(f_handler)
+# Both write from the listener thread only
+queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+queue_handler.addFilter(SamplingFilter(parse_sample_rates(settings.LOG_SAMPLE_RATES)))
+queue_handler.addFilter(RequestIdFilter())
+log_listener = QueueListener(queue_handler.queue, c_handler, f_handler, respect_handler_level=True)
+
+# Configure the "app" logger, so every app.* module logger goes through the queue
+app_logger = logging.getLogger("app")
+app_logger.setLevel(settings.LOG_LEVEL)
+app_logger.addHandler(queue_handler)
+
+
+
+def stop_log_listener() -> None:
+    """Drain the queue and stop the listener thread (safe to call twice)"""
+    if log_listener._thread is not None:
+        log_listener.stop()
+
+
+log_listener.start()
+atexit.register(stop_log_listener)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving each HTTP request an id (the incoming X-Request-ID
+    when present) that is added to its log records and echoed in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]}
+            await send(message)
 
-# Example usage:
-# logger.debug("This is a debug message")
-# logger.info("This is an info message")
-# logger.warning("This is a warning message")
-# logger.error("This is an error message")
-# logger.critical("This is a critical message")
\ No newline at end of file
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,353 @@
+"""
+In-process metrics with Prometheus text exposition (served on /metrics)
+
+Metric children are created once per label set (route children are
+preallocated at startup from the app's routes), so recording a request is a
+dict lookup plus a locked increment; nothing is allocated per observation.
+Values that already live elsewhere (pool, caches, email queue) are read by
+collectors at scrape time instead of being mirrored on the hot path.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Request latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+UNMATCHED_ROUTE = "<unmatched>"  # Keeps 404 scans from creating one label set per path
+
+# Outbound calls tracked by external_call(); all label sets exist up front
+EXTERNAL_OPERATIONS = {
+    "midtrans": ("charge", "token", "status"),
+    "smtp": ("connect", "send"),
+    "supabase": ("upload", "delete"),
+}
+
+
+class Sample(NamedTuple):
+    suffix: str
+    labels: Tuple[Tuple[str, str], ...]
+    value: float
+
+
+class MetricFamily(NamedTuple):
+    name: str
+    kind: str  # counter, gauge or histogram
+    help: str
+    samples: List[Sample]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, labels):
+        yield Sample("_total", labels, self.value)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, labels):
+        yield Sample("", labels, self.value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, labels):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        running = 0
+        for bound, count in zip(self.bounds, counts):
+            running += count
+            yield Sample("_bucket", labels + (("le", _format_value(bound)),), running)
+        running += counts[-1]
+        yield Sample("_bucket", labels + (("le", "+Inf"),), running)
+        yield Sample("_sum", labels, total)
+        yield Sample("_count", labels, running)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Optional["MetricsRegistry"] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry or default_registry).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def collect(self) -> MetricFamily:
+        samples = []
+        for values, child in list(self._children.items()):
+            samples.extend(child.samples(tuple(zip(self.labelnames, values))))
+        return MetricFamily(self.name, self.kind, self.help, samples)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional["MetricsRegistry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Collectors run at scrape time, for values kept by other components"""
+        self._collectors.append(collector)
+
+    def collect(self) -> Iterable[MetricFamily]:
+        for metric in self._metrics:
+            yield metric.collect()
+        for collector in self._collectors:
+            yield from collector()
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for sample in family.samples:
+                labels = ",".join(f'{key}="{_escape(value)}"' for key, value in sample.labels)
+                name = family.name + sample.suffix
+                lines.append(f"{name}{{{labels}}} {_format_value(sample.value)}" if labels
+                             else f"{name} {_format_value(sample.value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+default_registry = MetricsRegistry()
+
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"),
+)
+http_requests = Counter("http_requests", "HTTP requests by route and status class", ("method", "route", "status"))
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Database time per HTTP request by route", ("method", "route"),
+)
+external_call_duration = Histogram(
+    "external_call_duration_seconds", "Latency of calls to external services",
+    ("service", "operation", "outcome"), buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+for _service, _operations in EXTERNAL_OPERATIONS.items():
+    for _operation in _operations:
+        for _outcome in ("ok", "error"):
+            external_call_duration.labels(_service, _operation, _outcome)
+
+
+class external_call:
+    """
+    Times one outbound call; an exception leaving the block counts as an
+    error. The error/ok count per operation is the histogram's _count.
+
+        with external_call("midtrans", "charge"):
+            ...
+    """
+    __slots__ = ("_ok", "_error", "_started")
+
+    def __init__(self, service: str, operation: str):
+        self._ok = external_call_duration.labels(service, operation, "ok")
+        self._error = external_call_duration.labels(service, operation, "error")
+
+    def __enter__(self) -> "external_call":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        (self._error if exc_type else self._ok).observe(time.perf_counter() - self._started)
+        return False
+
+
+def preallocate_routes(routes: Iterable[Any]) -> None:
+    """Create the per-route children up front so requests only look them up"""
+    for route in routes:
+        path = getattr(route, "path", None)
+        for method in getattr(route, "methods", None) or ():
+            if path is None:
+                continue
+            http_request_duration.labels(method, path)
+            http_request_db_duration.labels(method, path)
+            for status_class in STATUS_CLASSES:
+                http_requests.labels(method, path, status_class)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording in-flight requests, latency, status class and
+    DB time per route template. Add it inside QueryStatsMiddleware so the
+    request's query stats are visible here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        from app.utils.query_instrumentation import current_query_stats
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            http_request_duration.labels(method, path).observe(time.perf_counter() - started)
+            http_requests.labels(method, path, STATUS_CLASSES[min(max(status_code // 100, 1), 5) - 1]).inc()
+            stats = current_query_stats()
+            if stats is not None:
+                http_request_db_duration.labels(method, path).observe(stats.total_ms / 1000)
+
+
+def _app_state_families() -> Iterable[MetricFamily]:
+    """Pool, cache, email queue and log queue state, read at scrape time"""
+    from app.core.database import async_pool_metrics, pool_metrics
+    from app.services.mailer import email_dispatcher
+    from app.utils.cache import TTLLRUCache
+    from app.utils.logger import queue_handler
+
+    # One family per name, with a sample per engine (a repeated TYPE line fails the whole scrape)
+    checked_out, overflow, timeouts, waits = [], [], [], []
+    for metrics in (pool_metrics, async_pool_metrics):
+        snapshot = metrics.snapshot()
+        labels = (("engine", metrics.name),)
+        checked_out.append(Sample("", labels, snapshot["checked_out"] or 0))
+        overflow.append(Sample("", labels, snapshot["overflow"] or 0))
+        timeouts.append(Sample("_total", labels, snapshot["timeouts"]))
+        histogram = metrics.wait_ms
+        for le, count in histogram.cumulative().items():
+            bound = "+Inf" if le == "+Inf" else _format_value(float(le) / 1000)
+            waits.append(Sample("_bucket", labels + (("le", bound),), count))
+        waits += [Sample("_sum", labels, histogram.sum / 1000), Sample("_count", labels, histogram.count)]
+    yield MetricFamily("db_pool_checked_out", "gauge", "Connections checked out of the pool", checked_out)
+    yield MetricFamily("db_pool_overflow", "gauge", "Connections open beyond pool_size", overflow)
+    yield MetricFamily("db_pool_timeouts", "counter", "Pool checkouts that timed out", timeouts)
+    yield MetricFamily("db_pool_checkout_wait_seconds", "histogram", "Time to get a pooled connection", waits)
+
+    hits, misses, sizes = [], [], []
+    for cache in TTLLRUCache.instances():
+        stats = cache.stats()
+        labels = (("cache", stats["name"]),)
+        hits.append(Sample("_total", labels, stats["hits"]))
+        misses.append(Sample("_total", labels, stats["misses"]))
+        sizes.append(Sample("", labels, stats["size"]))
+    yield MetricFamily("cache_hits", "counter", "Cache hits", hits)
+    yield MetricFamily("cache_misses", "counter", "Cache misses", misses)
+    yield MetricFamily("cache_entries", "gauge", "Entries currently cached", sizes)
+
+    yield MetricFamily("email_queue_depth", "gauge", "Emails waiting to be sent",
+                       [Sample("", (), email_dispatcher.queue_depth())])
+    yield MetricFamily("emails", "counter", "Email outcomes",
+                       [Sample("_total", (("outcome", key),), value)
+                        for key, value in email_dispatcher.stats.items() if isinstance(value, (int, float))])
+
+    yield MetricFamily("log_records_dropped", "counter", "Log records dropped because the log queue was full",
+                       [Sample("_total", (), queue_handler.dropped)])
+
+
+default_registry.add_collector(_app_state_families)
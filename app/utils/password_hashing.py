@@ -0,0 +1,121 @@
+"""
+bcrypt hashing and verification on a bounded process pool
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# Changing PASSWORD_BCRYPT_ROUNDS marks existing hashes as deprecated,
+# they are rehashed on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in worker processes so a login burst neither holds the GIL nor
+    blocks the event loop. At most `max_pending` jobs may be queued or running;
+    beyond that callers get 429 instead of piling up behind the pool.
+    With workers=0 everything runs inline (scripts, debugging).
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after_seconds: int = 1):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after_seconds = retry_after_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.rejected = 0
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_password, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run(_verify_password, plain_password, hashed_password)
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash uses outdated settings"""
+        return self._run(_verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
+
+    def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if not self.workers:
+            return func(*args)
+        return self._submit(func, *args).result()
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool and retry once
+            self.shutdown()
+            try:
+                future = self._get_executor().submit(func, *args)
+            except BaseException:
+                self._slots.release()
+                raise
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the module (alembic, scripts) does not start processes.
+        # forkserver: workers are not forked from the threaded server process, so they
+        # inherit none of its locks, sockets or DB connections
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._executor
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,140 @@
+"""
+Connection pool instrumentation: checkout wait times, pool occupancy and connection age
+"""
+import bisect
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram (cumulative, Prometheus-style buckets)"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def cumulative(self) -> Dict[str, int]:
+        with self._lock:
+            counts = list(self._counts)
+        buckets, running = {}, 0
+        for bound, count in zip(self.bounds + (float("inf"),), counts):
+            running += count
+            buckets["+Inf" if bound == float("inf") else f"{bound:g}"] = running
+        return buckets
+
+
+class PoolMetrics:
+    """
+    Counters and gauges of one engine's pool, fed by pool events. Checkout
+    wait is timed around the pool's internal get (there is no "waiting"
+    event), so it covers both queueing for a busy pool and opening a new
+    connection.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wait_ms = Histogram(WAIT_BUCKETS_MS)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self._born: Dict[int, float] = {}  # id(connection record) -> monotonic connect time
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+
+    def pool_class(self, base: Type[Pool]) -> Type[Pool]:
+        """
+        Subclass of `base` that times checkouts into these metrics. Attached to
+        the class rather than the instance so pools recreated by dispose() keep it.
+        """
+        metrics = self
+
+        class InstrumentedPool(base):
+            def _do_get(self):
+                started = time.perf_counter()
+                try:
+                    return super()._do_get()
+                except exc.TimeoutError:
+                    with metrics._lock:
+                        metrics.timeouts += 1
+                    raise
+                finally:
+                    metrics.wait_ms.observe((time.perf_counter() - started) * 1000)
+
+        InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+        return InstrumentedPool
+
+    def attach(self, engine: Engine) -> None:
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        with self._lock:
+            self.connects += 1
+            self._born[id(connection_record)] = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_close(self, dbapi_connection: Any, connection_record: Any) -> None:
+        with self._lock:
+            self.closes += 1
+            self._born.pop(id(connection_record), None)
+
+    def _on_invalidate(self, dbapi_connection: Any, connection_record: Any, exception: Optional[BaseException]) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - born for born in self._born.values()]
+        pool = self._engine.pool if self._engine is not None else None
+        waits = self.wait_ms
+        return {
+            "name": self.name,
+            "pool_size": pool.size() if pool is not None else None,
+            "checked_out": pool.checkedout() if pool is not None else None,
+            "checked_in": pool.checkedin() if pool is not None else None,
+            "overflow": pool.overflow() if pool is not None else None,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "closes": self.closes,
+            "invalidations": self.invalidations,
+            "wait_ms": {
+                "count": waits.count,
+                "avg": round(waits.sum / waits.count, 3) if waits.count else 0.0,
+                "max": round(waits.max, 3),
+                "buckets": waits.cumulative(),
+            },
+            "connection_age_seconds": {
+                "open": len(ages),
+                "avg": round(sum(ages) / len(ages), 1) if ages else 0.0,
+                "max": round(max(ages), 1) if ages else 0.0,
+            },
+        }
@@ -0,0 +1,146 @@
+"""
+Per-request SQL statement counting, Server-Timing headers and slow-query logging
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Statements run in one scope (request or count_queries block). Statements
+    also count toward the enclosing scope, so a query_budget around a test
+    client call sees the request's statements.
+    """
+
+    def __init__(self, scope: Optional[Dict[str, Any]] = None, record: bool = False,
+                 parent: Optional["QueryStats"] = None):
+        self.scope = scope  # ASGI scope, for the matched route
+        self.parent = parent
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Optional[List[str]] = [] if record else None
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "-"
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path", "-")
+        return f"{self.scope.get('method', '')} {path}".strip()
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the current request or count_queries block, None outside both"""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed_ms = (time.perf_counter() - conn.info["query_started_at"].pop()) * 1000
+    stats = _current_stats.get()
+    scope_stats = stats
+    while scope_stats is not None:
+        scope_stats.count += 1
+        scope_stats.total_ms += elapsed_ms
+        if scope_stats.statements is not None:
+            scope_stats.statements.append(statement)
+        scope_stats = scope_stats.parent
+    if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        route = stats.route if stats is not None else "-"
+        logger.warning("Slow query (%.1f ms) on %s: %.2000s", elapsed_ms, route, " ".join(statement.split()))
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not run for failed statements; drop their start time
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement of `engine` (pass async_engine.sync_engine for asyncio engines)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def count_queries(record: bool = True) -> Iterator[QueryStats]:
+    """Count the statements run inside the block (also across to_thread/threadpool calls it makes)"""
+    stats = QueryStats(record=record, parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Regression guard for hot paths: fails with AssertionError, listing the
+    statements, when the block runs more than `max_queries` statements.
+    Tests use it through the `query_budget` fixture (tests/conftest.py):
+
+        with query_budget(4):
+            await client.get("/api/v1/orders/payable")
+    """
+    with count_queries(record=True) as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {i + 1}. {' '.join(s.split())[:200]}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"{stats.count} queries, budget is {max_queries}:\n{listing}")
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that counts the statements of each HTTP request, adds a
+    Server-Timing header and warns about requests over the query budget
+    (typically an N+1). Plain ASGI rather than BaseHTTPMiddleware, so the
+    header is added as the response starts and streamed bodies are not
+    buffered.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope, parent=_current_stats.get())
+        token = _current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            if stats.count > settings.REQUEST_QUERY_WARN_COUNT:
+                logger.warning("%d queries (%.1f ms) on %s", stats.count, stats.total_ms, stats.route)
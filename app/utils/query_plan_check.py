@@ -0,0 +1,197 @@
+"""
+Query-plan regression check for the hot service queries.
+
+Runs EXPLAIN on each query and reports every checked table that is read with
+a sequential scan (tests/test_query_plans.py, scripts/check_query_plans.py).
+
+By default sequential scans are disabled for the session (enable_seqscan=off),
+so a small or empty dev database still shows whether an index *can* serve the
+predicate; a Seq Scan that survives that means no usable index exists. Pass
+respect_costs=True on a seeded, production-sized database to check the plans
+the planner actually picks.
+"""
+import json
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Set
+
+from sqlalchemy import desc, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+from app.models.booking import BookingModel, BookingStatus, BookingTableModel, TableModel
+from app.models.coffee import CoffeeMenuModel, CoffeeVariantModel
+from app.models.notification import NotificationModel, RatingModel, UserFavoriteModel
+from app.models.order import OrderItemModel, OrderModel, OrderStatus, TransactionModel
+from app.models.order_status_history import OrderStatusHistoryModel
+
+
+class PlanCheck(NamedTuple):
+    name: str
+    build: Callable[[Session], Query]
+    tables: Set[str]  # Tables that must not be sequentially scanned
+
+
+_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+PLAN_CHECKS: List[PlanCheck] = [
+    PlanCheck(
+        "order history of a user",
+        lambda db: db.query(OrderModel).filter(OrderModel.user_id == _ID)
+        .order_by(desc(OrderModel.ordered_at)).limit(20),
+        {"orders"},
+    ),
+    PlanCheck(
+        "orders paid by a user",
+        lambda db: db.query(OrderModel).filter(OrderModel.paid_by_user_id == _ID),
+        {"orders"},
+    ),
+    PlanCheck(
+        "orders by status, newest first",
+        lambda db: db.query(OrderModel).filter(OrderModel.status == OrderStatus.READY)
+        .order_by(desc(OrderModel.ordered_at)).limit(50),
+        {"orders"},
+    ),
+    PlanCheck(
+        "pay-for-others feed",
+        lambda db: db.query(OrderModel).filter(
+            OrderModel.status == OrderStatus.PENDING,
+            OrderModel.paid_by_user_id.is_(None),
+            OrderModel.user_id != _ID,
+        ).order_by(desc(OrderModel.ordered_at)).limit(20),
+        {"orders"},
+    ),
+    PlanCheck(
+        "orders of a shop, newest first",
+        lambda db: db.query(OrderModel).filter(OrderModel.coffee_shop_id == _ID)
+        .order_by(desc(OrderModel.ordered_at)).limit(50),
+        {"orders"},
+    ),
+    PlanCheck(
+        "admin order list, keyset page",
+        lambda db: db.query(OrderModel).filter(
+            tuple_(OrderModel.created_at, OrderModel.id) < tuple_(text("now()"), _ID)
+        ).order_by(desc(OrderModel.created_at), desc(OrderModel.id)).limit(50),
+        {"orders"},
+    ),
+    PlanCheck(
+        "orders in a date range",
+        lambda db: db.query(OrderModel).filter(
+            OrderModel.ordered_at >= text("now() - interval '1 day'"),
+            OrderModel.ordered_at < text("now()"),
+        ),
+        {"orders"},
+    ),
+    PlanCheck(
+        "items of an order",
+        lambda db: db.query(OrderItemModel).filter(OrderItemModel.order_id == _ID),
+        {"order_items"},
+    ),
+    PlanCheck(
+        "order items of a menu item",
+        lambda db: db.query(OrderItemModel).filter(OrderItemModel.coffee_id == _ID),
+        {"order_items"},
+    ),
+    PlanCheck(
+        "latest transaction of an order",
+        lambda db: db.query(TransactionModel).filter(TransactionModel.order_id == _ID)
+        .order_by(TransactionModel.created_at.desc()).limit(1),
+        {"transactions"},
+    ),
+    PlanCheck(
+        "order status history",
+        lambda db: db.query(OrderStatusHistoryModel).filter(OrderStatusHistoryModel.order_id == _ID)
+        .order_by(OrderStatusHistoryModel.changed_at),
+        {"order_status_history"},
+    ),
+    PlanCheck(
+        "booked tables of a shop on a day",
+        lambda db: db.query(BookingModel.booking_date, BookingTableModel.table_id)
+        .join(BookingTableModel, BookingTableModel.booking_id == BookingModel.id)
+        .join(TableModel, TableModel.id == BookingTableModel.table_id)
+        .filter(
+            TableModel.coffee_shop_id == _ID,
+            BookingModel.booking_date >= text("date_trunc('day', now())"),
+            BookingModel.booking_date < text("date_trunc('day', now()) + interval '1 day'"),
+            BookingModel.status.in_([BookingStatus.NOCONFIRM, BookingStatus.CONFIRM, BookingStatus.SUCCESS]),
+        ),
+        {"bookings", "tables"},
+    ),
+    PlanCheck(
+        "tables of a booking",
+        lambda db: db.query(BookingTableModel).filter(BookingTableModel.booking_id == _ID),
+        {"booking_tables"},
+    ),
+    PlanCheck(
+        "bookings of a user",
+        lambda db: db.query(BookingModel).filter(BookingModel.user_id == _ID)
+        .order_by(BookingModel.booking_date.desc()),
+        {"bookings"},
+    ),
+    PlanCheck(
+        "menu of a shop",
+        lambda db: db.query(CoffeeMenuModel).filter(CoffeeMenuModel.coffee_shop_id == _ID),
+        {"coffee_menus"},
+    ),
+    PlanCheck(
+        "variants of a menu item",
+        lambda db: db.query(CoffeeVariantModel).filter(CoffeeVariantModel.coffee_id == _ID),
+        {"coffee_variants"},
+    ),
+    PlanCheck(
+        "ratings of a menu item",
+        lambda db: db.query(RatingModel).filter(RatingModel.coffee_id == _ID),
+        {"ratings"},
+    ),
+    PlanCheck(
+        "favorite lookup",
+        lambda db: db.query(UserFavoriteModel).filter(
+            UserFavoriteModel.user_id == _ID,
+            UserFavoriteModel.coffee_id == _ID,
+        ),
+        {"user_favorites"},
+    ),
+    PlanCheck(
+        "unread notifications of a user",
+        lambda db: db.query(NotificationModel).filter(
+            NotificationModel.user_id == _ID,
+            NotificationModel.is_read.is_(False),
+        ),
+        {"notifications"},
+    ),
+]
+
+
+def _walk(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(db: Session, query: Query) -> Dict[str, Any]:
+    sql = query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    raw = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+
+
+def seq_scanned_tables(plan: Dict[str, Any]) -> Set[str]:
+    return {node["Relation Name"] for node in _walk(plan) if node.get("Node Type") == "Seq Scan"}
+
+
+def run_plan_checks(db: Session, respect_costs: bool = False) -> List[str]:
+    """Returns one message per regressed query, empty when all plans use indexes"""
+    # Inside a savepoint, so rolling it back undoes SET LOCAL without ending
+    # the caller's transaction
+    savepoint = db.begin_nested()
+    try:
+        if not respect_costs:
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+
+        failures = []
+        for check in PLAN_CHECKS:
+            regressed = seq_scanned_tables(explain(db, check.build(db))) & check.tables
+            if regressed:
+                failures.append(f"{check.name}: sequential scan on {', '.join(sorted(regressed))}")
+    finally:
+        savepoint.rollback()
+    return failures
+
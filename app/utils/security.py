@@ -4,31 +4,30 @@ Security utilities for authentication and authorization
 from datetime import datetime, timedelta
 import secrets
 import string
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, NamedTuple, Optional
 from uuid import UUID
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import UserModel, Role
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.cache import TTLLRUCache
+from app.utils.password_hashing import password_hasher, pwd_context
 
 # OAuth2 setup for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify plain password against hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify plain password against hashed password (runs on the hashing pool)"""
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash password"""
-    return pwd_context.hash(password)
+    """Hash password (runs on the hashing pool)"""
+    return password_hasher.hash(password)
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a new JWT access token"""
@@ -59,11 +58,74 @@ def create_verification_token(length: int = 64) -> str:
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
+class PrincipalRole(NamedTuple):
+    id: UUID
+    role: Role
+
+
+class AuthenticatedUser(NamedTuple):
+    """
+    Detached snapshot of the authenticated user, cached between requests.
+    Exposes the attributes routes use on current_user (role.role included),
+    so admin checks need no extra query.
+    """
+    id: UUID
+    name: str
+    email: str
+    phone_number: Optional[str]
+    is_active: bool
+    is_verified: bool
+    role: PrincipalRole
+
+    @property
+    def role_enum(self) -> Role:
+        return self.role.role
+
+
+# Principal cache keyed by user id; a short TTL bounds staleness across workers
+principal_cache = TTLLRUCache(
+    "auth_principals",
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Time spent resolving current_user, split by cache hit / database lookup
+_auth_timings = {"cache": [0, 0.0], "database": [0, 0.0]}
+
+
+def invalidate_principal(user_id: UUID) -> None:
+    """Drop a cached principal after its role, flags, profile or password changed"""
+    principal_cache.invalidate(lambda key: key == user_id)
+
+
+def get_principal_cache_stats() -> Dict[str, Any]:
+    stats = principal_cache.stats()
+    for source, (count, total_seconds) in _auth_timings.items():
+        stats[f"{source}_resolutions"] = count
+        stats[f"{source}_avg_ms"] = round(total_seconds * 1000 / count, 3) if count else 0.0
+    return stats
+
+
+def _load_principal(db: Session, user_id: UUID) -> Optional[AuthenticatedUser]:
+    """Load the user with its role in one query"""
+    user = db.query(UserModel).options(joinedload(UserModel.role)).filter(UserModel.id == user_id).first()
+    if user is None:
+        return None
+    return AuthenticatedUser(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        phone_number=user.phone_number,
+        is_active=user.is_active,
+        is_verified=user.is_verified,
+        role=PrincipalRole(id=user.role.id, role=user.role.role),
+    )
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> UserModel:
-    """Get current authenticated user"""
+) -> AuthenticatedUser:
+    """Get current authenticated user (cached principal, see principal_cache)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -78,10 +140,24 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(UserModel).filter(UserModel.id == UUID(user_id)).first()
-    if user is None:
+    try:
+        user_uuid = UUID(user_id)
+    except ValueError:
         raise credentials_exception
     
+    started = time.perf_counter()
+    user = principal_cache.get(user_uuid)
+    source = "cache"
+    if user is None:
+        source = "database"
+        user = _load_principal(db, user_uuid)
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(user_uuid, user)
+    timing = _auth_timings[source]
+    timing[0] += 1
+    timing[1] += time.perf_counter() - started
+    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -97,8 +173,8 @@ async def get_current_user(
     return user
 
 async def get_current_admin_user(
-    current_user: UserModel = Depends(get_current_user)
-) -> UserModel:
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """Get current user and verify they are an admin"""
     if current_user.role.role != Role.ADMIN:
         raise HTTPException(
@@ -7,6 +7,7 @@ import re
 
 # Import your settings object
 from app.core.config import settings
+from app.utils.metrics import external_call
 
 supabase_client: Client = None
 
@@ -55,11 +56,12 @@ async def upload_file_to_supabase(upload_file: UploadFile, subdirectory: Optiona
 
         contents = await upload_file.read()
 
-        response_data = supabase_client.storage.from_(settings.SUPABASE_BUCKET_NAME).upload( # Use settings.SUPABASE_BUCKET_NAME
-            file=contents,
-            path=destination_path,
-            file_options={"content-type": upload_file.content_type, "upsert": "true"}
-        )
+        with external_call("supabase", "upload"):
+            response_data = supabase_client.storage.from_(settings.SUPABASE_BUCKET_NAME).upload( # Use settings.SUPABASE_BUCKET_NAME
+                file=contents,
+                path=destination_path,
+                file_options={"content-type": upload_file.content_type, "upsert": "true"}
+            )
 
         public_url = supabase_client.storage.from_(settings.SUPABASE_BUCKET_NAME).get_public_url(destination_path) # Use settings.SUPABASE_BUCKET_NAME
         
@@ -99,7 +101,8 @@ async def delete_file_from_supabase(file_url: str):
     try:
         path_to_delete = '/'.join(path_in_bucket.split('/')[1:]) # Extract path relative to bucket, assuming bucket name is first segment
 
-        response = supabase_client.storage.from_(settings.SUPABASE_BUCKET_NAME).remove([path_in_bucket]) # Use settings.SUPABASE_BUCKET_NAME
+        with external_call("supabase", "delete"):
+            response = supabase_client.storage.from_(settings.SUPABASE_BUCKET_NAME).remove([path_in_bucket]) # Use settings.SUPABASE_BUCKET_NAME
 
         if isinstance(response, list) and all(isinstance(item, dict) and item.get('status') == '200' for item in response):
             print(f"Successfully deleted Supabase file: {path_in_bucket}")
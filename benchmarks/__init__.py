@@ -0,0 +1,10 @@
+"""
+Benchmarks and load tests, kept out of the application package. Run them
+from the repository root, e.g.:
+
+    python -m benchmarks.dashboard_summary --orders 20000
+    python -m benchmarks.load_test --url http://localhost:8000 --workers 4
+
+Benchmarks that seed data do it inside a transaction that is rolled back,
+so they can run against a development database.
+"""
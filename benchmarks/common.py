@@ -0,0 +1,187 @@
+"""
+Shared benchmark helpers: a rolled-back session, a seeded dataset and
+latency/round-trip measurement
+"""
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.database import Base, engine
+from app.models import (
+    BookingModel,
+    BookingStatus,
+    BookingTableModel,
+    CoffeeMenuModel,
+    CoffeeShopModel,
+    CoffeeVariantModel,
+    OrderItemModel,
+    OrderModel,
+    OrderStatus,
+    Role,
+    RoleModel,
+    TableModel,
+    UserModel,
+    VariantModel,
+    VariantTypeModel,
+)
+from app.utils.query_instrumentation import count_queries
+
+
+class Timing(NamedTuple):
+    queries: int  # Statements per call
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+
+
+class Dataset(NamedTuple):
+    shop_ids: List[uuid.UUID]
+    user_ids: List[uuid.UUID]
+    menu_ids_by_shop: Dict[uuid.UUID, List[uuid.UUID]]
+    variant_ids_by_menu: Dict[uuid.UUID, List[uuid.UUID]]
+
+
+@contextmanager
+def rolled_back_session() -> Iterator[Session]:
+    """Session on one connection whose work, seed data included, is rolled back at the end"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    Base.metadata.create_all(connection)
+    session = Session(bind=connection, autoflush=False)
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+def measure(run: Callable[[], Any], repeat: int, warmup: int = 2) -> Timing:
+    """Time `run` `repeat` times after a warm up; queries are counted on the last call"""
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(repeat):
+        with count_queries(record=False) as stats:
+            started = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - started) * 1000)
+    return Timing(stats.count, statistics.fmean(samples), percentile(samples, 50), percentile(samples, 95))
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def _rows(model, rows: List[Dict[str, Any]], db: Session, now: datetime) -> None:
+    for row in rows:
+        row.setdefault("id", uuid.uuid4())
+        row.setdefault("created_at", now)
+        row.setdefault("updated_at", now)
+    if rows:
+        db.execute(insert(model), rows)
+
+
+def seed_dataset(
+    db: Session,
+    shops: int = 5,
+    users: int = 200,
+    menus_per_shop: int = 20,
+    variants_per_menu: int = 3,
+    orders: int = 5000,
+    items_per_order: int = 3,
+    bookings: int = 1000,
+    tables_per_shop: int = 10,
+    days: int = 60,
+    seed: int = 42,
+) -> Dataset:
+    """
+    Shops with menus, variants and tables, users, and orders/bookings spread
+    over the last `days` days (and the coming week for bookings). Names carry
+    a random suffix so seeding works next to existing data.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    suffix = uuid.uuid4().hex[:8]
+
+    role_id = db.query(RoleModel.id).filter(RoleModel.role == Role.USER).scalar()
+    if role_id is None:
+        role_id = uuid.uuid4()
+        _rows(RoleModel, [{"id": role_id, "role": Role.USER}], db, now)
+
+    user_rows = [{"name": f"Bench User {i}", "email": f"bench-{suffix}-{i}@example.com",
+                  "password_hash": "x", "is_active": True, "is_verified": True, "role_id": role_id}
+                 for i in range(users)]
+    shop_rows = [{"name": f"Bench Shop {suffix} {i}", "address": "Jl. Benchmark", "average_rating": 0.0,
+                  "total_ratings": 0} for i in range(shops)]
+    variant_type_id = uuid.uuid4()
+    variant_rows = [{"name": f"Bench Variant {i}", "additional_price": 1000 * i, "is_available": True,
+                     "variant_type_id": variant_type_id} for i in range(variants_per_menu)]
+    _rows(UserModel, user_rows, db, now)
+    _rows(CoffeeShopModel, shop_rows, db, now)
+    _rows(VariantTypeModel, [{"id": variant_type_id, "name": f"Bench Size {suffix}", "is_required": False}], db, now)
+    _rows(VariantModel, variant_rows, db, now)
+
+    menu_rows, menu_prices, menu_ids_by_shop = [], {}, {}
+    table_rows, table_ids_by_shop = [], {}
+    for shop in shop_rows:
+        for i in range(menus_per_shop):
+            menu_id, price = uuid.uuid4(), rng.randrange(15, 60) * 1000
+            menu_rows.append({"id": menu_id, "name": f"Bench Menu {i}", "price": price, "is_available": True,
+                              "featured": False, "rating_sum": 0, "average_rating": 0.0, "total_ratings": 0,
+                              "coffee_shop_id": shop["id"]})
+            menu_prices[menu_id] = price
+            menu_ids_by_shop.setdefault(shop["id"], []).append(menu_id)
+        for i in range(tables_per_shop):
+            table_id = uuid.uuid4()
+            table_rows.append({"id": table_id, "table_number": str(i + 1), "capacity": rng.choice((2, 4, 6)),
+                               "is_available": True, "coffee_shop_id": shop["id"]})
+            table_ids_by_shop.setdefault(shop["id"], []).append(table_id)
+    _rows(CoffeeMenuModel, menu_rows, db, now)
+    _rows(TableModel, table_rows, db, now)
+    _rows(CoffeeVariantModel, [{"coffee_id": menu["id"], "variant_id": variant["id"], "is_default": False}
+                               for menu in menu_rows for variant in variant_rows], db, now)
+
+    user_ids = [user["id"] for user in user_rows]
+    shop_ids = [shop["id"] for shop in shop_rows]
+    statuses = [OrderStatus.COMPLETED] * 7 + [OrderStatus.PENDING, OrderStatus.CANCELLED, OrderStatus.CONFIRMED]
+    order_rows, item_rows = [], []
+    for i in range(orders):
+        shop_id = rng.choice(shop_ids)
+        order_id = uuid.uuid4()
+        total = 0
+        for menu_id in rng.sample(menu_ids_by_shop[shop_id], min(items_per_order, menus_per_shop)):
+            quantity = rng.randint(1, 3)
+            total += menu_prices[menu_id] * quantity
+            item_rows.append({"order_id": order_id, "coffee_id": menu_id, "quantity": quantity,
+                              "subtotal": menu_prices[menu_id] * quantity})
+        order_rows.append({"id": order_id, "order_id": f"BENCH-{suffix}-{i}", "status": rng.choice(statuses),
+                           "total_price": total, "ordered_at": now - timedelta(minutes=rng.randrange(days * 24 * 60)),
+                           "user_id": rng.choice(user_ids), "coffee_shop_id": shop_id})
+    _rows(OrderModel, order_rows, db, now)
+    _rows(OrderItemModel, item_rows, db, now)
+
+    booking_rows, booking_table_rows = [], []
+    for i in range(bookings):
+        shop_id = rng.choice(shop_ids)
+        booking_id = uuid.uuid4()
+        booking_rows.append({"id": booking_id, "booking_id": f"BENCH-BK-{suffix}-{i}", "table_count": 1,
+                             "guest_count": rng.randint(1, 6), "status": rng.choice(list(BookingStatus)),
+                             "booking_date": now + timedelta(hours=rng.randrange(-days * 24, 7 * 24)),
+                             "booking_reminder_sent": False, "user_id": rng.choice(user_ids)})
+        booking_table_rows.append({"booking_id": booking_id, "table_id": rng.choice(table_ids_by_shop[shop_id])})
+    _rows(BookingModel, booking_rows, db, now)
+    _rows(BookingTableModel, booking_table_rows, db, now)
+    db.flush()
+
+    variant_ids = [variant["id"] for variant in variant_rows]
+    return Dataset(shop_ids, user_ids, menu_ids_by_shop, {menu["id"]: variant_ids for menu in menu_rows})
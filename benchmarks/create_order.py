@@ -0,0 +1,103 @@
+"""
+order_service.create_order latency and round trips against cart size: the
+previous per-item lookups and inserts (before) vs batched lookups and bulk
+inserts (after), on a seeded dataset
+
+    python -m benchmarks.create_order --sizes 1,5,10,25,50 --variants 2 --repeat 30
+"""
+import argparse
+import uuid
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.models import (
+    CoffeeMenuModel,
+    CoffeeVariantModel,
+    OrderItemModel,
+    OrderItemVariantModel,
+    OrderModel,
+    OrderStatus,
+    VariantModel,
+)
+from app.models.order_status_history import OrderStatusHistoryModel
+from app.schemas.order_schema import OrderCreate
+from app.services.order_service import order_service
+from benchmarks.common import measure, rolled_back_session, seed_dataset
+
+
+def legacy_create_order(db: Session, order_data: OrderCreate, user_id: uuid.UUID) -> OrderModel:
+    """create_order before batching: three lookups per item/variant and a flush per item"""
+    total_price = 0
+    order_items_data = []
+    for item in order_data.order_items:
+        coffee = db.query(CoffeeMenuModel).filter_by(id=item.coffee_id).first()
+        if not coffee or not coffee.is_available:
+            raise ValueError(f"Coffee with ID {item.coffee_id} not available")
+        item_price = coffee.price
+        for variant_data in item.variants:
+            variant = db.query(VariantModel).filter_by(id=variant_data.variant_id).first()
+            if not variant or not variant.is_available:
+                raise ValueError(f"Variant with ID {variant_data.variant_id} not available")
+            coffee_variant = db.query(CoffeeMenuModel).join(CoffeeMenuModel.coffee_variants)\
+                .filter(CoffeeMenuModel.id == coffee.id, CoffeeVariantModel.variant_id == variant.id).first()
+            if not coffee_variant:
+                raise ValueError(f"Variant {variant.name} is not available for coffee {coffee.name}")
+            item_price += variant.additional_price
+        subtotal = item_price * item.quantity
+        total_price += subtotal
+        order_items_data.append((item, subtotal))
+
+    order = OrderModel(
+        order_id=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+        user_id=user_id,
+        total_price=total_price,
+        status=OrderStatus.PENDING,
+        ordered_at=datetime.utcnow(),
+        delivery_method=order_data.delivery_info.delivery_method,
+        recipient_name=order_data.delivery_info.name,
+        recipient_phone_number=order_data.delivery_info.phone_number,
+    )
+    db.add(order)
+    db.flush()
+    for item, subtotal in order_items_data:
+        order_item = OrderItemModel(order_id=order.id, coffee_id=item.coffee_id, quantity=item.quantity, subtotal=subtotal)
+        db.add(order_item)
+        db.flush()
+        for variant_data in item.variants:
+            db.add(OrderItemVariantModel(order_item_id=order_item.id, variant_id=variant_data.variant_id))
+
+    db.add(OrderStatusHistoryModel(order_id=order.id, old_status=None, new_status=OrderStatus.PENDING,
+                                   changed_by_user_id=user_id, notes="Order created", changed_at=datetime.utcnow()))
+    db.commit()
+    db.refresh(order)
+    return order
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="create_order latency vs cart size, before vs after")
+    parser.add_argument("--sizes", default="1,5,10,25,50", help="comma separated cart sizes (distinct items)")
+    parser.add_argument("--variants", type=int, default=2, help="variants per item")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with rolled_back_session() as db:
+        dataset = seed_dataset(db, shops=1, users=10, menus_per_shop=max(sizes),
+                               variants_per_menu=max(args.variants, 1), orders=0, bookings=0)
+        menu_ids = dataset.menu_ids_by_shop[dataset.shop_ids[0]]
+        user_id = dataset.user_ids[0]
+        print(f"{args.variants} variant(s) per item, {args.repeat} orders per run (rolled back afterwards)")
+        print(f"{'items':>5s} {'variant':7s} {'queries':>7s} {'mean ms':>9s} {'p50 ms':>9s} {'p95 ms':>9s}")
+        for size in sizes:
+            order_data = OrderCreate(
+                order_items=[{"coffee_id": menu_id, "quantity": 1,
+                              "variants": [{"variant_id": variant_id}
+                                           for variant_id in dataset.variant_ids_by_menu[menu_id][:args.variants]]}
+                             for menu_id in menu_ids[:size]],
+                delivery_info={"name": "Bench", "phone_number": "0800000000", "delivery_method": "pickup"},
+            )
+            for variant, create in (("before", legacy_create_order), ("after", order_service.create_order)):
+                timing = measure(lambda: create(db, order_data, user_id), args.repeat)
+                print(f"{size:5d} {variant:7s} {timing.queries:7d} {timing.mean_ms:9.2f} "
+                      f"{timing.p50_ms:9.2f} {timing.p95_ms:9.2f}")
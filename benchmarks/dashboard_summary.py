@@ -0,0 +1,114 @@
+"""
+Dashboard summary: round trips and latency of the previous one-query-per-
+metric implementation (before) and admin_analytics_service.get_dashboard_summary
+(after), on a seeded dataset, globally and for one shop
+
+    python -m benchmarks.dashboard_summary --orders 20000 --bookings 4000 --repeat 50
+"""
+import argparse
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, distinct, func, or_
+from sqlalchemy.orm import Session
+
+from app.models import (
+    BookingModel,
+    BookingStatus,
+    BookingTableModel,
+    CoffeeMenuModel,
+    OrderItemModel,
+    OrderModel,
+    OrderStatus,
+    TableModel,
+    UserModel,
+)
+from app.services.admin_analytics_service import admin_analytics_service
+from benchmarks.common import measure, rolled_back_session, seed_dataset
+
+
+def legacy_dashboard_summary(db: Session, coffee_shop_id: Optional[UUID]) -> Dict[str, Any]:
+    """The queries of the implementation before the conditional-aggregate rewrite, one per metric"""
+    today = date.today()
+    this_month_start = today.replace(day=1)
+    last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
+    last_month_end = this_month_start - timedelta(days=1)
+
+    orders_base_query = db.query(OrderModel).filter(OrderModel.status == OrderStatus.COMPLETED)
+    bookings_base_query = db.query(BookingModel).filter(BookingModel.status == BookingStatus.SUCCESS)
+
+    def by_shop_items(query):
+        if not coffee_shop_id:
+            return query
+        return query.join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
+                    .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
+                    .filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+
+    def by_shop_tables(query):
+        if not coffee_shop_id:
+            return query
+        return query.join(BookingTableModel, BookingModel.id == BookingTableModel.booking_id)\
+                    .join(TableModel, BookingTableModel.table_id == TableModel.id)\
+                    .filter(TableModel.coffee_shop_id == coffee_shop_id)
+
+    orders_base_query = by_shop_items(orders_base_query)
+    bookings_base_query = by_shop_tables(bookings_base_query)
+    ordered_today = func.date(OrderModel.ordered_at) == today
+    ordered_last_month = and_(OrderModel.ordered_at >= last_month_start, OrderModel.ordered_at <= last_month_end)
+
+    top_selling = db.query(CoffeeMenuModel.name)\
+        .join(OrderItemModel, CoffeeMenuModel.id == OrderItemModel.coffee_id)\
+        .join(OrderModel, OrderItemModel.order_id == OrderModel.id)\
+        .filter(ordered_today, OrderModel.status == OrderStatus.COMPLETED)
+    if coffee_shop_id:
+        top_selling = top_selling.filter(CoffeeMenuModel.coffee_shop_id == coffee_shop_id)
+
+    return {
+        "revenue_today": orders_base_query.filter(ordered_today).with_entities(func.sum(OrderModel.total_price)).scalar() or 0,
+        "revenue_this_month": orders_base_query.filter(OrderModel.ordered_at >= this_month_start)
+                                               .with_entities(func.sum(OrderModel.total_price)).scalar() or 0,
+        "orders_today": orders_base_query.filter(ordered_today).count(),
+        "orders_this_month": orders_base_query.filter(OrderModel.ordered_at >= this_month_start).count(),
+        "bookings_today": bookings_base_query.filter(func.date(BookingModel.booking_date) == today).count(),
+        "bookings_this_month": bookings_base_query.filter(BookingModel.booking_date >= this_month_start).count(),
+        "active_users_today": by_shop_items(db.query(func.count(distinct(OrderModel.user_id))).filter(ordered_today))
+                              .scalar() or 0,
+        "active_users_this_month": by_shop_items(db.query(func.count(distinct(OrderModel.user_id)))
+                                                 .filter(OrderModel.ordered_at >= this_month_start)).scalar() or 0,
+        "total_users": db.query(UserModel).count(),
+        "total_menu_items": db.query(CoffeeMenuModel).filter(CoffeeMenuModel.is_available == True).count(),
+        "pending_orders": by_shop_items(db.query(OrderModel).filter(OrderModel.status == OrderStatus.PENDING)).count(),
+        "upcoming_bookings": by_shop_tables(db.query(BookingModel).filter(
+            BookingModel.booking_date >= today,
+            or_(BookingModel.status == BookingStatus.NOCONFIRM, BookingModel.status == BookingStatus.CONFIRM),
+        )).count(),
+        "top_selling_item_today": top_selling.group_by(CoffeeMenuModel.name)
+                                             .order_by(func.sum(OrderItemModel.quantity).desc()).limit(1).scalar(),
+        "revenue_last_month": orders_base_query.filter(ordered_last_month)
+                                               .with_entities(func.sum(OrderModel.total_price)).scalar() or 0,
+        "orders_last_month": orders_base_query.filter(ordered_last_month).count(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard summary round trips and latency, before vs after")
+    parser.add_argument("--shops", type=int, default=5)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--bookings", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with rolled_back_session() as db:
+        dataset = seed_dataset(db, shops=args.shops, orders=args.orders, bookings=args.bookings)
+        print(f"seeded {args.shops} shops, {args.orders} orders, {args.bookings} bookings "
+              f"(rolled back afterwards); {args.repeat} runs each")
+        print(f"{'scope':8s} {'variant':7s} {'queries':>7s} {'mean ms':>9s} {'p50 ms':>9s} {'p95 ms':>9s}")
+        for scope, shop_id in (("all", None), ("shop", dataset.shop_ids[0])):
+            for variant, run in (
+                ("before", lambda: legacy_dashboard_summary(db, shop_id)),
+                ("after", lambda: admin_analytics_service.get_dashboard_summary(db, shop_id)),
+            ):
+                timing = measure(run, args.repeat)
+                print(f"{scope:8s} {variant:7s} {timing.queries:7d} {timing.mean_ms:9.2f} "
+                      f"{timing.p50_ms:9.2f} {timing.p95_ms:9.2f}")
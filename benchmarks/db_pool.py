@@ -0,0 +1,61 @@
+"""
+Saturate a connection pool and report throughput and checkout waits
+
+    python -m benchmarks.db_pool --pool-size 5 --max-overflow 0 --workers 50 --hold-ms 50
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.utils.pool_metrics import PoolMetrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Saturate a connection pool and report checkout waits")
+    parser.add_argument("--workers", type=int, default=50, help="concurrent threads requesting connections")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--hold-ms", type=float, default=50, help="time each request holds its connection (pg_sleep)")
+    parser.add_argument("--pool-size", type=int, default=settings.DB_POOL_SIZE)
+    parser.add_argument("--max-overflow", type=int, default=settings.DB_MAX_OVERFLOW)
+    parser.add_argument("--pool-timeout", type=float, default=settings.DB_POOL_TIMEOUT_SECONDS)
+    args = parser.parse_args()
+
+    metrics = PoolMetrics("stress")
+    stress_engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=metrics.pool_class(QueuePool),
+        pool_size=args.pool_size,
+        max_overflow=args.max_overflow,
+        pool_timeout=args.pool_timeout,
+    )
+    metrics.attach(stress_engine)
+
+    def one_request(_: int) -> bool:
+        try:
+            with stress_engine.connect() as conn:
+                conn.execute(text("SELECT pg_sleep(:s)"), {"s": args.hold_ms / 1000})
+            return True
+        except exc.TimeoutError:
+            return False
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        ok = sum(executor.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    stress_engine.dispose()
+
+    snapshot = metrics.snapshot()
+    capacity = args.pool_size + args.max_overflow
+    print(f"pool {args.pool_size}+{args.max_overflow}, {args.workers} workers, hold {args.hold_ms:g} ms: "
+          f"{ok}/{args.requests} ok in {elapsed:.2f} s ({ok / elapsed:.0f} req/s, "
+          f"ideal {capacity * 1000 / args.hold_ms:.0f} req/s), {snapshot['timeouts']} pool timeouts")
+    print(f"checkout wait ms: avg {snapshot['wait_ms']['avg']}, max {snapshot['wait_ms']['max']}")
+    previous = 0
+    for bound, cumulative in snapshot["wait_ms"]["buckets"].items():
+        print(f"  <= {bound:>6} ms: {cumulative - previous}")
+        previous = cumulative
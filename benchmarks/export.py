@@ -0,0 +1,77 @@
+"""
+Export throughput and peak memory, streamed vs materialized (run one mode
+per process, peak RSS is per process)
+
+    python -m benchmarks.export --dataset order_items --format csv --days 365
+    python -m benchmarks.export --dataset order_items --format csv --days 365 --materialize
+"""
+import argparse
+import csv
+import io
+import json
+import resource
+import sys
+import time as timer
+import zlib
+from datetime import date, timedelta
+from typing import Any, Iterator, List
+
+from app.core.database import SessionLocal
+from app.services.export_service import EXPORT_DATASETS, EXPORT_FORMATS, _plain, encode_export, export_service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export throughput and peak memory (run one mode per process)")
+    parser.add_argument("--dataset", choices=sorted(EXPORT_DATASETS), default="order_items")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--materialize", action="store_true",
+                        help="baseline: load every row with .all() and build the body in memory")
+    args = parser.parse_args()
+
+    start = date.today() - timedelta(days=args.days)
+    rows_seen = 0
+    bytes_out = 0
+    started = timer.perf_counter()
+
+    if args.materialize:
+        db = SessionLocal()
+        try:
+            columns = EXPORT_DATASETS[args.dataset].columns
+            rows = [[_plain(value) for value in row]
+                    for row in export_service.query(db, args.dataset, start_date=start).all()]
+            rows_seen = len(rows)
+            if args.format == "csv":
+                output = io.StringIO()
+                writer = csv.writer(output)
+                writer.writerow(columns)
+                writer.writerows(rows)
+                body = output.getvalue().encode()
+            else:
+                body = "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows).encode()
+            bytes_out = len(zlib.compress(body)) if args.gzip else len(body)
+        finally:
+            db.close()
+    else:
+        def counted(rows: Iterator[List[Any]]) -> Iterator[List[Any]]:
+            global rows_seen
+            for row in rows:
+                rows_seen += 1
+                yield row
+
+        db = SessionLocal()
+        try:
+            rows = counted(export_service.rows(db, args.dataset, start_date=start))
+            for chunk in encode_export(EXPORT_DATASETS[args.dataset].columns, rows, args.format, args.gzip):
+                bytes_out += len(chunk)
+        finally:
+            db.close()
+
+    elapsed = timer.perf_counter() - started
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    mode = "materialized" if args.materialize else "streamed"
+    print(f"{mode} {args.dataset} as {args.format}{' (gzip)' if args.gzip else ''}: "
+          f"{rows_seen} rows, {bytes_out / 1024:.0f} KiB in {elapsed:.2f} s "
+          f"({rows_seen / elapsed if elapsed else 0:.0f} rows/s), peak RSS {peak_rss_mb:.1f} MiB")
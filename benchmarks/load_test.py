@@ -0,0 +1,130 @@
+"""
+HTTP load test: requests/s overall and per uvicorn worker at a fixed
+concurrency, with latency percentiles and the DB time reported in the
+Server-Timing header. Either starts uvicorn itself for each worker count,
+or targets a server that is already running (--url).
+
+    python -m benchmarks.load_test --workers 1,2,4 --concurrency 64 --token <admin JWT>
+    python -m benchmarks.load_test --url http://localhost:8000 --workers 4 --path /api/v1/menu
+"""
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple, Optional
+
+import httpx
+
+from benchmarks.common import percentile
+
+# TrustedHostMiddleware only accepts the production host
+DEFAULT_HOST = "coffee-shop-backend-fastapi-production.up.railway.app"
+SERVER_TIMING_DB = re.compile(r"db;dur=([0-9.]+)")
+
+
+class LoadResult(NamedTuple):
+    requests: int
+    errors: int
+    elapsed_s: float
+    latencies_ms: List[float]
+    db_ms: List[float]
+
+
+async def run_load(url: str, path: str, headers: dict, concurrency: int, duration_s: float) -> LoadResult:
+    """`concurrency` clients sending requests back to back for `duration_s` seconds"""
+    latencies, db_times = [], []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration_s
+
+        async def one_client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+                match = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+                if match:
+                    db_times.append(float(match.group(1)))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return LoadResult(len(latencies), errors, elapsed, latencies, db_times)
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env={**os.environ, "SCHEDULER_ENABLED": "false"},
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", headers={"host": DEFAULT_HOST}).status_code < 500:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"uvicorn with {workers} worker(s) did not start on port {port}")
+
+
+def report(workers: int, result: LoadResult) -> None:
+    throughput = result.requests / result.elapsed_s
+    if not result.latencies_ms:
+        print(f"{workers:7d}  no successful requests ({result.errors} errors)")
+        return
+    db_avg = sum(result.db_ms) / len(result.db_ms) if result.db_ms else 0.0
+    print(f"{workers:7d} {throughput:9.1f} {throughput / workers:11.1f} "
+          f"{percentile(result.latencies_ms, 50):8.1f} {percentile(result.latencies_ms, 95):8.1f} "
+          f"{percentile(result.latencies_ms, 99):8.1f} {db_avg:8.1f} {result.errors:7d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent throughput per worker for one endpoint")
+    parser.add_argument("--url", default=None, help="running server; by default uvicorn is started per worker count")
+    parser.add_argument("--workers", default="1,2,4", help="comma separated worker counts (with --url: the server's)")
+    parser.add_argument("--path", default="/api/v1/admin/analytics/dashboard/summary")
+    parser.add_argument("--token", default=os.getenv("BENCH_TOKEN"), help="bearer token (admin for /admin routes)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Host header")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20, help="seconds per run")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    headers = {"host": args.host}
+    if args.token:
+        headers["authorization"] = f"Bearer {args.token}"
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    if args.url and len(worker_counts) != 1:
+        parser.error("with --url, pass the running server's worker count only")
+
+    print(f"GET {args.path}, {args.concurrency} concurrent clients, {args.duration:g} s per run")
+    print(f"{'workers':>7s} {'req/s':>9s} {'req/s/wkr':>11s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} "
+          f"{'db ms':>8s} {'errors':>7s}")
+    for workers in worker_counts:
+        server: Optional[subprocess.Popen] = None
+        url = args.url
+        if url is None:
+            server = start_server(args.port, workers)
+            url = f"http://127.0.0.1:{args.port}"
+        try:
+            report(workers, asyncio.run(run_load(url, args.path, headers, args.concurrency, args.duration)))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
@@ -0,0 +1,79 @@
+"""
+Caller-side logging cost per request: direct handlers with f-strings vs the
+queue handler with lazy args
+
+    python -m benchmarks.log_queue --requests 2000 --lines 5
+"""
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Tuple
+
+from app.core.config import settings
+from app.utils.logger import JsonFormatter, NonBlockingQueueHandler, RequestIdFilter
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Caller-side logging cost per request, direct handlers vs the queue")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=5, help="log calls per request")
+    args = parser.parse_args()
+
+    # Roughly the size of a Midtrans charge response
+    payload = {"order_id": "ORDER-123", "status_code": "201", "transaction_status": "pending",
+               "actions": [{"name": f"action-{i}", "method": "GET", "url": "https://example.com/" + "x" * 80}
+                           for i in range(6)], "va_numbers": [{"bank": "bca", "va_number": "1234567890"}]}
+    tmp_dir = tempfile.mkdtemp()
+
+    def run(bench_logger: logging.Logger, use_fstring: bool) -> float:
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            for _ in range(args.lines):
+                if use_fstring:
+                    bench_logger.info(f"Payment request created: {payload}")
+                else:
+                    bench_logger.info("Payment request created: %s", payload)
+        return (time.perf_counter() - started) / args.requests * 1e6
+
+    def direct_logger() -> logging.Logger:
+        bench = logging.getLogger("bench.direct")
+        bench.propagate = False
+        stream = logging.StreamHandler(open(os.devnull, "w"))
+        stream.setFormatter(logging.Formatter('%(name)s - %(levelname)s - %(message)s'))
+        rotating = RotatingFileHandler(os.path.join(tmp_dir, "direct.log"), maxBytes=5 * 1024 * 1024, backupCount=1)
+        rotating.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        bench.addHandler(stream)
+        bench.addHandler(rotating)
+        bench.setLevel(logging.INFO)
+        return bench
+
+    def queued_logger() -> Tuple[logging.Logger, QueueListener, NonBlockingQueueHandler]:
+        bench = logging.getLogger("bench.queued")
+        bench.propagate = False
+        stream = logging.StreamHandler(open(os.devnull, "w"))
+        stream.setFormatter(JsonFormatter())
+        rotating = RotatingFileHandler(os.path.join(tmp_dir, "queued.log"), maxBytes=5 * 1024 * 1024, backupCount=1)
+        rotating.setFormatter(JsonFormatter())
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        handler.addFilter(RequestIdFilter())
+        listener = QueueListener(handler.queue, stream, rotating)
+        bench.addHandler(handler)
+        bench.setLevel(logging.INFO)
+        return bench, listener, handler
+
+    direct_us = run(direct_logger(), use_fstring=True)
+    bench, listener, handler = queued_logger()
+    listener.start()
+    queued_us = run(bench, use_fstring=False)
+    drain_started = time.perf_counter()
+    listener.stop()
+    drain_s = time.perf_counter() - drain_started
+
+    print(f"{args.requests} requests x {args.lines} log lines")
+    print(f"  direct handlers, f-string: {direct_us:8.1f} us/request on the caller")
+    print(f"  queue + listener, lazy:    {queued_us:8.1f} us/request on the caller "
+          f"({handler.dropped} dropped, listener drained the rest in {drain_s:.2f} s)")
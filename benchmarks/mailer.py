@@ -0,0 +1,64 @@
+"""
+Email throughput against a local SMTP sink: a connection per message vs the
+pooled, batching dispatcher
+
+    python -m benchmarks.mailer --messages 2000 --pool-size 4 --batch-size 20
+"""
+import argparse
+import asyncio
+import smtplib
+import time
+from typing import List
+
+from app.services.mailer import EmailDispatcher, OutgoingEmail, SMTPConnectionPool, build_message
+from app.services.smtp_sink import SMTPSink
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email throughput against a local SMTP sink")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--port", type=int, default=2526)
+    args = parser.parse_args()
+
+    async def benchmark() -> None:
+        sink = SMTPSink(port=args.port)
+        await sink.start()
+        emails = [
+            OutgoingEmail(to_email=f"user{i}@example.com", subject=f"Benchmark {i}", html_content="<p>Hello</p>")
+            for i in range(args.messages)
+        ]
+
+        # Baseline: a new connection per message, like the previous send_email.
+        # Runs in a thread, the sink shares this event loop.
+        def connection_per_message(batch: List[OutgoingEmail]) -> None:
+            for email in batch:
+                with smtplib.SMTP("127.0.0.1", args.port) as server:
+                    message = build_message(email, "bench@example.com", "Bench")
+                    server.sendmail("bench@example.com", [email.to_email], message.as_string())
+
+        baseline_count = min(100, len(emails))
+        started = time.perf_counter()
+        await asyncio.to_thread(connection_per_message, emails[:baseline_count])
+        baseline = baseline_count / (time.perf_counter() - started)
+        print(f"connection per message: {baseline:8.1f} msg/s")
+
+        pool = SMTPConnectionPool("127.0.0.1", args.port, None, None, False, args.pool_size, 10.0)
+        dispatcher = EmailDispatcher(pool, "bench@example.com", "Bench", args.batch_size, 3, 0.1)
+        await dispatcher.start()
+        sink.messages = 0
+        started = time.perf_counter()
+        for email in emails:
+            dispatcher.enqueue(email)
+        await dispatcher._queue.join()
+        elapsed = time.perf_counter() - started
+        await dispatcher.stop()
+        print(
+            f"pooled dispatcher:      {args.messages / elapsed:8.1f} msg/s "
+            f"(pool={args.pool_size}, batch={args.batch_size}, connections opened={pool.connections_opened}, "
+            f"received={sink.messages})"
+        )
+        await sink.stop()
+
+    asyncio.run(benchmark())
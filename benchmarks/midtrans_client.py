@@ -0,0 +1,70 @@
+"""
+Payment-creation latency under concurrency against the fake Midtrans server
+
+    uvicorn app.services.midtrans_fake_server:app --port 8099
+    python -m benchmarks.midtrans_client --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.config import settings
+from app.services.midtrans_client import CircuitBreaker, MidtransClient, MidtransError
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Payment-creation latency under concurrency "
+                    "(start the fake server first: uvicorn app.services.midtrans_fake_server:app --port 8099)"
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8099")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    async def benchmark() -> None:
+        client = MidtransClient(
+            base_url=args.base_url,
+            server_key="benchmark",
+            timeout=settings.MIDTRANS_TIMEOUT_SECONDS,
+            connect_timeout=settings.MIDTRANS_CONNECT_TIMEOUT_SECONDS,
+            max_connections=settings.MIDTRANS_MAX_CONNECTIONS,
+            max_retries=settings.MIDTRANS_MAX_RETRIES,
+            backoff_base=settings.MIDTRANS_RETRY_BACKOFF_SECONDS,
+            breaker=CircuitBreaker(settings.MIDTRANS_CIRCUIT_FAILURE_THRESHOLD, settings.MIDTRANS_CIRCUIT_RESET_SECONDS),
+        )
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+        errors = 0
+
+        async def create_one(index: int) -> None:
+            nonlocal errors
+            payload = {
+                "payment_type": "qris",
+                "transaction_details": {"order_id": f"BENCH-{index}", "gross_amount": 25000},
+            }
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await client.charge(payload)
+                    latencies.append(time.perf_counter() - started)
+                except MidtransError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(create_one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        await client.aclose()
+
+        latencies.sort()
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+            print(
+                f"{len(latencies)} ok, {errors} errors in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s); "
+                f"latency ms p50={statistics.median(latencies) * 1000:.1f} p95={p95:.1f} max={latencies[-1] * 1000:.1f}"
+            )
+        else:
+            print(f"all {errors} requests failed")
+
+    asyncio.run(benchmark())
@@ -0,0 +1,51 @@
+"""
+Page-N latency on orders: OFFSET/LIMIT vs keyset cursor
+
+    python -m benchmarks.pagination --limit 50 --pages 1 10 100 1000
+"""
+import argparse
+import time
+
+from sqlalchemy import desc
+
+from app.core.database import SessionLocal
+from app.models.order import OrderModel
+from app.utils.pagination import encode_cursor, keyset_page
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Page-N latency on orders: OFFSET/LIMIT vs keyset cursor")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        def timed(run) -> float:
+            run()  # warm up
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                run()
+            return (time.perf_counter() - started) / args.repeat * 1000
+
+        for page in args.pages:
+            skip = (page - 1) * args.limit
+            # Cursor of page N = last row of page N-1
+            boundary = db.query(OrderModel.created_at, OrderModel.id)\
+                .order_by(desc(OrderModel.created_at), desc(OrderModel.id))\
+                .offset(skip - 1).limit(1).first() if skip else None
+            if skip and boundary is None:
+                print(f"page {page:5d}: not enough orders")
+                continue
+            cursor = encode_cursor(boundary.created_at, boundary.id) if boundary else ""
+
+            offset_ms = timed(lambda: db.query(OrderModel)
+                              .order_by(desc(OrderModel.created_at), desc(OrderModel.id))
+                              .offset(skip).limit(args.limit).all())
+            keyset_ms = timed(lambda: keyset_page(
+                db.query(OrderModel), OrderModel.created_at, OrderModel.id, cursor, args.limit
+            ))
+            print(f"page {page:5d}: offset {offset_ms:8.2f} ms   cursor {keyset_ms:8.2f} ms")
+    finally:
+        db.close()
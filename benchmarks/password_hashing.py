@@ -0,0 +1,47 @@
+"""
+Login throughput: bcrypt inline vs the process pool, with and without
+backpressure
+
+    python -m benchmarks.password_hashing --logins 64 --concurrency 16 --workers 4
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.utils.password_hashing import PasswordHasher, pwd_context
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login throughput benchmark: inline bcrypt vs the process pool")
+    parser.add_argument("--logins", type=int, default=64, help="Number of password verifications")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent login requests")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="Pool size")
+    args = parser.parse_args()
+
+    stored_hash = pwd_context.hash("benchmark-password")
+
+    def run(hasher: PasswordHasher) -> Tuple[float, int, int]:
+        def login(_: int) -> bool:
+            try:
+                return hasher.verify("benchmark-password", stored_hash)
+            except HTTPException:
+                return False
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as clients:
+            results = list(clients.map(login, range(args.logins)))
+        return time.perf_counter() - started, sum(results), hasher.rejected
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, bcrypt rounds {settings.PASSWORD_BCRYPT_ROUNDS}")
+    for label, hasher in (
+        ("inline", PasswordHasher(workers=0, max_pending=args.logins)),
+        (f"pool x{args.workers}", PasswordHasher(workers=args.workers, max_pending=args.logins)),
+        (f"pool x{args.workers}, max_pending={args.workers}", PasswordHasher(workers=args.workers, max_pending=args.workers)),
+    ):
+        elapsed, ok, rejected = run(hasher)
+        hasher.shutdown()
+        print(f"{label:<32} {ok / elapsed:8.1f} logins/s  ok={ok} rejected={rejected} total={elapsed:.2f}s")
@@ -0,0 +1,53 @@
+"""
+Shop-scoped order analytics: filtering through the order_items/coffee_menus
+join vs the denormalized orders.coffee_shop_id
+
+    python -m benchmarks.shop_filter --days 90 --repeat 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import and_, func
+
+from app.core.database import SessionLocal
+from app.models.coffee import CoffeeMenuModel
+from app.models.order import OrderItemModel, OrderModel, OrderStatus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shop-scoped order analytics: item/menu join vs orders.coffee_shop_id")
+    parser.add_argument("--coffee-shop-id", type=UUID, default=None, help="defaults to the shop with the most orders")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        shop_id = args.coffee_shop_id or db.query(OrderModel.coffee_shop_id)\
+            .filter(OrderModel.coffee_shop_id.isnot(None))\
+            .group_by(OrderModel.coffee_shop_id)\
+            .order_by(func.count(OrderModel.id).desc()).limit(1).scalar()
+        since = datetime.utcnow() - timedelta(days=args.days)
+        completed = and_(OrderModel.ordered_at >= since, OrderModel.status == OrderStatus.COMPLETED)
+        aggregates = (func.count(OrderModel.id), func.coalesce(func.sum(OrderModel.total_price), 0))
+
+        def via_join():
+            return db.query(*aggregates)\
+                     .join(OrderItemModel, OrderModel.id == OrderItemModel.order_id)\
+                     .join(CoffeeMenuModel, OrderItemModel.coffee_id == CoffeeMenuModel.id)\
+                     .filter(completed, CoffeeMenuModel.coffee_shop_id == shop_id).one()
+
+        def via_column():
+            return db.query(*aggregates).filter(completed, OrderModel.coffee_shop_id == shop_id).one()
+
+        for label, run in (("order_items/coffee_menus join", via_join), ("orders.coffee_shop_id", via_column)):
+            run()  # warm up
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                count, revenue = run()
+            elapsed_ms = (time.perf_counter() - started) / args.repeat * 1000
+            print(f"{label:30s} {elapsed_ms:8.2f} ms/query  orders={count} revenue={int(revenue)}")
+    finally:
+        db.close()
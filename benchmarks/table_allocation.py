@@ -0,0 +1,48 @@
+"""
+Table allocation strategies on synthetic shop layouts: seated requests,
+wasted seats, tables used and run time per strategy
+
+    python -m benchmarks.table_allocation --layouts 200 --requests 50
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+
+from app.services.table_allocation import TableAllocationStrategy, _optimal, allocate_tables, wasted_seats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark table allocation strategies on synthetic shop layouts")
+    parser.add_argument("--layouts", type=int, default=200, help="Number of synthetic shop layouts")
+    parser.add_argument("--requests", type=int, default=50, help="Booking requests per layout")
+    parser.add_argument("--max-tables", type=int, default=40, help="Maximum tables per layout")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Table = namedtuple("Table", "id capacity")
+    rng = random.Random(args.seed)
+    scenarios = []
+    for _ in range(args.layouts):
+        layout = [Table(i, rng.choice([2, 2, 2, 4, 4, 4, 6, 8, 10])) for i in range(rng.randint(4, args.max_tables))]
+        for _ in range(args.requests):
+            free = [table for table in layout if rng.random() < 0.6]
+            scenarios.append((free, rng.randint(1, 16)))
+
+    print(f"{len(scenarios)} requests over {args.layouts} layouts")
+    print(f"{'strategy':<10} {'seated':>7} {'rejected':>9} {'wasted seats':>13} {'avg waste':>10} {'tables':>7} {'total ms':>9}")
+    for strategy in TableAllocationStrategy:
+        _optimal.cache_clear()
+        seated = rejected = wasted = table_count = 0
+        started = time.perf_counter()
+        for free, guests in scenarios:
+            selected = allocate_tables(free, guests, strategy)
+            if selected:
+                seated += 1
+                wasted += wasted_seats(selected, guests)
+                table_count += len(selected)
+            else:
+                rejected += 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        average = wasted / seated if seated else 0.0
+        print(f"{strategy.value:<10} {seated:>7} {rejected:>9} {wasted:>13} {average:>10.2f} {table_count:>7} {elapsed_ms:>9.1f}")
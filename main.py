@@ -4,9 +4,23 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware 
 import os
+import hmac
+from fastapi import Request
+from fastapi.responses import PlainTextResponse, Response
 from app.core.database import Base, engine
 from app.routes import api
 from app.core.config import settings
+from app.services.mailer import email_dispatcher
+from app.services.midtrans_client import midtrans_client
+from app.services.payment_notification_worker import payment_notification_worker
+from app.services.payment_reconciler import payment_reconciler
+from app.services.rating_aggregates import rating_aggregate_verifier
+from app.services.scheduler import job_scheduler
+from app.utils.email_templates import email_templates
+from app.utils.logger import RequestIdMiddleware
+from app.utils.password_hashing import password_hasher
+from app.utils.metrics import MetricsMiddleware, default_registry, preallocate_routes
+from app.utils.query_instrumentation import QueryStatsMiddleware
 
 # Create application
 app = FastAPI(
@@ -31,14 +45,51 @@ app.add_middleware(
 
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["coffee-shop-backend-fastapi-production.up.railway.app"])
 
+# Per-route latency, status and DB time for /metrics (inside QueryStatsMiddleware, to see the request's DB time)
+app.add_middleware(MetricsMiddleware)
+
+# Per-request query count / DB time (Server-Timing header) and slow-query log
+app.add_middleware(QueryStatsMiddleware)
+
+# Outermost: the request id is set before anything below logs
+app.add_middleware(RequestIdMiddleware)
+
 
 # Include API router
 app.include_router(api.api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def start_background_workers():
+    email_templates.preload()
+    preallocate_routes(app.routes)
+    await payment_notification_worker.start()
+    await payment_reconciler.start()
+    await email_dispatcher.start()
+    await rating_aggregate_verifier.start()
+    await job_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await payment_notification_worker.stop()
+    await payment_reconciler.stop()
+    await email_dispatcher.stop()
+    await rating_aggregate_verifier.stop()
+    await job_scheduler.stop()
+    password_hasher.shutdown()
+    await midtrans_client.aclose()
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Coffee Shop API"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    if settings.METRICS_BEARER_TOKEN:
+        expected = f"Bearer {settings.METRICS_BEARER_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+            return Response(status_code=401)
+    return PlainTextResponse(default_registry.render(), media_type="text/plain; version=0.0.4")
+
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,8 @@
+"""
+Operational scripts (backfills, checks, one-off job runs), kept out of the
+application package. Run them from the repository root, e.g.:
+
+    python -m scripts.backfill_sales_rollup --all
+    python -m scripts.run_job transaction_expiry
+"""
+import app.utils.logger  # noqa: F401  (configures the "app" logger for CLI runs)
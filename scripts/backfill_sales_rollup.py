@@ -0,0 +1,29 @@
+"""
+Backfill the daily_shop_sales rollup table
+
+    python -m scripts.backfill_sales_rollup --all
+    python -m scripts.backfill_sales_rollup --start 2025-01-01 --end 2025-12-31
+"""
+import argparse
+from datetime import date
+
+from app.core.database import SessionLocal
+from app.services.sales_rollup_service import sales_rollup_service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the daily_shop_sales rollup table")
+    parser.add_argument("--start", type=date.fromisoformat, help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="End date (YYYY-MM-DD)")
+    parser.add_argument("--all", action="store_true", help="Rebuild the whole order history")
+    args = parser.parse_args()
+
+    if not args.all and not (args.start and args.end):
+        parser.error("use --all or both --start and --end")
+
+    db = SessionLocal()
+    try:
+        written = sales_rollup_service.backfill(db, args.start, args.end)
+        print(f"{written} rollup rows written")
+    finally:
+        db.close()
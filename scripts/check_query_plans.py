@@ -0,0 +1,29 @@
+"""
+Fail when hot queries regress to sequential scans
+
+    python -m scripts.check_query_plans                 # exit code 1 on a regression
+    python -m scripts.check_query_plans --respect-costs # on a seeded, production-sized database
+"""
+import argparse
+import sys
+
+from app.core.database import SessionLocal
+from app.utils.query_plan_check import PLAN_CHECKS, run_plan_checks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail when hot queries regress to sequential scans")
+    parser.add_argument("--respect-costs", action="store_true",
+                        help="keep enable_seqscan on (use against a seeded, production-sized database)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        failures = run_plan_checks(db, respect_costs=args.respect_costs)
+    finally:
+        db.close()
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    print(f"{len(PLAN_CHECKS) - len(failures)}/{len(PLAN_CHECKS)} query plans use indexes")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,22 @@
+"""
+Run one scheduled job once, taking its advisory lock like the scheduler
+
+    python -m scripts.run_job transaction_expiry
+"""
+import argparse
+import time
+
+from app.services.scheduler import job_scheduler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a scheduled job once")
+    parser.add_argument("job", choices=sorted(job_scheduler.jobs))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = job_scheduler.run_once(args.job)
+    if result is None:
+        print(f"{args.job}: skipped, another process holds its lock")
+    else:
+        print(f"{args.job}: {result} row(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,23 @@
+"""
+Check (and repair) the denormalized rating aggregates on coffee_menus
+
+    python -m scripts.verify_rating_aggregates --dry-run
+"""
+import argparse
+
+from app.core.database import SessionLocal
+from app.services.rating_aggregates import rating_aggregate_verifier
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check (and repair) denormalized rating aggregates")
+    parser.add_argument("--dry-run", action="store_true", help="only report drifted menu items")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        count = rating_aggregate_verifier.verify(session, repair=not args.dry_run)
+        session.commit()
+    finally:
+        session.close()
+    print(f"{count} menu item(s) {'drifted' if args.dry_run else 'repaired'}")
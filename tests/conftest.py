@@ -0,0 +1,80 @@
+"""
+Shared fixtures. Tests that touch the database run against TEST_DATABASE_URL
+(a PostgreSQL database) and are skipped when it is not set; every test runs
+inside a transaction that is rolled back afterwards, schema included.
+"""
+import os
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.database import Base, get_db
+from app.utils.query_instrumentation import instrument_engine
+from app.utils.query_instrumentation import query_budget as _query_budget
+from app.utils.security import get_current_user
+from main import app as fastapi_app
+
+# TrustedHostMiddleware only accepts the production host
+BASE_URL = "https://coffee-shop-backend-fastapi-production.up.railway.app"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(url)
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    """Session on a connection whose outer transaction is rolled back after the test"""
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    Base.metadata.create_all(connection)
+    session = Session(bind=connection, autoflush=False)
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def client_factory(db_session):
+    """
+    client_factory(user) -> httpx.AsyncClient calling the app in-process as
+    `user`, with get_db bound to the test session. Lifespan events do not run,
+    so background workers stay off.
+    """
+    def override_get_db():
+        yield db_session
+
+    def make_client(user) -> httpx.AsyncClient:
+        fastapi_app.dependency_overrides[get_db] = override_get_db
+        fastapi_app.dependency_overrides[get_current_user] = lambda: user
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=fastapi_app), base_url=BASE_URL)
+
+    yield make_client
+    fastapi_app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    `with query_budget(n): ...` fails the test, listing the statements, when
+    the block runs more than n statements (requests made in-process included)
+    """
+    return _query_budget
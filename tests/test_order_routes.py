@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import (
+    CoffeeMenuModel,
+    CoffeeShopModel,
+    OrderItemModel,
+    OrderModel,
+    OrderStatus,
+    Role,
+    RoleModel,
+    UserModel,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def payable_orders(db_session):
+    """Ten PENDING orders of three items each from another user, plus one of the viewer's own"""
+    role = RoleModel(role=Role.USER)
+    owner = UserModel(name="Owner", email="owner@example.com", password_hash="x", role=role)
+    viewer = UserModel(name="Viewer", email="viewer@example.com", password_hash="x", role=role)
+    shop = CoffeeShopModel(name="Kopi Test", address="Jl. Test 1")
+    menus = [CoffeeMenuModel(name=f"Menu {i}", price=20000, coffee_shop=shop) for i in range(3)]
+    db_session.add_all([role, owner, viewer, shop, *menus])
+
+    now = datetime.utcnow()
+    for i in range(11):
+        order = OrderModel(
+            order_id=f"ORDER-TEST-{i}",
+            status=OrderStatus.PENDING,
+            total_price=60000,
+            ordered_at=now - timedelta(minutes=i),
+            user=viewer if i == 10 else owner,
+            coffee_shop=shop,
+        )
+        order.order_items = [OrderItemModel(coffee=menu, quantity=1, subtotal=20000) for menu in menus]
+        db_session.add(order)
+    db_session.flush()
+    return viewer
+
+
+async def test_get_payable_orders(client_factory, query_budget, payable_orders):
+    async with client_factory(payable_orders) as client:
+        with query_budget(1):
+            response = await client.get("/api/v1/orders/payable", params={"limit": 20})
+
+    assert response.status_code == 200
+    orders = response.json()
+    assert len(orders) == 10
+    assert all(order["user_email"] == "owner@example.com" for order in orders)
+    assert orders[0]["order_id"] == "ORDER-TEST-0"
+    assert orders[0]["items_count"] == 3
+    assert orders[0]["coffee_shop_name"] == "Kopi Test"
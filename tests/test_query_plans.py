@@ -0,0 +1,8 @@
+from app.utils.query_plan_check import run_plan_checks
+
+
+def test_hot_queries_use_indexes(db_session):
+    """With sequential scans disabled, every checked table must still be read through an index"""
+    failures = run_plan_checks(db_session)
+
+    assert not failures, "\n".join(failures)